@@ -0,0 +1,59 @@
+"""
+Backfill the seller daily rollups from existing orders.
+
+Sellers are paged by uid in batches of --batch-size. Each batch is one
+transaction that drops and recomputes that batch's rollups from its orders,
+so the job can be stopped and rerun at any point. Run it once after
+deploying the analytics endpoint (orders placed before that have no
+rollups), and again if the rollups are ever suspected to have drifted.
+
+Usage:
+    python -m app.commands.backfill_rollups --batch-size 50
+    python -m app.commands.backfill_rollups --seller <uid> --seller <uid>
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+
+def backfill(repo, batch_size: int = 50, progress=print) -> int:
+    """Rebuild every seller's rollups, batch_size sellers per transaction"""
+    repo.ensure_schema()
+    after, sellers, written = None, 0, 0
+    while True:
+        uids = repo.list_seller_uids(after=after, limit=batch_size)
+        if not uids:
+            break
+        written += repo.rebuild_seller_rollups(uids)
+        sellers += len(uids)
+        after = uids[-1]
+        progress(f"  {sellers} sellers, {written} rollup rows")
+    return written
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50, help="sellers per transaction")
+    parser.add_argument("--seller", action="append", help="only rebuild these sellers")
+    args = parser.parse_args()
+
+    from ..database import close_database
+    from ..repositories import get_repository
+
+    repo = get_repository()
+    start = time.perf_counter()
+    try:
+        if args.seller:
+            repo.ensure_schema()
+            written = repo.rebuild_seller_rollups(args.seller)
+        else:
+            written = backfill(repo, args.batch_size)
+    finally:
+        close_database()
+    print(f"✓ Wrote {written} rollup rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
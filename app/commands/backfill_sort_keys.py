@@ -0,0 +1,51 @@
+"""
+Fill in the product sort keys behind sorted listings.
+
+Sorted GET /products pages walk range indexes on p.available (orderable
+stock) and p.seller_rating (the seller's average rating). Both are kept up
+to date on every write, but products written before sorting shipped have
+neither and are left out of the stock and rating sorts until this runs.
+Products are paged by uid, one transaction per page; rerunning is harmless.
+
+Usage:
+    python -m app.commands.backfill_sort_keys --batch-size 500
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+
+def backfill(repo, batch_size: int = 500, progress=print) -> int:
+    """Recompute every product's sort keys, batch_size products per transaction"""
+    repo.ensure_schema()
+    after, updated = None, 0
+    while True:
+        uids = repo.list_product_uids(after=after, limit=batch_size)
+        if not uids:
+            break
+        updated += repo.sync_product_sort_keys(uids)
+        after = uids[-1]
+        progress(f"  {updated} products")
+    return updated
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="products per transaction")
+    args = parser.parse_args()
+
+    from ..database import close_database
+    from ..repositories import get_repository
+
+    start = time.perf_counter()
+    try:
+        updated = backfill(get_repository(), args.batch_size)
+    finally:
+        close_database()
+    print(f"✓ Updated sort keys of {updated} products in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
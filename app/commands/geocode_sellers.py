@@ -0,0 +1,70 @@
+"""
+Geocode existing sellers from their free-text location.
+
+Sellers created or updated since nearby search shipped are geocoded on
+write; this fills in the ones before that. Sellers are paged by uid, and
+only those without coordinates are touched unless --force is given, so the
+job can be stopped and rerun. Locations the gazetteer doesn't know are
+listed at the end; add them to app/data/ph_gazetteer.csv and run again.
+
+Usage:
+    python -m app.commands.geocode_sellers
+    python -m app.commands.geocode_sellers --force
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+
+def geocode_sellers(repo, batch_size: int = 100, force: bool = False, progress=print):
+    """Returns (sellers updated, locations that could not be geocoded)"""
+    from ..utils.geo import geocode
+
+    repo.ensure_schema()
+    after, seen, updated, unknown = None, 0, 0, set()
+    while True:
+        uids = repo.list_seller_uids(after=after, limit=batch_size)
+        if not uids:
+            break
+        for uid in uids:
+            seller = repo.get_seller(uid)
+            if seller is None or (seller.get("latitude") is not None and not force):
+                continue
+            coordinates = geocode(seller.get("location"))
+            if coordinates is None:
+                if seller.get("location"):
+                    unknown.add(seller["location"])
+                continue
+            repo.update_seller(uid, {"latitude": coordinates[0], "longitude": coordinates[1]})
+            updated += 1
+        seen += len(uids)
+        after = uids[-1]
+        progress(f"  {seen} sellers, {updated} geocoded")
+    return updated, sorted(unknown)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=100, help="sellers per page")
+    parser.add_argument("--force", action="store_true", help="re-geocode sellers that already have coordinates")
+    args = parser.parse_args()
+
+    from ..database import close_database
+    from ..repositories import get_repository
+
+    start = time.perf_counter()
+    try:
+        updated, unknown = geocode_sellers(get_repository(), args.batch_size, args.force)
+    finally:
+        close_database()
+    print(f"✓ Geocoded {updated} sellers in {time.perf_counter() - start:.1f}s")
+    if unknown:
+        print(f"Locations not in the gazetteer ({len(unknown)}):")
+        for location in unknown:
+            print(f"  {location}")
+
+
+if __name__ == "__main__":
+    main()
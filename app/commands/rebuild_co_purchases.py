@@ -0,0 +1,45 @@
+"""
+Recompute the CO_PURCHASED edges behind product recommendations.
+
+Deliveries add to the edge weights as they happen, so this is only needed
+once after deploying recommendations (orders delivered before that have no
+edges) and to drop weight left behind by deleted orders. The server also
+runs it every RECOMMENDATION_REBUILD_INTERVAL_HOURS. Products are paged by
+uid, one transaction per page, so the job can be stopped and rerun.
+
+Usage:
+    python -m app.commands.rebuild_co_purchases --batch-size 200
+    python -m app.commands.rebuild_co_purchases --product <uid> --product <uid>
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200, help="products per transaction")
+    parser.add_argument("--product", action="append", help="only rebuild these products' edges")
+    args = parser.parse_args()
+
+    from ..database import close_database
+    from ..repositories import get_repository
+    from ..utils.recommendations import CoPurchaseRebuilder
+
+    repo = get_repository()
+    start = time.perf_counter()
+    try:
+        repo.ensure_schema()
+        if args.product:
+            edges = repo.rebuild_co_purchases(args.product)
+        else:
+            edges = CoPurchaseRebuilder(interval=0, batch_size=args.batch_size).rebuild_all(progress=print)
+    finally:
+        close_database()
+    print(f"✓ Wrote {edges} co-purchase edges in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
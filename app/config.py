@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -7,16 +8,98 @@ class Settings(BaseSettings):
     
     app_name: str = Field(default="IsdaMarket")
     app_version: str = Field(default="1.0.0")
+    debug: bool = Field(default=False, alias="DEBUG")
     
-    # Neo4j Aura connection
-    neo4j_uri: str = Field(alias="NEO4J_URI")
-    neo4j_user: str = Field(alias="NEO4J_USER")
-    neo4j_password: str = Field(alias="NEO4J_PASSWORD")
+    # Neo4j Aura connection (only needed by the neo4j backend; checked when the driver is created)
+    neo4j_uri: Optional[str] = Field(default=None, alias="NEO4J_URI")
+    neo4j_user: Optional[str] = Field(default=None, alias="NEO4J_USER")
+    neo4j_password: Optional[str] = Field(default=None, alias="NEO4J_PASSWORD")
+    
+    # Storage backend: "neo4j", or "memory" for DB-free tests and benchmarks
+    repository_backend: str = Field(default="neo4j", alias="REPOSITORY_BACKEND")
+    
+    # Fast JSON responses: orjson + single-pass serialization, lists streamed above the threshold
+    fast_json: bool = Field(default=False, alias="FAST_JSON")
+    fast_json_stream_threshold: int = Field(default=500, alias="FAST_JSON_STREAM_THRESHOLD")
+    
+    # Inventory reservations held by pending orders (sweep interval 0 disables the sweeper)
+    reservation_ttl_minutes: float = Field(default=30.0, alias="RESERVATION_TTL_MINUTES")
+    reservation_sweep_interval_seconds: float = Field(default=60.0, alias="RESERVATION_SWEEP_INTERVAL_SECONDS")
+    reservation_sweep_batch_size: int = Field(default=500, alias="RESERVATION_SWEEP_BATCH_SIZE")
+    
+    # Co-purchase recommendations (cache TTL 0 disables the cache, rebuild interval 0 the rebuild)
+    recommendation_top_k: int = Field(default=20, alias="RECOMMENDATION_TOP_K")
+    recommendation_history: int = Field(default=50, alias="RECOMMENDATION_HISTORY")
+    recommendation_cache_ttl_seconds: float = Field(default=300.0, alias="RECOMMENDATION_CACHE_TTL_SECONDS")
+    recommendation_rebuild_interval_hours: float = Field(default=24.0, alias="RECOMMENDATION_REBUILD_INTERVAL_HOURS")
+    recommendation_rebuild_batch_size: int = Field(default=200, alias="RECOMMENDATION_REBUILD_BATCH_SIZE")
+    
+    # GET /me/summary badge counts, cached per user (0 disables the cache)
+    badge_cache_ttl_seconds: float = Field(default=5.0, alias="BADGE_CACHE_TTL_SECONDS")
+    
+    # Bulk product uploads: rows per write transaction, and the most rows read from one upload
+    bulk_import_batch_size: int = Field(default=200, alias="BULK_IMPORT_BATCH_SIZE")
+    bulk_import_max_rows: int = Field(default=10000, alias="BULK_IMPORT_MAX_ROWS")
+    
+    # Deleted sellers/buyers/products: dependents removed per cleanup transaction
+    cleanup_batch_size: int = Field(default=500, alias="CLEANUP_BATCH_SIZE")
+    
+    # Lifecycle: how long startup waits for Neo4j, pooled connections opened before
+    # serving, how long the server waits for in-flight requests on SIGTERM, readiness check cache
+    startup_timeout_seconds: float = Field(default=60.0, alias="STARTUP_TIMEOUT_SECONDS")
+    db_pool_warm_connections: int = Field(default=4, alias="DB_POOL_WARM_CONNECTIONS")
+    shutdown_drain_seconds: float = Field(default=25.0, alias="SHUTDOWN_DRAIN_SECONDS")
+    readiness_check_interval_seconds: float = Field(default=5.0, alias="READINESS_CHECK_INTERVAL_SECONDS")
+    
+    # Production server (gunicorn + uvicorn workers, see app/server.py): worker
+    # processes (None = one per CPU core), threads per worker for sync routes,
+    # keep-alive, and requests before a worker is recycled (0 = never)
+    web_concurrency: Optional[int] = Field(default=None, alias="WEB_CONCURRENCY")
+    threadpool_size: int = Field(default=40, alias="THREADPOOL_SIZE")
+    server_keepalive_seconds: int = Field(default=75, alias="SERVER_KEEPALIVE_SECONDS")
+    server_max_requests: int = Field(default=10000, alias="SERVER_MAX_REQUESTS")
+    server_timeout_seconds: int = Field(default=60, alias="SERVER_TIMEOUT_SECONDS")
+    
+    # Scheduled maintenance jobs (0 workers disables the scheduler)
+    job_workers: int = Field(default=2, alias="JOB_WORKERS")
+    job_lease_seconds: float = Field(default=3600.0, alias="JOB_LEASE_SECONDS")
+    job_run_history: int = Field(default=100, alias="JOB_RUN_HISTORY")
+    notification_retention_days: float = Field(default=30.0, alias="NOTIFICATION_RETENTION_DAYS")
+    
+    # Response compression (gzip, plus Brotli when the brotli package is installed)
+    compression_enabled: bool = Field(default=True, alias="COMPRESSION_ENABLED")
+    compression_min_size: int = Field(default=1024, alias="COMPRESSION_MIN_SIZE")
+    compression_gzip_level: int = Field(default=6, alias="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(default=4, alias="COMPRESSION_BROTLI_QUALITY")
+    compression_cache_max_bytes: int = Field(default=32 * 1024 * 1024, alias="COMPRESSION_CACHE_MAX_BYTES")
+    
+    # Query instrumentation: warn when one query shape repeats this often in a request
+    query_repeat_warn_threshold: int = Field(default=5, alias="QUERY_REPEAT_WARN_THRESHOLD")
+    
+    # Slow-query log
+    slow_query_threshold_ms: float = Field(default=200.0, alias="SLOW_QUERY_THRESHOLD_MS")
+    slow_query_buffer_size: int = Field(default=500, alias="SLOW_QUERY_BUFFER_SIZE")
+    slow_query_log_file: Optional[str] = Field(default=None, alias="SLOW_QUERY_LOG_FILE")
     
     # JWT settings
     jwt_secret_key: str = Field(alias="JWT_SECRET_KEY")
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
     access_token_expire_minutes: int = Field(default=1440, alias="ACCESS_TOKEN_EXPIRE_MINUTES")  # 24 hours
+    admin_token: Optional[str] = Field(default=None, alias="ADMIN_TOKEN")  # None disables /admin
+    
+    # Password hashing (pbkdf2_sha256)
+    password_hash_rounds: int = Field(default=29000, alias="PASSWORD_HASH_ROUNDS")
+    password_hash_workers: Optional[int] = Field(default=None, alias="PASSWORD_HASH_WORKERS")  # None = one per CPU core, 0 = inline
+    password_hash_max_pending: int = Field(default=64, alias="PASSWORD_HASH_MAX_PENDING")
+    password_hash_timeout_seconds: float = Field(default=5.0, alias="PASSWORD_HASH_TIMEOUT_SECONDS")
+    
+    # Login rate limiting (sliding window, 0 disables a limit)
+    login_rate_limit_per_ip: int = Field(default=20, alias="LOGIN_RATE_LIMIT_PER_IP")
+    login_rate_limit_ip_window_seconds: float = Field(default=60.0, alias="LOGIN_RATE_LIMIT_IP_WINDOW_SECONDS")
+    login_rate_limit_per_email: int = Field(default=5, alias="LOGIN_RATE_LIMIT_PER_EMAIL")
+    login_rate_limit_email_window_seconds: float = Field(default=300.0, alias="LOGIN_RATE_LIMIT_EMAIL_WINDOW_SECONDS")
+    login_rate_limit_backend: str = Field(default="memory", alias="LOGIN_RATE_LIMIT_BACKEND")  # memory or database
+    trusted_proxy_hops: int = Field(default=0, alias="TRUSTED_PROXY_HOPS")  # proxies that append to X-Forwarded-For
     
     class Config:
         env_file = ".env"
@@ -1,29 +1,34 @@
+from typing import Optional
 from fastapi import HTTPException, status
-from ..models import Buyer, Seller
+from ..repositories import get_repository
 from ..schemas import Token, BuyerLogin, SellerLogin
-from ..utils.security import verify_password, create_access_token
-from ..utils.dependencies import _retry_get_or_none
+from ..utils.security import verify_and_update_password, create_access_token
+from ..utils.rate_limit import login_rate_limiter
 
 
 class AuthController:
     """Controller for authentication operations"""
     
     @staticmethod
-    def login_buyer(login_data: BuyerLogin) -> Token:
+    def authenticate_buyer(login_data: BuyerLogin, client_ip: Optional[str] = None) -> dict:
+        """Verify buyer credentials and return the buyer record"""
+        return AuthController._authenticate("buyer", login_data.email, login_data.password, client_ip)
+    
+    @staticmethod
+    def authenticate_seller(login_data: SellerLogin, client_ip: Optional[str] = None) -> dict:
+        """Verify seller credentials and return the seller record"""
+        return AuthController._authenticate("seller", login_data.email, login_data.password, client_ip)
+    
+    @staticmethod
+    def login_buyer(login_data: BuyerLogin, client_ip: Optional[str] = None) -> Token:
         """Authenticate buyer and return JWT token"""
-        buyer = _retry_get_or_none(Buyer, email=login_data.email)
-        
-        if not buyer or not verify_password(login_data.password, buyer.password_hash):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password"
-            )
+        buyer = AuthController.authenticate_buyer(login_data, client_ip)
         
         # Create access token
         access_token = create_access_token(
             data={
-                "uid": buyer.uid,
-                "email": buyer.email,
+                "uid": buyer["uid"],
+                "email": buyer["email"],
                 "user_type": "buyer"
             }
         )
@@ -31,23 +36,53 @@ class AuthController:
         return Token(access_token=access_token)
     
     @staticmethod
-    def login_seller(login_data: SellerLogin) -> Token:
+    def login_seller(login_data: SellerLogin, client_ip: Optional[str] = None) -> Token:
         """Authenticate seller and return JWT token"""
-        seller = _retry_get_or_none(Seller, email=login_data.email)
-        
-        if not seller or not verify_password(login_data.password, seller.password_hash):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password"
-            )
+        seller = AuthController.authenticate_seller(login_data, client_ip)
         
         # Create access token
         access_token = create_access_token(
             data={
-                "uid": seller.uid,
-                "email": seller.email,
+                "uid": seller["uid"],
+                "email": seller["email"],
                 "user_type": "seller"
             }
         )
         
         return Token(access_token=access_token)
+    
+    @staticmethod
+    def _authenticate(user_type: str, email: str, password: str, client_ip: Optional[str] = None) -> dict:
+        """Look up a user by email and verify the password off the request thread"""
+        # Throttle before doing any database or hashing work
+        login_rate_limiter.check(client_ip, email)
+        
+        repo = get_repository()
+        if user_type == "buyer":
+            user = repo.get_buyer_by_email(email)
+        else:
+            user = repo.get_seller_by_email(email)
+        valid = False
+        new_hash = None
+        if user:
+            valid, new_hash = verify_and_update_password(password, user["password_hash"])
+        
+        if not valid:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password"
+            )
+        
+        login_rate_limiter.reset_email(email)
+        
+        # Transparently upgrade hashes created with an older work factor
+        if new_hash:
+            try:
+                if user_type == "buyer":
+                    repo.update_buyer(user["uid"], {"password_hash": new_hash}, touch=False)
+                else:
+                    repo.update_seller(user["uid"], {"password_hash": new_hash}, touch=False)
+            except Exception as e:
+                print(f"Error upgrading password hash: {e}")
+        
+        return user
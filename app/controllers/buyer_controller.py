@@ -1,158 +1,141 @@
-from typing import List, Optional
+from typing import List
 from fastapi import HTTPException, status
-from neomodel import db
-from neo4j import exceptions as neo4j_exceptions
-import time
-from ..models import Buyer
-from ..schemas import BuyerCreate, BuyerUpdate, BuyerResponse
+from ..repositories import get_repository
+from ..config import settings
+from ..schemas import BuyerCreate, BuyerUpdate, BuyerResponse, RecommendedProductResponse
+from ..utils.cleanup import cleanup_worker
+from ..utils.conditional import make_etag
+from ..utils.recommendations import ranked_products
 from ..utils.security import get_password_hash
 
 
 class BuyerController:
     """Controller for Buyer CRUD operations"""
-    
+
     @staticmethod
     def create_buyer(buyer_data: BuyerCreate) -> BuyerResponse:
         """Create a new buyer"""
+        repo = get_repository()
+
         # Check if email already exists
-        existing_buyer = Buyer.nodes.get_or_none(email=buyer_data.email)
-        if existing_buyer:
+        if repo.get_buyer_by_email(buyer_data.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        
+
         # Create new buyer
-        buyer = Buyer(
-            name=buyer_data.name,
-            email=buyer_data.email,
-            contact_number=buyer_data.contact_number,
-            password_hash=get_password_hash(buyer_data.password)
-        ).save()
-        
+        buyer = repo.create_buyer({
+            "name": buyer_data.name,
+            "email": buyer_data.email,
+            "contact_number": buyer_data.contact_number,
+            "password_hash": get_password_hash(buyer_data.password),
+            "profile_picture": "",
+        })
+
         return BuyerController._to_response(buyer)
-    
+
     @staticmethod
     def get_buyer(buyer_uid: str) -> BuyerResponse:
         """Get buyer by UID"""
-        buyer = Buyer.nodes.get_or_none(uid=buyer_uid)
+        buyer = get_repository().get_buyer(buyer_uid)
         if not buyer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Buyer not found"
             )
         return BuyerController._to_response(buyer)
-    
+
+    @staticmethod
+    def buyer_etag(buyer_uid: str) -> str:
+        """ETag for a buyer profile, from updated_at only"""
+        version = get_repository().get_buyer_version(buyer_uid)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Buyer not found"
+            )
+        return make_etag("buyer", buyer_uid, version)
+
+    @staticmethod
+    def get_recommended_products(buyer_uid: str, limit: int) -> List[RecommendedProductResponse]:
+        """In-stock products co-purchased with what the buyer has received, not yet received by them"""
+        from .fish_product_controller import FishProductController
+
+        repo = get_repository()
+        products = ranked_products("buyer", buyer_uid, lambda top_k: repo.list_recommended_products(
+            buyer_uid, top_k, settings.recommendation_history, settings.recommendation_top_k
+        ))
+        if not products and not repo.get_buyer_version(buyer_uid):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Buyer not found"
+            )
+        return FishProductController.to_recommendations(products, limit)
+
     @staticmethod
     def get_all_buyers() -> List[BuyerResponse]:
         """Get all buyers"""
-        # Return only buyers with valid email formats to avoid neomodel inflate errors
-        query = """
-        MATCH (b:Buyer)
-        WHERE b.email =~ '[^@]+@[^@]+\\.[^@]+'
-        RETURN b.uid AS uid, b.name AS name, b.email AS email,
-               b.contact_number AS contact_number, b.created_at AS created_at,
-               b.updated_at AS updated_at
-        ORDER BY b.created_at DESC
-        """
-
-        # Retry a few times for transient DB connection issues
-        attempts = 3
-        backoff = 0.5
-        last_exc = None
-        for attempt in range(attempts):
-            try:
-                results, meta = db.cypher_query(query)
-                last_exc = None
-                break
-            except neo4j_exceptions.ServiceUnavailable as e:
-                last_exc = e
-                time.sleep(backoff * (attempt + 1))
-        if last_exc:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                                detail="Database unavailable, please try again later") from last_exc
-        buyers = []
-        for row in results:
-            buyers.append({
-                "uid": row[0],
-                "name": row[1],
-                "email": row[2],
-                "contact_number": row[3],
-                "created_at": row[4],
-                "updated_at": row[5],
-            })
-
-        return buyers
-    
+        return get_repository().list_buyers()
+
     @staticmethod
     def update_buyer(buyer_uid: str, buyer_data: BuyerUpdate) -> BuyerResponse:
         """Update buyer information"""
-        # Wrap get_or_none in a small retry loop for transient DB errors
-        attempts = 3
-        backoff = 0.5
-        buyer = None
-        last_exc = None
-        for attempt in range(attempts):
-            try:
-                buyer = Buyer.nodes.get_or_none(uid=buyer_uid)
-                last_exc = None
-                break
-            except neo4j_exceptions.ServiceUnavailable as e:
-                last_exc = e
-                time.sleep(backoff * (attempt + 1))
-        if last_exc:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                                detail="Database unavailable, please try again later") from last_exc
-        if not buyer:
+        repo = get_repository()
+        if not repo.get_buyer(buyer_uid):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Buyer not found"
             )
-        
+
         # Update fields if provided
+        changes = {}
         if buyer_data.name is not None:
-            buyer.name = buyer_data.name
+            changes["name"] = buyer_data.name
         if buyer_data.email is not None:
             # Check if new email already exists
-            existing = Buyer.nodes.get_or_none(email=buyer_data.email)
-            if existing and existing.uid != buyer_uid:
+            existing = repo.get_buyer_by_email(buyer_data.email)
+            if existing and existing["uid"] != buyer_uid:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Email already in use"
                 )
-            buyer.email = buyer_data.email
+            changes["email"] = buyer_data.email
         if buyer_data.contact_number is not None:
-            buyer.contact_number = buyer_data.contact_number
+            changes["contact_number"] = buyer_data.contact_number
         if buyer_data.password is not None:
-            buyer.password_hash = get_password_hash(buyer_data.password)
+            changes["password_hash"] = get_password_hash(buyer_data.password)
         if buyer_data.profile_picture is not None:
-            buyer.profile_picture = buyer_data.profile_picture
-        
-        buyer.update_timestamp()
+            changes["profile_picture"] = buyer_data.profile_picture
+
+        buyer = repo.update_buyer(buyer_uid, changes)
+        if not buyer:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Buyer not found"
+            )
         return BuyerController._to_response(buyer)
-    
+
     @staticmethod
     def delete_buyer(buyer_uid: str) -> dict:
-        """Delete a buyer"""
-        buyer = Buyer.nodes.get_or_none(uid=buyer_uid)
-        if not buyer:
+        """Soft-delete a buyer and queue cleanup of its dependents"""
+        if not get_repository().delete_buyer(buyer_uid):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Buyer not found"
             )
-        
-        buyer.delete()
-        return {"message": "Buyer deleted successfully"}
-    
+        job = cleanup_worker.submit("buyer", buyer_uid)
+        return {"message": "Buyer deleted successfully", "cleanup_job_id": job.id}
+
     @staticmethod
-    def _to_response(buyer: Buyer) -> BuyerResponse:
-        """Convert Buyer model to response schema"""
+    def _to_response(buyer: dict) -> BuyerResponse:
+        """Convert a buyer record to response schema"""
         return BuyerResponse(
-            uid=buyer.uid,
-            name=buyer.name,
-            email=buyer.email,
-            contact_number=buyer.contact_number,
-            profile_picture=buyer.profile_picture if hasattr(buyer, 'profile_picture') else "",
-            created_at=buyer.created_at,
-            updated_at=buyer.updated_at
+            uid=buyer["uid"],
+            name=buyer["name"],
+            email=buyer["email"],
+            contact_number=buyer["contact_number"],
+            profile_picture=buyer.get("profile_picture") or "",
+            created_at=buyer["created_at"],
+            updated_at=buyer["updated_at"]
         )
@@ -1,50 +1,85 @@
-from typing import List, Optional
-from fastapi import HTTPException, status
-from ..models import FishProduct, Seller
-from ..utils.dependencies import _retry_get_or_none
-from ..schemas import FishProductCreate, FishProductUpdate, FishProductResponse
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from ..config import settings
+from ..repositories import get_repository
+from ..schemas import (
+    FishProductCreate, FishProductUpdate, FishProductResponse, NearbyProductResponse, RecommendedProductResponse,
+    FacetCount, PriceFacetCount, ProductFacetsResponse, BulkProductRow, BulkProductResult, BulkProductReport
+)
+from ..utils.conditional import make_etag
+from ..utils.bulk_import import iter_upload_rows
+from ..utils.cleanup import cleanup_worker
+from ..utils.export import EXPORT_BATCH_SIZE, export_response
+from ..utils.facets import PRICE_BUCKET_EDGES, facet_cache, price_buckets, sorted_counts
+from ..utils.pagination import PRODUCT_SORTS, decode_cursor, encode_cursor
+from ..utils.recommendations import ranked_products
+
+PRODUCT_EXPORT_COLUMNS = [
+    "uid", "name", "type", "price", "quantity", "description", "created_at", "updated_at",
+]
 
 
 class FishProductController:
     """Controller for Fish Product CRUD operations"""
-    
+
     @staticmethod
     def create_product(product_data: FishProductCreate) -> FishProductResponse:
         """Create a new fish product"""
+        repo = get_repository()
+
         # Get the seller
-        seller = _retry_get_or_none(Seller, uid=product_data.seller_uid)
-        if not seller:
+        if not repo.get_seller(product_data.seller_uid):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Seller not found"
+            )
+
+        # Create new product linked to the seller
+        product = repo.create_product({
+            "name": product_data.name,
+            "type": product_data.type,
+            "price": product_data.price,
+            "quantity": product_data.quantity,
+            "description": product_data.description,
+            "image": product_data.image if product_data.image else ""
+        }, product_data.seller_uid)
+        if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Seller not found"
             )
-        
-        # Create new product
-        product = FishProduct(
-            name=product_data.name,
-            type=product_data.type,
-            price=product_data.price,
-            quantity=product_data.quantity,
-            description=product_data.description,
-            image=product_data.image if product_data.image else ""
-        ).save()
-        
-        # Link to seller
-        product.seller.connect(seller)
-        
+
         return FishProductController._to_response(product)
-    
+
     @staticmethod
     def get_product(product_uid: str) -> FishProductResponse:
         """Get product by UID"""
-        product = _retry_get_or_none(FishProduct, uid=product_uid)
+        product = get_repository().get_product(product_uid)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Product not found"
             )
         return FishProductController._to_response(product)
-    
+
+    @staticmethod
+    def product_etag(product_uid: str) -> str:
+        """ETag for one product, from updated_at only (product and seller)"""
+        version = get_repository().get_product_version(product_uid)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        return make_etag("product", product_uid, version)
+
+    @staticmethod
+    def catalog_etag(*filters) -> str:
+        """ETag for a product listing: catalog version plus the filters used"""
+        return make_etag("products", get_repository().get_catalog_version(), *filters)
+
     @staticmethod
     def get_all_products(
         name: Optional[str] = None,
@@ -54,94 +89,227 @@ class FishProductController:
         seller_uid: Optional[str] = None
     ) -> List[FishProductResponse]:
         """Get all products with optional filters"""
-        products = FishProduct.nodes.all()
-        
-        # Apply filters
-        filtered_products = []
-        for product in products:
-            # Name filter (case-insensitive partial match)
-            if name and name.lower() not in product.name.lower():
-                continue
-            
-            # Type filter (case-insensitive partial match)
-            if type and type.lower() not in product.type.lower():
-                continue
-            
-            # Price range filter
-            if min_price is not None and product.price < min_price:
-                continue
-            if max_price is not None and product.price > max_price:
-                continue
-            
-            # Seller filter
-            if seller_uid:
-                sellers = product.seller.all()
-                if not sellers or sellers[0].uid != seller_uid:
-                    continue
-            
-            filtered_products.append(product)
-        
-        return [FishProductController._to_response(p) for p in filtered_products]
-    
+        # Filters run in the backend, with the seller fetched alongside each product
+        products = get_repository().list_products(
+            name=name,
+            type=type,
+            min_price=min_price,
+            max_price=max_price,
+            seller_uid=seller_uid
+        )
+        return [FishProductController._to_response(p) for p in products]
+
+    @staticmethod
+    def get_product_page(
+        sort: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        name: Optional[str] = None,
+        type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_uid: Optional[str] = None
+    ) -> Tuple[List[FishProductResponse], Optional[str]]:
+        """One sorted page of products and the cursor for the next (None on the last page)"""
+        sort_key, descending = PRODUCT_SORTS[sort]
+        after = None
+        if cursor:
+            after = decode_cursor(cursor, sort)
+            if after is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor for this sort"
+                )
+        # One extra row tells whether another page follows
+        products = get_repository().list_product_page(
+            sort_key, descending, limit + 1, after,
+            name=name,
+            type=type,
+            min_price=min_price,
+            max_price=max_price,
+            seller_uid=seller_uid
+        )
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            next_cursor = encode_cursor(sort, products[-1]["sort_value"], products[-1]["uid"])
+        return [FishProductController._to_response(p) for p in products], next_cursor
+
+    @staticmethod
+    def get_product_facets(
+        etag: str,
+        name: Optional[str] = None,
+        type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_uid: Optional[str] = None
+    ) -> ProductFacetsResponse:
+        """Listing counts per type, price bucket and seller location (cached per catalog ETag)"""
+        cached = facet_cache.get(etag)
+        if cached is not None:
+            return cached
+        facets = get_repository().product_facets(
+            PRICE_BUCKET_EDGES,
+            name=name,
+            type=type,
+            min_price=min_price,
+            max_price=max_price,
+            seller_uid=seller_uid
+        )
+        response = ProductFacetsResponse(
+            total=facets["total"],
+            type=[FacetCount(value=value, count=count) for value, count in sorted_counts(facets["type"])],
+            price=[
+                PriceFacetCount(min_price=low, max_price=high, count=facets["price"].get(index, 0))
+                for index, (low, high) in enumerate(price_buckets())
+            ],
+            location=[FacetCount(value=value, count=count) for value, count in sorted_counts(facets["location"])],
+        )
+        facet_cache.put(etag, response)
+        return response
+
+    @staticmethod
+    def get_nearby_products(lat: float, lon: float, radius_km: float, limit: int) -> List[NearbyProductResponse]:
+        """In-stock products from sellers within radius_km, nearest first"""
+        products = get_repository().list_products_near(lat, lon, radius_km, limit)
+        return [
+            NearbyProductResponse(
+                **FishProductController._to_response(p).model_dump(),
+                distance_km=round(p["distance_km"], 2)
+            )
+            for p in products
+        ]
+
+    @staticmethod
+    def get_related_products(product_uid: str, limit: int) -> List[RecommendedProductResponse]:
+        """In-stock products most often received by the same buyers as this one"""
+        repo = get_repository()
+        products = ranked_products(
+            "related", product_uid, lambda top_k: repo.list_related_products(product_uid, top_k)
+        )
+        if not products and not repo.get_product_version(product_uid):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        return FishProductController.to_recommendations(products, limit)
+
+    @staticmethod
+    def to_recommendations(products: List[dict], limit: int) -> List[RecommendedProductResponse]:
+        """Scored product records to responses, out-of-stock ones dropped"""
+        return [
+            RecommendedProductResponse(**FishProductController._to_response(p).model_dump(), score=p["score"])
+            for p in products
+            if p["quantity"] > 0
+        ][:limit]
+
+    @staticmethod
+    def export_seller_products(seller_uid: str, format: str):
+        """Stream a seller's products (without images) as NDJSON or CSV"""
+        repo = get_repository()
+        if not repo.get_seller(seller_uid):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Seller not found"
+            )
+        return export_response(
+            repo.iter_seller_products(seller_uid, EXPORT_BATCH_SIZE),
+            format,
+            PRODUCT_EXPORT_COLUMNS,
+            f"products-{seller_uid}"
+        )
+
     @staticmethod
     def update_product(product_uid: str, product_data: FishProductUpdate) -> FishProductResponse:
         """Update product information"""
-        product = _retry_get_or_none(FishProduct, uid=product_uid)
+        repo = get_repository()
+
+        # Update fields if provided
+        changes = product_data.model_dump(exclude_none=True)
+        product = repo.update_product(product_uid, changes)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Product not found"
             )
-        
-        # Update fields if provided
-        if product_data.name is not None:
-            product.name = product_data.name
-        if product_data.type is not None:
-            product.type = product_data.type
-        if product_data.price is not None:
-            product.price = product_data.price
-        if product_data.quantity is not None:
-            product.quantity = product_data.quantity
-        if product_data.description is not None:
-            product.description = product_data.description
-        if product_data.image is not None:
-            product.image = product_data.image
-        
-        product.update_timestamp()
         return FishProductController._to_response(product)
-    
+
+    @staticmethod
+    async def bulk_upsert_products(seller_uid: str, request: Request) -> BulkProductReport:
+        """Create or update a seller's products from a CSV/NDJSON/JSON upload"""
+        repo = get_repository()
+        if not await run_in_threadpool(repo.get_seller_version, seller_uid):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Seller not found"
+            )
+
+        results: List[BulkProductResult] = []
+        batch: List[Tuple[int, dict]] = []
+        truncated = False
+
+        async def flush():
+            outcomes = await run_in_threadpool(repo.bulk_upsert_products, seller_uid, [row for _, row in batch])
+            results.extend(BulkProductResult(row=number, **outcome) for (number, _), outcome in zip(batch, outcomes))
+            batch.clear()
+
+        # Batches are written while the rest of the upload is still being parsed
+        async for number, fields, error in iter_upload_rows(request):
+            if number > settings.bulk_import_max_rows:
+                truncated = True
+                break
+            if error is None:
+                try:
+                    row = BulkProductRow.model_validate(fields)
+                except ValidationError as e:
+                    first = e.errors()[0]
+                    error = f"{'.'.join(str(part) for part in first['loc'])}: {first['msg']}"
+            if error is not None:
+                results.append(BulkProductResult(row=number, status="error", detail=error))
+                continue
+            batch.append((number, row.model_dump(exclude_none=True)))
+            if len(batch) >= settings.bulk_import_batch_size:
+                await flush()
+        if batch:
+            await flush()
+
+        # Catalog ETags already moved with the writes; drop the facets cached for the old catalog at once
+        facet_cache.clear()
+        results.sort(key=lambda result: result.row)
+        return BulkProductReport(
+            created=sum(1 for r in results if r.status == "created"),
+            updated=sum(1 for r in results if r.status == "updated"),
+            failed=sum(1 for r in results if r.status == "error"),
+            truncated=truncated,
+            results=results,
+        )
+
     @staticmethod
     def delete_product(product_uid: str) -> dict:
-        """Delete a product"""
-        product = _retry_get_or_none(FishProduct, uid=product_uid)
-        if not product:
+        """Soft-delete a product and queue cleanup of its dependents"""
+        if not get_repository().delete_product(product_uid):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Product not found"
             )
-        
-        product.delete()
-        return {"message": "Product deleted successfully"}
-    
+        job = cleanup_worker.submit("product", product_uid)
+        return {"message": "Product deleted successfully", "cleanup_job_id": job.id}
+
     @staticmethod
-    def _to_response(product: FishProduct) -> FishProductResponse:
-        """Convert FishProduct model to response schema"""
-        sellers = product.seller.all()
-        seller_uid = sellers[0].uid if sellers else None
-        seller_name = sellers[0].name if sellers else None
-        seller_location = sellers[0].location if sellers and hasattr(sellers[0], 'location') else None
-        
+    def _to_response(product: dict) -> FishProductResponse:
+        """Convert a product record to response schema"""
         return FishProductResponse(
-            uid=product.uid,
-            name=product.name,
-            type=product.type,
-            price=product.price,
-            quantity=product.quantity,
-            description=product.description,
-            image=product.image if hasattr(product, 'image') else "",
-            seller_uid=seller_uid,
-            seller_name=seller_name,
-            seller_location=seller_location,
-            created_at=product.created_at,
-            updated_at=product.updated_at
+            uid=product["uid"],
+            name=product["name"],
+            type=product["type"],
+            price=product["price"],
+            quantity=product["quantity"],
+            description=product.get("description"),
+            image=product.get("image") or "",
+            seller_uid=product["seller_uid"],
+            seller_name=product["seller_name"],
+            seller_location=product["seller_location"],
+            seller_rating=product.get("seller_rating"),
+            created_at=product["created_at"],
+            updated_at=product["updated_at"]
         )
@@ -1,11 +1,17 @@
 from typing import List
 from fastapi import HTTPException, status
-from ..models import Order, FishProduct, Buyer, Seller
-from ..utils.dependencies import _retry_get_or_none
-from ..schemas import OrderCreate, OrderUpdate, OrderResponse
-from ..database import get_db
-from datetime import datetime
-import uuid
+from ..config import settings
+from ..repositories import get_repository
+from ..schemas import OrderCreate, OrderUpdate, OrderResponse, OrderBatchStatusUpdate, OrderBatchStatusResponse
+from ..utils.export import EXPORT_BATCH_SIZE, export_response
+from ..utils.order_states import STATUS_NOTIFICATIONS, allowed_sources
+
+ORDER_EXPORT_COLUMNS = [
+    "uid", "created_at", "updated_at", "status",
+    "buyer_uid", "buyer_name", "buyer_contact",
+    "fish_product_uid", "fish_product_name",
+    "quantity", "total_price", "reviewed",
+]
 
 
 class OrderController:
@@ -13,206 +19,165 @@ class OrderController:
     
     @staticmethod
     def create_order(order_data: OrderCreate) -> OrderResponse:
+        repo = get_repository()
+        
         # Lookup buyer
-        buyer = _retry_get_or_none(Buyer, uid=order_data.buyer_uid)
+        buyer = repo.get_buyer(order_data.buyer_uid)
         if not buyer:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Buyer not found")
         
         # Get product
-        product = _retry_get_or_none(FishProduct, uid=order_data.fish_product_uid)
+        product = repo.get_product(order_data.fish_product_uid)
         if not product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
         
-        if product.quantity < order_data.quantity:
+        if product["quantity"] < order_data.quantity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient quantity. Available: {product.quantity}"
+                detail=f"Insufficient quantity. Available: {product['quantity']}"
             )
         
-        # Get seller
-        sellers = product.seller.all()
-        if not sellers:
+        if not product["seller_uid"]:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product has no seller")
-        seller = sellers[0]
-        
-        total_price = product.price * order_data.quantity
         
-        # Create order
-        order = Order(quantity=order_data.quantity, total_price=total_price, status="pending").save()
-        order.buyer.connect(buyer)
-        order.seller.connect(seller)
-        order.fish_product.connect(product)
-        product.reduce_quantity(order_data.quantity)
+        # Create order and reserve the stock together, so concurrent orders cannot oversell
+        order = repo.create_order(
+            buyer["uid"], product["uid"], order_data.quantity, settings.reservation_ttl_minutes * 60
+        )
+        if not order:
+            product = repo.get_product(order_data.fish_product_uid)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient quantity. Available: {product['quantity'] if product else 0}"
+            )
         
         # Create notification for seller
         OrderController._create_notification(
-            recipient_uid=seller.uid,
+            recipient_uid=order["seller_uid"],
             recipient_type="seller",
             notif_type="new_order",
-            message=f"New order received from {buyer.name} for {product.name}!"
+            message=f"New order received from {buyer['name']} for {product['name']}!"
         )
         
-        return OrderController._to_response(order)
+        return order
     
     @staticmethod
     def get_order(order_uid: str) -> OrderResponse:
-        order = Order.nodes.get_or_none(uid=order_uid)
+        order = get_repository().get_order(order_uid)
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-        return OrderController._to_response(order)
+        return order
     
     @staticmethod
     def get_all_orders() -> List[OrderResponse]:
-        orders = Order.nodes.all()
-        return [OrderController._to_response(order) for order in orders]
+        return get_repository().list_orders()
     
     @staticmethod
     def get_buyer_orders(buyer_uid: str) -> List[OrderResponse]:
-        buyer = _retry_get_or_none(Buyer, uid=buyer_uid)
-        if not buyer:
+        repo = get_repository()
+        if not repo.get_buyer(buyer_uid):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Buyer not found")
-        orders = buyer.orders.all()
-        return [OrderController._to_response(order) for order in orders]
+        return repo.list_orders(buyer_uid=buyer_uid)
     
     @staticmethod
     def get_seller_orders(seller_uid: str) -> List[OrderResponse]:
-        seller = _retry_get_or_none(Seller, uid=seller_uid)
-        if not seller:
+        repo = get_repository()
+        if not repo.get_seller(seller_uid):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Seller not found")
-        orders = seller.orders.all()
-        return [OrderController._to_response(order) for order in orders]
+        return repo.list_orders(seller_uid=seller_uid)
+    
+    @staticmethod
+    def export_seller_orders(seller_uid: str, format: str):
+        """Stream a seller's full order history as NDJSON or CSV"""
+        repo = get_repository()
+        if not repo.get_seller(seller_uid):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Seller not found")
+        return export_response(
+            repo.iter_seller_orders(seller_uid, EXPORT_BATCH_SIZE),
+            format,
+            ORDER_EXPORT_COLUMNS,
+            f"orders-{seller_uid}"
+        )
     
     @staticmethod
     def update_order_status(order_uid: str, order_data: OrderUpdate) -> OrderResponse:
-        order = _retry_get_or_none(Order, uid=order_uid)
-        if not order:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-        
-        old_status = order.status
+        repo = get_repository()
         new_status = order_data.status
-        order.update_status(new_status)
         
-        # Get buyer for notification
-        buyers = order.buyer.all()
-        products = order.fish_product.all()
-        buyer = buyers[0] if buyers else None
-        product = products[0] if products else None
+        # The status check runs inside the repository transaction, after the order is locked
+        updated, rejected = repo.transition_orders([order_uid], new_status, allowed_sources(new_status))
+        if order_uid in rejected:
+            current = rejected[order_uid]
+            if current is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+            if current == new_status:
+                return repo.get_order(order_uid)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Cannot change order from {current} to {new_status}"
+            )
+        
+        OrderController._notify_buyers(updated, new_status)
+        return updated[0]
+    
+    @staticmethod
+    def update_order_statuses(batch: OrderBatchStatusUpdate) -> OrderBatchStatusResponse:
+        """Apply one status change to many of a seller's orders in a single transaction.
+        Valid transitions are applied; the rest are reported in `failed`."""
+        repo = get_repository()
+        if not repo.get_seller(batch.seller_uid):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Seller not found")
         
-        # Create notification for buyer based on status change
-        if buyer and new_status != old_status:
-            if new_status in ["confirmed", "accepted", "processing"]:
-                OrderController._create_notification(
-                    recipient_uid=buyer.uid,
-                    recipient_type="buyer",
-                    notif_type="order_approved",
-                    message=f"Your order for {product.name if product else 'product'} has been approved!"
-                )
-            elif new_status == "delivered":
-                OrderController._create_notification(
-                    recipient_uid=buyer.uid,
-                    recipient_type="buyer",
-                    notif_type="order_delivered",
-                    message=f"Your order for {product.name if product else 'product'} has been delivered!"
-                )
-            elif new_status == "cancelled":
-                OrderController._create_notification(
-                    recipient_uid=buyer.uid,
-                    recipient_type="buyer",
-                    notif_type="order_cancelled",
-                    message=f"Your order for {product.name if product else 'product'} has been cancelled."
-                )
+        updated, rejected = repo.transition_orders(
+            batch.order_uids, batch.status, allowed_sources(batch.status), seller_uid=batch.seller_uid
+        )
+        failed = []
+        for uid, current in rejected.items():
+            if current is None:
+                error = "Order not found"
+            elif current == batch.status:
+                error = f"Order is already {current}"
+            else:
+                error = f"Cannot change order from {current} to {batch.status}"
+            failed.append({"uid": uid, "error": error})
         
-        return OrderController._to_response(order)
+        OrderController._notify_buyers(updated, batch.status)
+        return {"status": batch.status, "updated": updated, "failed": failed}
+    
+    @staticmethod
+    def _notify_buyers(orders: List[dict], new_status: str):
+        """One notification per buyer, naming every product of theirs that changed"""
+        if new_status not in STATUS_NOTIFICATIONS:
+            return
+        notif_type, wording, punctuation = STATUS_NOTIFICATIONS[new_status]
+        by_buyer = {}
+        for order in orders:
+            if order["buyer_uid"]:
+                by_buyer.setdefault(order["buyer_uid"], []).append(order["fish_product_name"] or "product")
+        for buyer_uid, names in by_buyer.items():
+            products = ", ".join(dict.fromkeys(names))
+            if len(names) == 1:
+                message = f"Your order for {products} has been {wording}{punctuation}"
+            else:
+                message = f"Your orders for {products} have been {wording}{punctuation}"
+            OrderController._create_notification(
+                recipient_uid=buyer_uid,
+                recipient_type="buyer",
+                notif_type=notif_type,
+                message=message
+            )
     
     @staticmethod
     def delete_order(order_uid: str) -> dict:
-        order = _retry_get_or_none(Order, uid=order_uid)
-        if not order:
+        # Stock held by a pending order is given back in the same transaction
+        if not get_repository().delete_order(order_uid):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-        
-        if order.status == "pending":
-            products = order.fish_product.all()
-            if products:
-                product = products[0]
-                product.quantity += order.quantity
-                product.update_timestamp()
-        
-        order.delete()
         return {"message": "Order deleted successfully"}
     
     @staticmethod
     def _create_notification(recipient_uid: str, recipient_type: str, notif_type: str, message: str):
         """Helper method to create a notification"""
         try:
-            driver = get_db()
-            with driver.session() as session:
-                notif_uid = str(uuid.uuid4())
-                created_at = datetime.utcnow().isoformat()
-                
-                query = """
-                CREATE (n:Notification {
-                    uid: $uid,
-                    recipient_uid: $recipient_uid,
-                    recipient_type: $recipient_type,
-                    type: $type,
-                    message: $message,
-                    read: false,
-                    created_at: $created_at
-                })
-                """
-                
-                session.run(query, {
-                    "uid": notif_uid,
-                    "recipient_uid": recipient_uid,
-                    "recipient_type": recipient_type,
-                    "type": notif_type,
-                    "message": message,
-                    "created_at": created_at
-                })
+            get_repository().create_notification(recipient_uid, recipient_type, notif_type, message)
         except Exception as e:
             print(f"Error creating notification: {e}")
-    
-    @staticmethod
-    def _to_response(order: Order) -> dict:
-        """Convert Order model to response dictionary including buyer and seller contacts"""
-         # Get related buyer, seller, and product
-        buyers = order.buyer.all()
-        sellers = order.seller.all()
-        products = order.fish_product.all()
-    
-        buyer = buyers[0] if buyers else None
-        seller = sellers[0] if sellers else None
-        product = products[0] if products else None
-        
-        # Check if order has been reviewed
-        reviewed = False
-        if order.uid:
-            try:
-                driver = get_db()
-                with driver.session() as session:
-                    review_check = session.run(
-                        "MATCH (r:Review {order_uid: $order_uid}) RETURN count(r) as count",
-                        {"order_uid": order.uid}
-                    )
-                    result = review_check.single()
-                    reviewed = result["count"] > 0 if result else False
-            except Exception:
-                reviewed = False
-    
-        return {
-        "uid": order.uid,
-        "buyer_uid": buyer.uid if buyer else "",
-        "buyer_name": buyer.name if buyer else "",
-        "buyer_contact": buyer.contact_number if buyer and hasattr(buyer, "contact_number") else "N/A",
-        "seller_uid": seller.uid if seller else "",
-        "seller_name": seller.name if seller else "",
-        "seller_contact": seller.contact_number if seller and hasattr(seller, "contact_number") else "N/A",
-        "fish_product_uid": product.uid if product else "",
-        "fish_product_name": product.name if product else "",
-        "quantity": order.quantity,
-        "total_price": order.total_price,
-        "status": order.status,
-        "reviewed": reviewed,
-        "created_at": order.created_at,
-        "updated_at": order.updated_at
-    }
\ No newline at end of file
@@ -1,152 +1,217 @@
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 from fastapi import HTTPException, status
-from neomodel import db
-from neo4j import exceptions as neo4j_exceptions
-import time
-from ..models import Seller
-from ..schemas import SellerCreate, SellerUpdate, SellerResponse
+from ..repositories import get_repository
+from ..schemas import SellerCreate, SellerUpdate, SellerResponse, SellerAnalyticsResponse
+from ..utils.cleanup import cleanup_worker
+from ..utils.conditional import make_etag
+from ..utils.geo import geocode
 from ..utils.security import get_password_hash
 
 
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 366
+
+
 class SellerController:
     """Controller for Seller CRUD operations"""
-    
+
     @staticmethod
     def create_seller(seller_data: SellerCreate) -> SellerResponse:
         """Create a new seller"""
+        repo = get_repository()
+
         # Check if email already exists
-        existing_seller = Seller.nodes.get_or_none(email=seller_data.email)
-        if existing_seller:
+        if repo.get_seller_by_email(seller_data.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        
+
+        latitude, longitude = SellerController._coordinates(
+            seller_data.location, seller_data.latitude, seller_data.longitude
+        )
+
         # Create new seller
-        seller = Seller(
-            name=seller_data.name,
-            email=seller_data.email,
-            contact_number=seller_data.contact_number,
-            location=seller_data.location or "",
-            password_hash=get_password_hash(seller_data.password)
-        ).save()
-        
+        seller = repo.create_seller({
+            "name": seller_data.name,
+            "email": seller_data.email,
+            "contact_number": seller_data.contact_number,
+            "location": seller_data.location or "",
+            "latitude": latitude,
+            "longitude": longitude,
+            "password_hash": get_password_hash(seller_data.password),
+            "profile_picture": "",
+        })
+
         return SellerController._to_response(seller)
-    
+
     @staticmethod
     def get_seller(seller_uid: str) -> SellerResponse:
         """Get seller by UID"""
-        seller = Seller.nodes.get_or_none(uid=seller_uid)
+        seller = get_repository().get_seller(seller_uid)
         if not seller:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Seller not found"
             )
         return SellerController._to_response(seller)
-    
+
+    @staticmethod
+    def seller_etag(seller_uid: str) -> str:
+        """ETag for a seller profile, from updated_at only"""
+        version = get_repository().get_seller_version(seller_uid)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Seller not found"
+            )
+        return make_etag("seller", seller_uid, version)
+
     @staticmethod
     def get_all_sellers() -> List[SellerResponse]:
         """Get all sellers"""
-        # Return only sellers with valid email format to avoid neomodel inflate errors
-        query = """
-        MATCH (s:Seller)
-        WHERE s.email =~ '[^@]+@[^@]+\\.[^@]+'
-        RETURN s.uid AS uid, s.name AS name, s.email AS email,
-               s.contact_number AS contact_number, s.location AS location,
-               s.created_at AS created_at, s.updated_at AS updated_at
-        ORDER BY s.created_at DESC
-        """
-
-        # Retry a few times for transient DB connection issues
-        attempts = 3
-        backoff = 0.5
-        last_exc = None
-        for attempt in range(attempts):
-            try:
-                results, meta = db.cypher_query(query)
-                last_exc = None
-                break
-            except neo4j_exceptions.ServiceUnavailable as e:
-                last_exc = e
-                time.sleep(backoff * (attempt + 1))
-        if last_exc:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                                detail="Database unavailable, please try again later") from last_exc
-        sellers = []
-        for row in results:
-            sellers.append({
-                "uid": row[0],
-                "name": row[1],
-                "email": row[2],
-                "contact_number": row[3],
-                "location": row[4] or "",
-                "created_at": row[5],
-                "updated_at": row[6],
+        return get_repository().list_sellers()
+
+    @staticmethod
+    def get_seller_analytics(seller_uid: str, start: Optional[date] = None, end: Optional[date] = None) -> SellerAnalyticsResponse:
+        """Revenue, units and orders by day and by product, from the daily rollups"""
+        repo = get_repository()
+        if not repo.get_seller(seller_uid):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Seller not found"
+            )
+
+        # Rollup days are UTC
+        end = end or datetime.now(timezone.utc).date()
+        start = start or end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+        if start > end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start must not be after end"
+            )
+        if (end - start).days >= ANALYTICS_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Date range is limited to {ANALYTICS_MAX_DAYS} days"
+            )
+
+        rows = repo.list_seller_rollups(seller_uid, start.isoformat(), end.isoformat())
+
+        # Every day in the range, zero-filled, so charts need no gap handling
+        by_day = {}
+        for offset in range((end - start).days + 1):
+            day = (start + timedelta(days=offset)).isoformat()
+            by_day[day] = {"day": day, "orders": 0, "units": 0, "revenue": 0.0}
+        by_product = {}
+        for row in rows:
+            day = by_day[row["day"]]
+            product = by_product.setdefault(row["product_uid"], {
+                "product_uid": row["product_uid"], "product_name": row["product_name"] or "",
+                "orders": 0, "units": 0, "revenue": 0.0,
             })
+            for bucket in (day, product):
+                bucket["orders"] += row["orders"]
+                bucket["units"] += row["units"]
+                bucket["revenue"] += row["revenue"]
+
+        for bucket in list(by_day.values()) + list(by_product.values()):
+            bucket["revenue"] = round(bucket["revenue"], 2)
+        products = sorted(by_product.values(), key=lambda p: p["revenue"], reverse=True)
+        return SellerAnalyticsResponse(
+            seller_uid=seller_uid,
+            start=start,
+            end=end,
+            totals={
+                "orders": sum(p["orders"] for p in products),
+                "units": sum(p["units"] for p in products),
+                "revenue": round(sum(p["revenue"] for p in products), 2),
+            },
+            by_day=list(by_day.values()),
+            by_product=products
+        )
 
-        return sellers
-    
     @staticmethod
     def update_seller(seller_uid: str, seller_data: SellerUpdate) -> SellerResponse:
         """Update seller information"""
-        try:
-            seller = Seller.nodes.get_or_none(uid=seller_uid)
-        except neo4j_exceptions.ServiceUnavailable as e:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                                detail="Database unavailable, please try again later") from e
-        if not seller:
+        repo = get_repository()
+        if not repo.get_seller(seller_uid):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Seller not found"
             )
-        
+
         # Update fields if provided
+        changes = {}
         if seller_data.name is not None:
-            seller.name = seller_data.name
+            changes["name"] = seller_data.name
         if seller_data.email is not None:
             # Check if new email already exists
-            existing = Seller.nodes.get_or_none(email=seller_data.email)
-            if existing and existing.uid != seller_uid:
+            existing = repo.get_seller_by_email(seller_data.email)
+            if existing and existing["uid"] != seller_uid:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Email already in use"
                 )
-            seller.email = seller_data.email
+            changes["email"] = seller_data.email
         if seller_data.contact_number is not None:
-            seller.contact_number = seller_data.contact_number
+            changes["contact_number"] = seller_data.contact_number
         if seller_data.location is not None:
-            seller.location = seller_data.location
+            changes["location"] = seller_data.location
+        if seller_data.latitude is not None or seller_data.longitude is not None or seller_data.location is not None:
+            # A new location is geocoded again unless coordinates come with it
+            changes["latitude"], changes["longitude"] = SellerController._coordinates(
+                seller_data.location, seller_data.latitude, seller_data.longitude
+            )
         if seller_data.password is not None:
-            seller.password_hash = get_password_hash(seller_data.password)
+            changes["password_hash"] = get_password_hash(seller_data.password)
         if seller_data.profile_picture is not None:
-            seller.profile_picture = seller_data.profile_picture
-        
-        seller.update_timestamp()
+            changes["profile_picture"] = seller_data.profile_picture
+
+        seller = repo.update_seller(seller_uid, changes)
+        if not seller:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Seller not found"
+            )
         return SellerController._to_response(seller)
-    
+
     @staticmethod
     def delete_seller(seller_uid: str) -> dict:
-        """Delete a seller"""
-        seller = Seller.nodes.get_or_none(uid=seller_uid)
-        if not seller:
+        """Soft-delete a seller and queue cleanup of its dependents"""
+        if not get_repository().delete_seller(seller_uid):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Seller not found"
             )
-        
-        seller.delete()
-        return {"message": "Seller deleted successfully"}
-    
+        job = cleanup_worker.submit("seller", seller_uid)
+        return {"message": "Seller deleted successfully", "cleanup_job_id": job.id}
+
+    @staticmethod
+    def _coordinates(location: Optional[str], latitude: Optional[float], longitude: Optional[float]):
+        """Explicit coordinates win; otherwise geocode the location (None, None if unknown)"""
+        if (latitude is None) != (longitude is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="latitude and longitude must be given together"
+            )
+        if latitude is not None:
+            return latitude, longitude
+        return geocode(location) or (None, None)
+
     @staticmethod
-    def _to_response(seller: Seller) -> SellerResponse:
-        """Convert Seller model to response schema"""
+    def _to_response(seller: dict) -> SellerResponse:
+        """Convert a seller record to response schema"""
         return SellerResponse(
-            uid=seller.uid,
-            name=seller.name,
-            email=seller.email,
-            contact_number=seller.contact_number,
-            location=seller.location if hasattr(seller, 'location') else "",
-            profile_picture=seller.profile_picture if hasattr(seller, 'profile_picture') else "",
-            created_at=seller.created_at,
-            updated_at=seller.updated_at
+            uid=seller["uid"],
+            name=seller["name"],
+            email=seller["email"],
+            contact_number=seller["contact_number"],
+            location=seller.get("location") or "",
+            latitude=seller.get("latitude"),
+            longitude=seller.get("longitude"),
+            profile_picture=seller.get("profile_picture") or "",
+            created_at=seller["created_at"],
+            updated_at=seller["updated_at"]
         )
@@ -1,18 +1,38 @@
-from neomodel import config as neomodel_config
 from .config import settings
-from neo4j import GraphDatabase
+from .utils.query_stats import InstrumentedDriver, instrument_neomodel
+from concurrent.futures import ThreadPoolExecutor
 import os
+import sys
+import time
 
-# Global driver instance
+# Global driver instance, created on first use. neo4j and neomodel are
+# imported there too, so importing the app stays cheap (cold starts).
 _driver = None
 
 
-def init_database():
-    """Initialize Neo4j database connection"""
+def _create_driver():
+    from neo4j import GraphDatabase
+
+    if not settings.neo4j_uri:
+        raise RuntimeError("NEO4J_URI is not set")
+    return InstrumentedDriver(GraphDatabase.driver(
+        settings.neo4j_uri,
+        auth=(settings.neo4j_user, settings.neo4j_password)
+    ))
+
+
+def init_database(timeout: float = 0):
+    """Initialize the Neo4j connection and check the server answers.
+
+    Retries with backoff for up to timeout seconds (a fresh instance may
+    start before the database is reachable), then re-raises the last error.
+    """
+    from neomodel import config as neomodel_config
+
     global _driver
     
     # Compose the full connection URL with credentials
-    uri = settings.neo4j_uri
+    uri = settings.neo4j_uri or ""
     
     # If credentials are not in URI, compose them
     if "@" not in uri:
@@ -22,12 +42,22 @@ def init_database():
             uri = f"{scheme}://{settings.neo4j_user}:{settings.neo4j_password}@{host}"
     
     neomodel_config.DATABASE_URL = uri
+    instrument_neomodel()
     
     # Initialize Neo4j driver for direct queries
-    _driver = GraphDatabase.driver(
-        settings.neo4j_uri,
-        auth=(settings.neo4j_user, settings.neo4j_password)
-    )
+    _driver = _create_driver()
+    
+    deadline, delay = time.monotonic() + timeout, 0.5
+    while True:
+        try:
+            _driver.verify_connectivity()
+            break
+        except Exception as e:
+            if time.monotonic() + delay > deadline:
+                raise
+            print(f"⚠️ Neo4j not reachable yet ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 10.0)
     
     print(f"✓ Connected to Neo4j database")
 
@@ -36,17 +66,70 @@ def get_db():
     """Get Neo4j driver instance"""
     global _driver
     if _driver is None:
-        _driver = GraphDatabase.driver(
-            settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password)
-        )
+        _driver = _create_driver()
     return _driver
 
 
+def check_database() -> bool:
+    """True if the server answers a trivial query (readiness probe)"""
+    try:
+        with get_db().session() as session:
+            session.run("RETURN 1").consume()
+        return True
+    except Exception:
+        return False
+
+
+def warm_pool(connections: int):
+    """Open up to `connections` pooled connections so first requests skip the handshake"""
+    if connections <= 0:
+        return
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        list(executor.map(lambda _: check_database(), range(connections)))
+
+
 def close_database():
     """Close database connection"""
     global _driver
     if _driver:
         _driver.close()
+        _driver = None
     # neomodel handles connection pooling automatically
     pass
+
+
+def _pool_usage(driver):
+    """Return (in_use, idle, max_size) for a neo4j driver's connection pool.
+
+    The driver has no public pool metrics, so this reads its private pool
+    state and returns None if that ever changes shape.
+    """
+    try:
+        pool = driver._pool
+        with pool.lock:
+            connections = [c for conns in pool.connections.values() for c in conns]
+        in_use = sum(1 for c in connections if c.in_use)
+        return in_use, len(connections) - in_use, pool.pool_config.max_connection_pool_size
+    except Exception:
+        return None
+
+
+def pool_metrics():
+    """Prometheus lines describing the raw and neomodel driver pools"""
+    drivers = []
+    if _driver is not None:
+        drivers.append(("direct", getattr(_driver, "_driver", _driver)))
+    neomodel_db = getattr(sys.modules.get("neomodel"), "db", None)
+    if getattr(neomodel_db, "driver", None) is not None:
+        drivers.append(("neomodel", neomodel_db.driver))
+
+    yield "# HELP neo4j_pool_connections Driver connection pool usage"
+    yield "# TYPE neo4j_pool_connections gauge"
+    for name, driver in drivers:
+        usage = _pool_usage(driver)
+        if usage is None:
+            continue
+        in_use, idle, max_size = usage
+        yield f'neo4j_pool_connections{{driver="{name}",state="in_use"}} {in_use}'
+        yield f'neo4j_pool_connections{{driver="{name}",state="idle"}} {idle}'
+        yield f'neo4j_pool_connections{{driver="{name}",state="max"}} {max_size}'
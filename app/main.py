@@ -1,10 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
+from anyio import to_thread
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
-import os
-from .database import init_database, close_database
+from .database import pool_metrics
+from .utils.lifecycle import lifecycle
+from .utils.query_stats import query_stats_registry
+from .utils.rate_limit import login_rate_limiter
+from .utils.metrics import metrics
+from .utils.responses import FastJSONResponse
+from .utils.compression import compressed_body_cache
+from .utils.reservations import reservation_sweeper
+from .utils.recommendations import co_purchase_rebuilder, ranking_cache
+from .utils.facets import facet_cache
+from .utils.badges import badge_cache
+from .utils.cleanup import cleanup_worker
+from .utils.jobs import job_runner
+from .utils.maintenance import register_maintenance_jobs
+from .middleware import QueryStatsMiddleware, MetricsMiddleware, CompressionMiddleware
+from .repositories import get_repository
 from .routes import (
     seller_router,
     buyer_router,
@@ -12,20 +28,39 @@ from .routes import (
     order_router,
     notification_router,
     message_router,
-    review_router
+    review_router,
+    admin_router,
+    metrics_router,
+    auth_router,
+    me_router
 )
 from .config import settings
 
 # Load environment variables
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Verify Neo4j, warm up and start workers before serving; stop them on shutdown"""
+    # Threads serving the sync routes (AnyIO's default is 40)
+    to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    await run_in_threadpool(lifecycle.startup)
+    print(f"🚀 {settings.app_name} v{settings.app_version} started successfully in {lifecycle.startup_seconds:.2f}s!")
+    yield
+    await run_in_threadpool(lifecycle.shutdown)
+    print("👋 Application shutdown complete")
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="IsdaMarket",
     version="1.0.0",
     description="A Fish Marketplace",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse if settings.fast_json else JSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -35,26 +70,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# ✅ Neo4j Aura Connection
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USER = os.getenv("NEO4J_USER")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# gzip/Brotli above COMPRESSION_MIN_SIZE; inside the metrics middleware so latency includes it
+app.add_middleware(CompressionMiddleware)
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database connection on startup"""
-    init_database()
-    print(f"🚀 {settings.app_name} v{settings.app_version} started successfully!")
+# Per-request Cypher counters (X-DB-* headers in debug mode)
+app.add_middleware(QueryStatsMiddleware)
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close database connection on shutdown"""
-    close_database()
-    driver.close()
-    print("👋 Application shutdown complete")
+# Latency histograms, in-flight and status counters for /metrics
+app.add_middleware(MetricsMiddleware)
+metrics.register_collector(pool_metrics)
+metrics.register_collector(query_stats_registry.prometheus_lines)
+metrics.register_collector(login_rate_limiter.prometheus_lines)
+metrics.register_collector(compressed_body_cache.prometheus_lines)
+metrics.register_collector(reservation_sweeper.prometheus_lines)
+metrics.register_collector(ranking_cache.prometheus_lines)
+metrics.register_collector(facet_cache.prometheus_lines)
+metrics.register_collector(badge_cache.prometheus_lines)
+metrics.register_collector(co_purchase_rebuilder.prometheus_lines)
+metrics.register_collector(cleanup_worker.prometheus_lines)
+metrics.register_collector(job_runner.prometheus_lines)
+register_maintenance_jobs(job_runner)
 
 # Redirect root to Swagger docs
 @app.get("/", include_in_schema=False)
@@ -68,32 +106,7 @@ def search_items(query: str = Query(...), search_type: str = Query(...)):
     """
     Search for products, sellers, or buyers by name.
     """
-    with driver.session() as session:
-        if search_type == "products":
-            cypher = """
-            MATCH (p:FishProduct)
-            WHERE toLower(p.name) CONTAINS toLower($query)
-            RETURN p.uid AS id, p.name AS name, p.price AS price, p.type AS location
-            LIMIT 10
-            """
-        elif search_type == "sellers":
-            cypher = """
-            MATCH (s:Seller)
-            WHERE toLower(s.name) CONTAINS toLower($query)
-            RETURN s.uid AS id, s.name AS name, s.location AS location
-            LIMIT 10
-            """
-        else:
-            cypher = """
-            MATCH (b:Buyer)
-            WHERE toLower(b.name) CONTAINS toLower($query)
-            RETURN b.uid AS id, b.name AS name, b.location AS location
-            LIMIT 10
-            """
-
-        results = session.run(cypher, {"query": query})
-        items = [dict(record) for record in results]
-        return items
+    return get_repository().search(search_type, query)
 
 # Include routers
 app.include_router(seller_router)
@@ -103,6 +116,10 @@ app.include_router(order_router)
 app.include_router(notification_router)
 app.include_router(message_router)
 app.include_router(review_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
+app.include_router(auth_router)
+app.include_router(me_router)
 
 if __name__ == "__main__":
     import uvicorn
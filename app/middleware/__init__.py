@@ -0,0 +1,5 @@
+from .query_stats import QueryStatsMiddleware
+from .metrics import MetricsMiddleware
+from .compression import CompressionMiddleware
+
+__all__ = ["QueryStatsMiddleware", "MetricsMiddleware", "CompressionMiddleware"]
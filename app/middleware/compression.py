@@ -0,0 +1,130 @@
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from ..config import settings
+from ..utils.compression import (
+    THREAD_OFFLOAD_BYTES,
+    StreamCompressor,
+    choose_encoding,
+    compress,
+    compressed_body_cache,
+    is_compressible,
+)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with Brotli or gzip.
+
+    Bodies under COMPRESSION_MIN_SIZE go out as-is. Single-message bodies
+    are compressed in one go (and cached by ETag when the response is
+    public); streamed bodies are compressed chunk by chunk, so
+    StreamingResponse keeps its constant memory.
+    """
+
+    def __init__(self, app, cache=compressed_body_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressionResponder(self.app, self.cache, encoding, send)(scope, receive)
+
+
+class _CompressionResponder:
+    """Per-request state: holds the response start until the first body chunk decides"""
+
+    def __init__(self, app, cache, encoding: str, send):
+        self.app = app
+        self.cache = cache
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def __call__(self, scope, receive):
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            await self._send_chunk(body, more_body)
+            return
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        if not self._should_compress(headers, body, more_body):
+            self.passthrough = True
+            await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        if more_body:
+            # Streamed body: length unknown, compress as it goes
+            del headers["Content-Length"]
+            self.compressor = StreamCompressor(self.encoding)
+            await self.send(self.start_message)
+            await self._send_chunk(body, more_body)
+            return
+
+        compressed = await self._compress_body(headers, body)
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(self.start_message)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    def _should_compress(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if self.start_message["status"] < 200 or self.start_message["status"] in (204, 304):
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        if not is_compressible(headers.get("content-type")):
+            return False
+        if not more_body and len(body) < settings.compression_min_size:
+            return False
+        return True
+
+    async def _compress_body(self, headers: MutableHeaders, body: bytes) -> bytes:
+        etag = headers.get("etag")
+        cacheable = etag is not None and "public" in headers.get("cache-control", "")
+        if cacheable:
+            cached = self.cache.get((etag, self.encoding))
+            if cached is not None:
+                self.cache.record(self.encoding, len(body), len(cached))
+                return cached
+
+        if len(body) > THREAD_OFFLOAD_BYTES:
+            compressed = await run_in_threadpool(compress, body, self.encoding)
+        else:
+            compressed = compress(body, self.encoding)
+        if cacheable:
+            self.cache.put((etag, self.encoding), compressed)
+        self.cache.record(self.encoding, len(body), len(compressed))
+        return compressed
+
+    async def _send_chunk(self, body: bytes, more_body: bool):
+        chunk = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+        if not more_body:
+            self.cache.record(self.encoding, self.bytes_in, self.bytes_out)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,39 @@
+import time
+from ..utils.metrics import metrics
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding request latency, in-flight and status metrics"""
+
+    def __init__(self, app, registry=metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.in_flight -= 1
+            route = scope.get("route")
+            registry.observe_request(
+                route.path if route is not None else "<unmatched>",
+                scope["method"],
+                status_code,
+                elapsed,
+            )
@@ -0,0 +1,41 @@
+from ..config import settings
+from ..utils.query_stats import start_request, query_stats_registry
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware that collects per-request Cypher stats.
+
+    Totals are added to query_stats_registry under the matched route path.
+    In debug mode the request's numbers are also returned as X-DB-* headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_request()
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal response_bytes
+            if message["type"] == "http.response.start" and settings.debug:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.queries).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.db_time * 1000:.2f}".encode()))
+                headers.append((b"x-db-rows", str(stats.rows).encode()))
+                if stats.repeated:
+                    headers.append((b"x-db-repeated-shapes", str(stats.repeated).encode()))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            query_stats_registry.add(route.path if route is not None else "<unmatched>", stats, response_bytes)
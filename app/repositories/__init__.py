@@ -0,0 +1,42 @@
+from typing import Optional
+from ..config import settings
+from .base import Record, Repository
+from .memory_repository import MemoryRepository
+
+_repository: Optional[Repository] = None
+
+
+def get_repository() -> Repository:
+    """Return the configured storage backend (REPOSITORY_BACKEND)"""
+    global _repository
+    if _repository is None:
+        if settings.repository_backend == "memory":
+            _repository = MemoryRepository()
+        else:
+            from .neo4j_repository import Neo4jRepository
+            _repository = Neo4jRepository()
+    return _repository
+
+
+def set_repository(repository: Repository):
+    """Swap the backend, e.g. for a preloaded MemoryRepository in benchmarks"""
+    global _repository
+    _repository = repository
+
+
+def __getattr__(name: str):
+    # The Neo4j backend pulls in the driver package; import it on first use
+    if name == "Neo4jRepository":
+        from .neo4j_repository import Neo4jRepository
+        return Neo4jRepository
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "Record",
+    "Repository",
+    "MemoryRepository",
+    "Neo4jRepository",
+    "get_repository",
+    "set_repository"
+]
@@ -0,0 +1,465 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Users and products are plain dicts keyed like the Neo4j node properties.
+# Timestamps on Seller/Buyer/FishProduct/Order are timezone-aware datetimes;
+# Notification/Message/Review keep the ISO strings the raw-Cypher routes store.
+Record = Dict[str, Any]
+
+
+class Repository(ABC):
+    """Storage interface used by the controllers and routes.
+
+    Neo4jRepository is the production backend; MemoryRepository keeps the
+    same graph in indexed Python structures so the whole API can run
+    in-process for tests, profiling and CPU-bound benchmarks.
+    """
+
+    # --- sellers / buyers -------------------------------------------------
+    # Seller records carry latitude/longitude (None when the location could
+    # not be geocoded); Neo4j stores them as one indexed `point` property.
+
+    @abstractmethod
+    def get_seller(self, uid: str) -> Optional[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_seller_by_email(self, email: str) -> Optional[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_sellers(self) -> List[Record]:
+        """Sellers with a valid email, newest first, without profile pictures"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_seller(self, props: Record) -> Record:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_seller(self, uid: str, changes: Record, touch: bool = True) -> Optional[Record]:
+        """Apply changes; bump updated_at unless touch is False"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_seller(self, uid: str) -> bool:
+        """Soft delete: hide the seller from every read now (see cleanup_batch)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_seller_version(self, uid: str) -> Optional[str]:
+        """Cheap freshness token (reads only updated_at); None if missing"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_buyer(self, uid: str) -> Optional[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_buyer_by_email(self, email: str) -> Optional[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_buyers(self) -> List[Record]:
+        """Buyers with a valid email, newest first, without profile pictures"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_buyer(self, props: Record) -> Record:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_buyer(self, uid: str, changes: Record, touch: bool = True) -> Optional[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_buyer(self, uid: str) -> bool:
+        """Soft delete: hide the buyer from every read now (see cleanup_batch)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_buyer_version(self, uid: str) -> Optional[str]:
+        raise NotImplementedError
+
+    # --- products ---------------------------------------------------------
+    # Product records carry seller_uid, seller_name and seller_location, and
+    # seller_rating (the seller's average rating, 0 when unrated).
+
+    @abstractmethod
+    def get_product(self, uid: str) -> Optional[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_product_version(self, uid: str) -> Optional[str]:
+        """Freshness token covering the product and its seller's name/location"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_catalog_version(self) -> str:
+        """Changes whenever any product or seller is created, updated or deleted"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_products(
+        self,
+        name: Optional[str] = None,
+        type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_uid: Optional[str] = None,
+    ) -> List[Record]:
+        """Products matching the filters (name/type are case-insensitive substrings)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_product_page(
+        self,
+        sort_key: str,
+        descending: bool,
+        limit: int,
+        after: Optional[Tuple[Any, str]] = None,
+        name: Optional[str] = None,
+        type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_uid: Optional[str] = None,
+    ) -> List[Record]:
+        """Up to limit filtered products ordered by sort_key, then uid.
+
+        sort_key is price, created_at, seller_rating or available (orderable
+        quantity). after is the (sort_value, uid) of the previous page's last
+        record; each record carries its sort_value for the next cursor.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def product_facets(
+        self,
+        price_edges: List[float],
+        name: Optional[str] = None,
+        type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        seller_uid: Optional[str] = None,
+    ) -> Record:
+        """Facet counts over the products list_products would scan, in one pass.
+
+        Returns {"total": n, "type": {type: n}, "price": {bucket: n},
+        "location": {seller location: n}}; bucket i holds prices from
+        price_edges[i] up to the next edge. The type and price counts leave
+        out their own filter, total and location apply all of them.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_product(self, props: Record, seller_uid: str) -> Record:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_product(self, uid: str, changes: Record) -> Optional[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_product(self, uid: str) -> bool:
+        """Soft delete: hide the product from every read now (see cleanup_batch)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def adjust_product_quantity(self, uid: str, delta: int) -> bool:
+        """Add delta to the product's stock; False if the product is missing"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_seller_products(self, seller_uid: str, batch_size: int = 500) -> Iterator[List[Record]]:
+        """Stream a seller's products in batches, without images"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_products(self, uids: List[str]) -> List[Record]:
+        """Products by uid in the order given; missing ones are skipped"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def bulk_upsert_products(self, seller_uid: str, rows: List[Record]) -> List[Record]:
+        """Create or update a batch of the seller's products in one transaction.
+
+        Rows carry an optional uid plus BULK_PRODUCT_FIELDS (see
+        common.plan_product_upsert); quantity is orderable stock, as in
+        update_product. Returns {uid, status, detail} per row, in order.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def sync_product_sort_keys(self, product_uids: List[str]) -> int:
+        """Recompute the denormalized sort keys of these products; returns products updated"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_products_near(self, latitude: float, longitude: float, radius_km: float, limit: int = 50) -> List[Record]:
+        """In-stock products of sellers within radius_km, nearest first (newest first at equal distance).
+
+        Each record also carries distance_km.
+        """
+        raise NotImplementedError
+
+    # --- orders -----------------------------------------------------------
+    # Order records carry buyer/seller/product uids, names and contacts plus
+    # a `reviewed` flag, matching OrderController's response shape.
+
+    @abstractmethod
+    def create_order(self, buyer_uid: str, product_uid: str, quantity: int, reserve_seconds: float) -> Optional[Record]:
+        """Create a pending order holding a reservation for reserve_seconds.
+
+        Product records report quantity as stock minus active reservations;
+        returns None if that is no longer enough. Confirming the order turns
+        the reservation into a sale, cancelling or deleting it releases it.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_order(self, uid: str) -> Optional[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_orders(self, buyer_uid: Optional[str] = None, seller_uid: Optional[str] = None) -> List[Record]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def transition_orders(
+        self,
+        uids: List[str],
+        status: str,
+        allowed_from: Iterable[str],
+        seller_uid: Optional[str] = None,
+    ) -> Tuple[List[Record], Dict[str, Optional[str]]]:
+        """Move orders to `status` in one transaction, if their current status is in allowed_from.
+
+        Stock follows: leaving pending commits the reservation, cancelling
+        releases it or restocks a confirmed sale. Delivery adds to the
+        CO_PURCHASED weights (co_purchase_increments). With seller_uid,
+        orders of other sellers are treated as missing. Returns the updated
+        orders and {uid: current status} for the rest (None when not found).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_order(self, uid: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_seller_orders(self, seller_uid: str, batch_size: int = 500) -> Iterator[List[Record]]:
+        """Stream a seller's orders in batches, in no particular order"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def release_expired_reservations(self, limit: int = 500) -> List[Record]:
+        """Cancel up to `limit` pending orders whose reservation has expired and free their stock.
+
+        Returns uid, buyer_uid and fish_product_name of each released order.
+        """
+        raise NotImplementedError
+
+    # --- seller analytics -------------------------------------------------
+    # Daily rollups per (seller, day, product): orders, units and revenue of
+    # orders not in ROLLUP_EXCLUDED_STATUSES. create_order,
+    # transition_orders and delete_order keep them current in the same
+    # transaction as the order write.
+
+    def ensure_schema(self):
+        """Create any constraints/indexes the rollups, reservations and geo search rely on (idempotent)"""
+
+    @abstractmethod
+    def list_seller_rollups(self, seller_uid: str, start_day: str, end_day: str) -> List[Record]:
+        """Rollup rows (day, product_uid, product_name, orders, units, revenue) for an inclusive day range"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_seller_uids(self, after: Optional[str] = None, limit: int = 100) -> List[str]:
+        """Seller uids in uid order, starting after `after` (keyset paging for batch jobs)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def rebuild_seller_rollups(self, seller_uids: List[str]) -> int:
+        """Recompute the rollups of these sellers from their orders; returns rollup rows written"""
+        raise NotImplementedError
+
+    # --- recommendations --------------------------------------------------
+    # Weighted CO_PURCHASED edges between products: the weight is how many
+    # distinct buyers received both. transition_orders adds to them on
+    # delivery; rebuild_co_purchases recomputes them from delivered orders.
+
+    @abstractmethod
+    def list_related_products(self, uid: str, limit: int = 20) -> List[Record]:
+        """Products most co-purchased with this one, heaviest first, each with a `score`"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_recommended_products(self, buyer_uid: str, limit: int = 20, history: int = 50,
+                                  fanout: int = 20) -> List[Record]:
+        """Products co-purchased with the buyer's last `history` delivered products
+        (top `fanout` edges each), not yet received by the buyer; `score` is the summed weight.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_product_uids(self, after: Optional[str] = None, limit: int = 100) -> List[str]:
+        """Product uids in uid order, starting after `after` (keyset paging for batch jobs)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def rebuild_co_purchases(self, product_uids: List[str]) -> int:
+        """Recompute the edges stored from these products (to higher uids); returns edges written"""
+        raise NotImplementedError
+
+    # --- notifications ----------------------------------------------------
+
+    @abstractmethod
+    def create_notification(self, recipient_uid: str, recipient_type: str, type: str, message: str) -> Record:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_notifications(self, recipient_uid: str, recipient_type: str) -> List[Record]:
+        """Newest first"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def mark_notification_read(self, uid: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def mark_all_notifications_read(self, recipient_uid: str, recipient_type: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_notification(self, uid: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def expire_notifications(self, created_before: str, limit: int) -> int:
+        """Delete up to limit read notifications created before the ISO timestamp"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def badge_counts(self, user_uid: str, user_type: str) -> Dict[str, int]:
+        """unread_notifications, unread_messages and pending_orders of a buyer or seller.
+
+        Messages have no read flag; a message counts as unread while the
+        new_message notification sending it created is unread.
+        """
+        raise NotImplementedError
+
+    # --- messages ---------------------------------------------------------
+
+    @abstractmethod
+    def create_message(self, props: Record) -> Record:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_messages_between(self, user1_uid: str, user2_uid: str) -> List[Record]:
+        """Oldest first"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_conversations(self, user_uid: str) -> List[Record]:
+        """One row per counterpart with their name and the latest message"""
+        raise NotImplementedError
+
+    # --- reviews ----------------------------------------------------------
+
+    @abstractmethod
+    def review_exists_for_order(self, order_uid: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_review(self, props: Record) -> Record:
+        """Store the review and refresh the seller's average_rating/review_count"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_seller_reviews(self, seller_uid: str) -> List[Record]:
+        """Newest first"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_seller_rating_summary(self, seller_uid: str) -> Optional[Record]:
+        """average_rating and review_count, or None if the seller is missing"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def reconcile_seller_ratings(self, seller_uids: List[str]) -> int:
+        """Recompute these sellers' ratings from their reviews; returns how many had drifted"""
+        raise NotImplementedError
+
+    # --- deletion cleanup -------------------------------------------------
+
+    @abstractmethod
+    def list_deleted(self) -> List[Tuple[str, str]]:
+        """(kind, uid) of every soft-deleted node not yet cleaned up"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def cleanup_batch(self, kind: str, uid: str, step: str, limit: int) -> int:
+        """Run one batch of a CLEANUP_STEPS step for a soft-deleted node.
+
+        Returns how many dependents were handled; fewer than limit means
+        the step is finished. Safe to repeat after a crash.
+        """
+        raise NotImplementedError
+
+    # --- scheduled jobs ---------------------------------------------------
+
+    @abstractmethod
+    def acquire_job_lease(self, name: str, owner: str, slot: float, lease_seconds: float) -> bool:
+        """Claim the run of job name due at slot (epoch seconds).
+
+        Succeeds for one owner per slot, and only while no other owner holds
+        an unexpired lease, so replicas sharing the database run each
+        scheduled slot once.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def release_job_lease(self, name: str, owner: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_job_leases(self) -> List[Record]:
+        """name, owner, lease_until and last_slot of every job ever claimed"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def record_job_run(self, run: Record, keep: int):
+        """Store a finished run, keeping the newest keep runs of its job"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_job_runs(self, job: Optional[str], limit: int) -> List[Record]:
+        """Newest first, of one job or all of them"""
+        raise NotImplementedError
+
+    # --- rate limits ------------------------------------------------------
+
+    @abstractmethod
+    def rate_limit_hit(self, key: str, limit: int, window: float, now: float) -> float:
+        """Count one attempt against key's sliding window (see app/utils/rate_limit.py).
+
+        Returns 0 if it is allowed, otherwise the seconds until it would be;
+        rejected attempts are not counted.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def rate_limit_reset(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def expire_rate_limits(self, now: float, limit: int) -> int:
+        """Delete up to limit counters that no longer carry any weight"""
+        raise NotImplementedError
+
+    # --- search -----------------------------------------------------------
+
+    @abstractmethod
+    def search(self, search_type: str, query: str, limit: int = 10) -> List[Record]:
+        """Case-insensitive name search over products, sellers or buyers"""
+        raise NotImplementedError
@@ -0,0 +1,127 @@
+"""
+Logic and constants both repository backends share.
+
+Kept apart from the Repository interface so the pure rules (rollup
+membership, co-purchase weights, cleanup order, bulk upload planning) can
+be used and tested without either backend.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .base import Record
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """neomodel stores DateTimeProperty values as epoch floats"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+# Orders in these statuses are left out of the seller rollups
+ROLLUP_EXCLUDED_STATUSES = ("cancelled",)
+
+
+def counts_in_rollup(status: Optional[str]) -> bool:
+    return status not in ROLLUP_EXCLUDED_STATUSES
+
+
+def rollup_day(created_at: Any) -> str:
+    """UTC calendar day an order is counted under, as YYYY-MM-DD"""
+    return to_datetime(created_at).astimezone(timezone.utc).date().isoformat()
+
+
+def co_purchase_increments(
+    delivered: Iterable[Tuple[str, str]],
+    history: Dict[str, Dict[str, int]],
+) -> Dict[Tuple[str, str], int]:
+    """CO_PURCHASED weight increments for orders that were just delivered.
+
+    A pair's weight is the number of distinct buyers who received both
+    products, so only a buyer's first delivery of a product adds anything:
+    one increment towards every other product they have received.
+    delivered is (buyer_uid, product_uid) per delivered order; history is
+    {buyer_uid: {product_uid: delivered order count}}, these orders included.
+    Keys are (lower uid, higher uid), the direction edges are stored in.
+    """
+    just: Dict[Tuple[str, str], int] = {}
+    for key in delivered:
+        just[key] = just.get(key, 0) + 1
+    increments: Dict[Tuple[str, str], int] = {}
+    new_by_buyer: Dict[str, set] = {}
+    for (buyer_uid, product_uid), count in just.items():
+        if history.get(buyer_uid, {}).get(product_uid, 0) == count:
+            new_by_buyer.setdefault(buyer_uid, set()).add(product_uid)
+    for buyer_uid, new in new_by_buyer.items():
+        for product_uid in new:
+            for other in history.get(buyer_uid, ()):
+                # A pair of two new products is counted once, from its lower uid
+                if other == product_uid or (other in new and other < product_uid):
+                    continue
+                key = (min(product_uid, other), max(product_uid, other))
+                increments[key] = increments.get(key, 0) + 1
+    return increments
+
+
+# Cleanup after a soft delete, in order. Each step removes (or, for orders,
+# detaches) the deleted node's dependents a batch at a time; "node" removes
+# the node itself. Orders are kept for the other party's history, with the
+# deleted side's uid and name copied onto them. A buyer's reviews stay
+# (they make up the seller's rating) and carry the buyer's name already.
+# A seller's products are soft-deleted with the seller and removed by its
+# "products" step rather than by jobs of their own.
+CLEANUP_STEPS = {
+    "seller": ("products", "orders", "reviews", "notifications", "messages", "rollups", "node"),
+    "buyer": ("orders", "notifications", "messages", "node"),
+    "product": ("orders", "node"),
+}
+
+
+# Product fields a bulk upload may set; the first four are required to create
+BULK_PRODUCT_FIELDS = ("name", "type", "price", "quantity", "description")
+BULK_REQUIRED_FIELDS = ("name", "type", "price", "quantity")
+
+
+def plan_product_upsert(
+    rows: List[Record],
+    owned_uids: set,
+    uid_by_name: Dict[str, str],
+    now: Any,
+) -> Tuple[List[Record], List[Record], List[Record]]:
+    """Split bulk upload rows into product creates and updates.
+
+    A row updates the product named by its uid, or else the seller's
+    product with the same name (case-insensitive); otherwise it creates
+    one. owned_uids and uid_by_name describe the seller's products and are
+    extended with the creates, so a later row for the same new name updates
+    it. Returns (creates: full product props, updates: {uid, changes},
+    results: {uid, status, detail} per row).
+    """
+    creates: List[Record] = []
+    updates: List[Record] = []
+    results: List[Record] = []
+    for row in rows:
+        changes = {field: row[field] for field in BULK_PRODUCT_FIELDS if row.get(field) is not None}
+        uid = row.get("uid")
+        if uid is None and "name" in changes:
+            uid = uid_by_name.get(changes["name"].lower())
+            if uid is not None:
+                # Matched by name: keep the stored spelling
+                del changes["name"]
+        if uid is not None:
+            if uid not in owned_uids:
+                results.append({"uid": uid, "status": "error", "detail": "Product not found for this seller"})
+                continue
+            updates.append({"uid": uid, "changes": changes})
+            results.append({"uid": uid, "status": "updated", "detail": None})
+            continue
+        missing = [field for field in BULK_REQUIRED_FIELDS if field not in changes]
+        if missing:
+            results.append({"uid": None, "status": "error", "detail": f"New product needs {', '.join(missing)}"})
+            continue
+        uid = uuid.uuid4().hex
+        creates.append({"description": "", "image": "", **changes, "uid": uid, "created_at": now, "updated_at": now})
+        owned_uids.add(uid)
+        uid_by_name[changes["name"].lower()] = uid
+        results.append({"uid": uid, "status": "created", "detail": None})
+    return creates, updates, results
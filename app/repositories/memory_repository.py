@@ -0,0 +1,1082 @@
+import heapq
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from ..utils.geo import distance_km
+from ..utils.rate_limit import MemoryBackend
+from .base import Record, Repository
+from .common import (
+    CLEANUP_STEPS, co_purchase_increments, counts_in_rollup, plan_product_upsert, rollup_day, to_datetime
+)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso_now() -> str:
+    # Same format the raw-Cypher routes store
+    return datetime.utcnow().isoformat()
+
+
+def _valid_email(email: Optional[str]) -> bool:
+    """Python equivalent of the list queries' '[^@]+@[^@]+\\.[^@]+' filter"""
+    if not email or email.count("@") != 1:
+        return False
+    local, domain = email.split("@")
+    head, dot, tail = domain.rpartition(".")
+    return bool(local and head and dot and tail)
+
+
+# Sort values of product records, matching what Neo4j stores for each key
+PRODUCT_SORT_VALUES = {
+    "price": lambda p: p["price"],
+    "created_at": lambda p: p["created_at"].timestamp(),
+    "seller_rating": lambda p: p["seller_rating"],
+    "available": lambda p: p["quantity"],
+}
+
+
+def _index_add(index: Dict[Any, Dict[str, None]], key: Any, uid: str):
+    index.setdefault(key, {})[uid] = None
+
+
+def _index_remove(index: Dict[Any, Dict[str, None]], key: Any, uid: str):
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(uid, None)
+        if not bucket:
+            del index[key]
+
+
+class MemoryRepository(Repository):
+    """In-process graph held in dicts with secondary indexes.
+
+    Relationships are stored as uids on the child record (product.seller_uid,
+    order.buyer_uid/seller_uid/product_uid) and joined at read time. A soft
+    delete moves the record into _deleted, where only orders still find it,
+    like the Deleted* labels in Neo4j; cleanup_batch clears its dependents.
+    Every call takes one lock; records are copied on the way out.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Bumped on every product or seller write; backs get_catalog_version()
+        self._catalog_version = 0
+        # Distinguishes counters from different processes/instances
+        self._instance_id = uuid.uuid4().hex[:8]
+        self.sellers: Dict[str, Record] = {}
+        self.buyers: Dict[str, Record] = {}
+        self.products: Dict[str, Record] = {}
+        self.orders: Dict[str, Record] = {}
+        self.notifications: Dict[str, Record] = {}
+        self.messages: Dict[str, Record] = {}
+        self.reviews: Dict[str, Record] = {}
+        # (seller_uid, day, product_uid) -> rollup row
+        self.rollups: Dict[Tuple[str, str, str], Record] = {}
+        # product_uid -> {co-purchased product_uid: weight}, kept symmetric
+        self.co_purchases: Dict[str, Dict[str, int]] = {}
+
+        self._seller_email: Dict[str, str] = {}
+        self._buyer_email: Dict[str, str] = {}
+        self._products_by_seller: Dict[str, Dict[str, None]] = {}
+        self._orders_by_buyer: Dict[str, Dict[str, None]] = {}
+        self._orders_by_seller: Dict[str, Dict[str, None]] = {}
+        self._notifications_by_recipient: Dict[Tuple[str, str], Dict[str, None]] = {}
+        self._messages_by_user: Dict[str, Dict[str, None]] = {}
+        self._review_by_order: Dict[str, str] = {}
+        self._reviews_by_seller: Dict[str, Dict[str, None]] = {}
+        self._rollups_by_seller: Dict[str, Dict[Tuple[str, str, str], None]] = {}
+        # Orders holding a reservation (reserved_until set)
+        self._reserved_orders: Dict[str, None] = {}
+        # kind -> {uid: record} of soft-deleted sellers, buyers and products
+        self._deleted: Dict[str, Dict[str, Record]] = {kind: {} for kind in CLEANUP_STEPS}
+        # job name -> lease row, and finished runs oldest first
+        self.job_leases: Dict[str, Record] = {}
+        self.job_runs: List[Record] = []
+        # Login rate-limit counters
+        self._rate_limits = MemoryBackend()
+
+    # --- bulk loading -----------------------------------------------------
+
+    def load(self, market) -> "MemoryRepository":
+        """Load a benchmarks.fixtures.Marketplace (or anything shaped like it)"""
+        with self._lock:
+            for row in market.sellers:
+                self._put_user(self.sellers, self._seller_email, dict(row, location=row.get("location") or ""))
+            for row in market.buyers:
+                self._put_user(self.buyers, self._buyer_email, dict(row))
+            for row in market.products:
+                self._put_product(dict(row))
+            for row in market.orders:
+                self._put_order(dict(row))
+            for row in market.notifications:
+                self._put_notification(dict(row))
+            for row in market.messages:
+                self._put_message(dict(row))
+            for row in market.reviews:
+                self._put_review(dict(row))
+            for seller_uid in self.sellers:
+                self._refresh_rating(seller_uid)
+            self.rebuild_seller_rollups(list(self.sellers))
+            self.rebuild_co_purchases(list(self.products))
+        return self
+
+    def _put_user(self, table: Dict[str, Record], email_index: Dict[str, str], row: Record):
+        row.setdefault("profile_picture", "")
+        row["created_at"] = to_datetime(row.get("created_at"))
+        row["updated_at"] = to_datetime(row.get("updated_at"))
+        table[row["uid"]] = row
+        email_index[row["email"]] = row["uid"]
+        if table is self.sellers:
+            self._catalog_version += 1
+
+    def _put_product(self, row: Record):
+        row.setdefault("quantity", 0)
+        # Stock held by pending orders; bumping stock_version keeps ETags honest
+        row.setdefault("reserved", 0)
+        row.setdefault("stock_version", 0)
+        row.setdefault("description", "")
+        row.setdefault("image", "")
+        row["created_at"] = to_datetime(row.get("created_at"))
+        row["updated_at"] = to_datetime(row.get("updated_at"))
+        self.products[row["uid"]] = row
+        _index_add(self._products_by_seller, row["seller_uid"], row["uid"])
+        self._catalog_version += 1
+
+    def _put_order(self, row: Record):
+        row["created_at"] = to_datetime(row.get("created_at"))
+        row["updated_at"] = to_datetime(row.get("updated_at"))
+        self.orders[row["uid"]] = row
+        if row.get("reserved_until"):
+            self._reserved_orders[row["uid"]] = None
+        _index_add(self._orders_by_buyer, row["buyer_uid"], row["uid"])
+        _index_add(self._orders_by_seller, row["seller_uid"], row["uid"])
+
+    def _put_notification(self, row: Record):
+        self.notifications[row["uid"]] = row
+        _index_add(self._notifications_by_recipient, (row["recipient_uid"], row["recipient_type"]), row["uid"])
+
+    def _put_message(self, row: Record):
+        self.messages[row["uid"]] = row
+        _index_add(self._messages_by_user, row["sender_uid"], row["uid"])
+        _index_add(self._messages_by_user, row["recipient_uid"], row["uid"])
+
+    def _put_review(self, row: Record):
+        self.reviews[row["uid"]] = row
+        self._review_by_order[row["order_uid"]] = row["uid"]
+        _index_add(self._reviews_by_seller, row["seller_uid"], row["uid"])
+
+    # --- sellers / buyers -------------------------------------------------
+
+    def _get_user(self, table: Dict[str, Record], uid: str) -> Optional[Record]:
+        with self._lock:
+            user = table.get(uid)
+            return dict(user) if user else None
+
+    def _get_user_by_email(self, table: Dict[str, Record], email_index: Dict[str, str], email: str) -> Optional[Record]:
+        with self._lock:
+            uid = email_index.get(email)
+            return dict(table[uid]) if uid else None
+
+    def _list_users(self, table: Dict[str, Record], fields: Iterable[str]) -> List[Record]:
+        with self._lock:
+            users = [u for u in table.values() if _valid_email(u.get("email"))]
+            users.sort(key=lambda u: u["created_at"], reverse=True)
+            return [{f: u.get(f) for f in fields} for u in users]
+
+    def _create_user(self, table: Dict[str, Record], email_index: Dict[str, str], props: Record) -> Record:
+        now = _now()
+        row = {**props, "uid": uuid.uuid4().hex, "created_at": now, "updated_at": now}
+        with self._lock:
+            self._put_user(table, email_index, row)
+            return dict(row)
+
+    def _update_user(self, table: Dict[str, Record], email_index: Dict[str, str], uid: str,
+                     changes: Record, touch: bool) -> Optional[Record]:
+        with self._lock:
+            user = table.get(uid)
+            if user is None:
+                return None
+            if "email" in changes and changes["email"] != user["email"]:
+                email_index.pop(user["email"], None)
+                email_index[changes["email"]] = uid
+            user.update(changes)
+            if touch:
+                user["updated_at"] = _now()
+            if table is self.sellers:
+                self._catalog_version += 1
+            return dict(user)
+
+    def _delete_user(self, table: Dict[str, Record], email_index: Dict[str, str], uid: str) -> bool:
+        kind = "seller" if table is self.sellers else "buyer"
+        with self._lock:
+            user = table.pop(uid, None)
+            if user is None:
+                return False
+            email_index.pop(user["email"], None)
+            user["deleted_at"] = _now()
+            self._deleted[kind][uid] = user
+            if table is self.sellers:
+                # Listings leave the catalog with the seller; cleanup finds
+                # them through the seller index, which is kept until then
+                for product_uid in list(self._products_by_seller.get(uid, ())):
+                    self._soft_delete_product(product_uid)
+                self._catalog_version += 1
+            return True
+
+    _USER_FIELDS = ("uid", "name", "email", "contact_number", "created_at", "updated_at")
+
+    def _get_version(self, table: Dict[str, Record], uid: str) -> Optional[str]:
+        with self._lock:
+            user = table.get(uid)
+            return user["updated_at"].isoformat() if user else None
+
+    def get_seller(self, uid):
+        return self._get_user(self.sellers, uid)
+
+    def get_seller_by_email(self, email):
+        return self._get_user_by_email(self.sellers, self._seller_email, email)
+
+    def list_sellers(self):
+        return self._list_users(self.sellers, self._USER_FIELDS + ("location",))
+
+    def create_seller(self, props):
+        return self._create_user(self.sellers, self._seller_email, props)
+
+    def update_seller(self, uid, changes, touch=True):
+        return self._update_user(self.sellers, self._seller_email, uid, changes, touch)
+
+    def delete_seller(self, uid):
+        return self._delete_user(self.sellers, self._seller_email, uid)
+
+    def get_seller_version(self, uid):
+        return self._get_version(self.sellers, uid)
+
+    def get_buyer(self, uid):
+        return self._get_user(self.buyers, uid)
+
+    def get_buyer_by_email(self, email):
+        return self._get_user_by_email(self.buyers, self._buyer_email, email)
+
+    def list_buyers(self):
+        return self._list_users(self.buyers, self._USER_FIELDS)
+
+    def create_buyer(self, props):
+        return self._create_user(self.buyers, self._buyer_email, props)
+
+    def update_buyer(self, uid, changes, touch=True):
+        return self._update_user(self.buyers, self._buyer_email, uid, changes, touch)
+
+    def delete_buyer(self, uid):
+        return self._delete_user(self.buyers, self._buyer_email, uid)
+
+    def get_buyer_version(self, uid):
+        return self._get_version(self.buyers, uid)
+
+    # --- products ---------------------------------------------------------
+
+    def _product_record(self, product: Record) -> Record:
+        record = dict(product)
+        # Callers see what can still be ordered
+        record["quantity"] = product["quantity"] - record.pop("reserved")
+        del record["stock_version"]
+        seller = self.sellers.get(product["seller_uid"])
+        record["seller_uid"] = seller["uid"] if seller else None
+        record["seller_name"] = seller["name"] if seller else None
+        record["seller_location"] = seller.get("location") if seller else None
+        record["seller_rating"] = (seller.get("average_rating") if seller else None) or 0.0
+        return record
+
+    def get_product(self, uid):
+        with self._lock:
+            product = self.products.get(uid)
+            return self._product_record(product) if product else None
+
+    def get_products(self, uids):
+        with self._lock:
+            return [self._product_record(self.products[uid]) for uid in uids if uid in self.products]
+
+    def sync_product_sort_keys(self, product_uids):
+        # Sort keys are read live from the product and seller rows
+        with self._lock:
+            return sum(1 for uid in product_uids if uid in self.products)
+
+    def get_product_version(self, uid):
+        with self._lock:
+            product = self.products.get(uid)
+            if product is None:
+                return None
+            seller = self.sellers.get(product["seller_uid"])
+            seller_version = seller["updated_at"].isoformat() if seller else None
+            return f"{product['updated_at'].isoformat()}:{product['stock_version']}:{seller_version}"
+
+    def get_catalog_version(self):
+        with self._lock:
+            return f"{self._instance_id}:{self._catalog_version}"
+
+    def list_products(self, name=None, type=None, min_price=None, max_price=None, seller_uid=None):
+        name = name.lower() if name else None
+        type = type.lower() if type else None
+        with self._lock:
+            if seller_uid:
+                if seller_uid not in self.sellers:
+                    return []
+                candidates = (self.products[uid] for uid in self._products_by_seller.get(seller_uid, ()))
+            else:
+                candidates = self.products.values()
+            results = []
+            for product in candidates:
+                if name and name not in product["name"].lower():
+                    continue
+                if type and type not in product["type"].lower():
+                    continue
+                if min_price is not None and product["price"] < min_price:
+                    continue
+                if max_price is not None and product["price"] > max_price:
+                    continue
+                results.append(self._product_record(product))
+            return results
+
+    def list_product_page(self, sort_key, descending, limit, after=None,
+                          name=None, type=None, min_price=None, max_price=None, seller_uid=None):
+        if sort_key not in PRODUCT_SORT_VALUES:
+            raise ValueError(f"Unknown sort key: {sort_key}")
+        value = PRODUCT_SORT_VALUES[sort_key]
+        products = self.list_products(name, type, min_price, max_price, seller_uid)
+        rows = [(value(p), p["uid"], p) for p in products]
+        if after is not None:
+            after = tuple(after)
+            rows = [row for row in rows if (row[:2] < after if descending else row[:2] > after)]
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        return [dict(p, sort_value=v) for v, _, p in pick(limit, rows, key=lambda row: row[:2])]
+
+    def product_facets(self, price_edges, name=None, type=None, min_price=None, max_price=None, seller_uid=None):
+        name = name.lower() if name else None
+        type = type.lower() if type else None
+        facets = {"total": 0, "type": {}, "price": {}, "location": {}}
+        with self._lock:
+            if seller_uid:
+                if seller_uid not in self.sellers:
+                    return facets
+                candidates = (self.products[uid] for uid in self._products_by_seller.get(seller_uid, ()))
+            else:
+                candidates = self.products.values()
+            for product in candidates:
+                if name and name not in product["name"].lower():
+                    continue
+                type_ok = not type or type in product["type"].lower()
+                price_ok = ((min_price is None or product["price"] >= min_price)
+                            and (max_price is None or product["price"] <= max_price))
+                if price_ok:
+                    facets["type"][product["type"]] = facets["type"].get(product["type"], 0) + 1
+                if type_ok:
+                    bucket = sum(1 for edge in price_edges if product["price"] >= edge) - 1
+                    if bucket >= 0:
+                        facets["price"][bucket] = facets["price"].get(bucket, 0) + 1
+                if type_ok and price_ok:
+                    facets["total"] += 1
+                    seller = self.sellers.get(product["seller_uid"])
+                    location = seller.get("location") if seller else None
+                    facets["location"][location] = facets["location"].get(location, 0) + 1
+        return facets
+
+    def create_product(self, props, seller_uid):
+        now = _now()
+        row = {**props, "uid": uuid.uuid4().hex, "seller_uid": seller_uid, "created_at": now, "updated_at": now}
+        with self._lock:
+            if seller_uid not in self.sellers:
+                return None
+            self._put_product(row)
+            return self._product_record(row)
+
+    def update_product(self, uid, changes):
+        with self._lock:
+            product = self.products.get(uid)
+            if product is None:
+                return None
+            product.update(changes)
+            if "quantity" in changes:
+                # Orderable quantity, on top of what is reserved
+                product["quantity"] = changes["quantity"] + product["reserved"]
+            product["updated_at"] = _now()
+            self._catalog_version += 1
+            return self._product_record(product)
+
+    def bulk_upsert_products(self, seller_uid, rows):
+        now = _now()
+        with self._lock:
+            if seller_uid not in self.sellers:
+                return [{"uid": row.get("uid"), "status": "error", "detail": "Seller not found"} for row in rows]
+            owned = self._products_by_seller.get(seller_uid, {})
+            creates, updates, results = plan_product_upsert(
+                rows, set(owned), {self.products[uid]["name"].lower(): uid for uid in owned}, now
+            )
+            for props in creates:
+                self._put_product({**props, "seller_uid": seller_uid})
+            for update in updates:
+                product = self.products[update["uid"]]
+                product.update(update["changes"])
+                if "quantity" in update["changes"]:
+                    product["quantity"] = update["changes"]["quantity"] + product["reserved"]
+                product["updated_at"] = now
+            self._catalog_version += 1
+            return results
+
+    def _soft_delete_product(self, uid: str) -> Optional[Record]:
+        product = self.products.pop(uid, None)
+        if product is None:
+            return None
+        for other in self.co_purchases.pop(uid, {}):
+            _index_remove(self.co_purchases, other, uid)
+        product["deleted_at"] = _now()
+        self._deleted["product"][uid] = product
+        self._catalog_version += 1
+        return product
+
+    def delete_product(self, uid):
+        with self._lock:
+            product = self._soft_delete_product(uid)
+            if product is None:
+                return False
+            _index_remove(self._products_by_seller, product["seller_uid"], uid)
+            return True
+
+    def iter_seller_products(self, seller_uid, batch_size=500):
+        with self._lock:
+            uids = list(self._products_by_seller.get(seller_uid, ())) if seller_uid in self.sellers else []
+        for start in range(0, len(uids), batch_size):
+            with self._lock:
+                batch = [self._product_record(self.products[uid]) for uid in uids[start:start + batch_size]
+                         if uid in self.products]
+            for product in batch:
+                product.pop("image", None)
+            yield batch
+
+    def list_products_near(self, latitude, longitude, radius_km, limit=50):
+        # Sellers are few next to products, so a scan of their points stands in for the index
+        rows = []
+        with self._lock:
+            for seller in self.sellers.values():
+                if seller.get("latitude") is None or seller.get("longitude") is None:
+                    continue
+                distance = distance_km(latitude, longitude, seller["latitude"], seller["longitude"])
+                if distance > radius_km:
+                    continue
+                for uid in self._products_by_seller.get(seller["uid"], ()):
+                    product = self.products[uid]
+                    if product["quantity"] - product["reserved"] > 0:
+                        rows.append((distance, -product["updated_at"].timestamp(), uid))
+            rows.sort()
+            products = []
+            for distance, _, uid in rows[:limit]:
+                product = self._product_record(self.products[uid])
+                product["distance_km"] = distance
+                products.append(product)
+            return products
+
+    def adjust_product_quantity(self, uid, delta):
+        with self._lock:
+            product = self.products.get(uid)
+            if product is None:
+                return False
+            product["quantity"] += delta
+            product["updated_at"] = _now()
+            self._catalog_version += 1
+            return True
+
+    # --- orders -----------------------------------------------------------
+
+    def _order_record(self, order: Record) -> Record:
+        # Soft-deleted parties still name themselves until cleanup detaches
+        # them; after that the order's own copies are used
+        buyer = self.buyers.get(order["buyer_uid"]) or self._deleted["buyer"].get(order["buyer_uid"])
+        seller = self.sellers.get(order["seller_uid"]) or self._deleted["seller"].get(order["seller_uid"])
+        product = self.products.get(order["product_uid"]) or self._deleted["product"].get(order["product_uid"])
+        return {
+            "uid": order["uid"],
+            "buyer_uid": order["buyer_uid"] or "",
+            "buyer_name": buyer["name"] if buyer else order.get("buyer_name") or "",
+            "buyer_contact": buyer["contact_number"] if buyer else "N/A",
+            "seller_uid": order["seller_uid"] or "",
+            "seller_name": seller["name"] if seller else order.get("seller_name") or "",
+            "seller_contact": seller["contact_number"] if seller else "N/A",
+            "fish_product_uid": order["product_uid"] or "",
+            "fish_product_name": product["name"] if product else order.get("product_name") or "",
+            "quantity": order["quantity"],
+            "total_price": order["total_price"],
+            "status": order["status"],
+            "reviewed": order["uid"] in self._review_by_order,
+            "reserved_until": order.get("reserved_until"),
+            "created_at": order["created_at"],
+            "updated_at": order["updated_at"],
+        }
+
+    def _apply_rollup(self, order: Record, sign: int):
+        """Add (sign=1) or remove (sign=-1) one order from its daily rollup"""
+        if order["seller_uid"] not in self.sellers:
+            return
+        product = self.products.get(order["product_uid"])
+        key = (order["seller_uid"], rollup_day(order["created_at"]), order["product_uid"] or "")
+        rollup = self.rollups.get(key)
+        if rollup is None:
+            rollup = self.rollups[key] = {
+                "day": key[1], "product_uid": key[2], "product_name": "", "orders": 0, "units": 0, "revenue": 0.0,
+            }
+            _index_add(self._rollups_by_seller, key[0], key)
+        rollup["product_name"] = product["name"] if product else order.get("product_name") or rollup["product_name"]
+        rollup["orders"] += sign
+        rollup["units"] += sign * order["quantity"]
+        rollup["revenue"] += sign * order["total_price"]
+        if rollup["orders"] <= 0:
+            del self.rollups[key]
+            _index_remove(self._rollups_by_seller, key[0], key)
+
+    def _release_reservation(self, order: Record, commit: bool = False):
+        """End an order's reservation: freed stock, or a sale when commit=True"""
+        self._reserved_orders.pop(order["uid"], None)
+        order["reserved_until"] = None
+        product = self.products.get(order["product_uid"])
+        if product is None:
+            return
+        product["reserved"] -= order["quantity"]
+        if commit:
+            product["quantity"] -= order["quantity"]
+        else:
+            product["stock_version"] += 1
+            self._catalog_version += 1
+
+    def create_order(self, buyer_uid, product_uid, quantity, reserve_seconds):
+        now = _now()
+        with self._lock:
+            product = self.products.get(product_uid)
+            if buyer_uid not in self.buyers or product is None or product["seller_uid"] not in self.sellers:
+                return None
+            if product["quantity"] - product["reserved"] < quantity:
+                return None
+            product["reserved"] += quantity
+            product["stock_version"] += 1
+            self._catalog_version += 1
+            order = {
+                "uid": uuid.uuid4().hex,
+                "quantity": quantity,
+                "total_price": product["price"] * quantity,
+                "status": "pending",
+                "created_at": now,
+                "updated_at": now,
+                "buyer_uid": buyer_uid,
+                "seller_uid": product["seller_uid"],
+                "product_uid": product_uid,
+                "product_name": product["name"],
+                "reserved_until": now + timedelta(seconds=reserve_seconds),
+            }
+            self._put_order(order)
+            self._apply_rollup(order, 1)
+            return self._order_record(order)
+
+    def get_order(self, uid):
+        with self._lock:
+            order = self.orders.get(uid)
+            return self._order_record(order) if order else None
+
+    def list_orders(self, buyer_uid=None, seller_uid=None):
+        with self._lock:
+            if buyer_uid:
+                uids = self._orders_by_buyer.get(buyer_uid, ())
+            elif seller_uid:
+                uids = self._orders_by_seller.get(seller_uid, ())
+            else:
+                uids = self.orders.keys()
+            return [self._order_record(self.orders[uid]) for uid in uids]
+
+    def iter_seller_orders(self, seller_uid, batch_size=500):
+        with self._lock:
+            uids = list(self._orders_by_seller.get(seller_uid, ()))
+        for start in range(0, len(uids), batch_size):
+            with self._lock:
+                batch = [self._order_record(self.orders[uid]) for uid in uids[start:start + batch_size]
+                         if uid in self.orders]
+            yield batch
+
+    def transition_orders(self, uids, status, allowed_from, seller_uid=None):
+        now = _now()
+        updated, rejected = [], {}
+        is_counted = counts_in_rollup(status)
+        with self._lock:
+            for uid in dict.fromkeys(uids):
+                order = self.orders.get(uid)
+                if order is None or (seller_uid is not None and order["seller_uid"] != seller_uid):
+                    rejected[uid] = None
+                    continue
+                if order["status"] not in allowed_from:
+                    rejected[uid] = order["status"]
+                    continue
+                was_counted = counts_in_rollup(order["status"])
+                product = self.products.get(order["product_uid"])
+                if order.get("reserved_until"):
+                    # Leaving pending ends the reservation: released on cancel, committed otherwise
+                    self._release_reservation(order, commit=status != "cancelled")
+                elif status == "cancelled" and product is not None:
+                    product["quantity"] += order["quantity"]
+                    product["stock_version"] += 1
+                    self._catalog_version += 1
+                order["status"] = status
+                order["updated_at"] = now
+                if was_counted != is_counted:
+                    self._apply_rollup(order, 1 if is_counted else -1)
+                updated.append(self._order_record(order))
+            if status == "delivered":
+                self._apply_co_purchases(updated)
+        return updated, rejected
+
+    def delete_order(self, uid):
+        with self._lock:
+            order = self.orders.pop(uid, None)
+            if order is None:
+                return False
+            if counts_in_rollup(order["status"]):
+                self._apply_rollup(order, -1)
+            product = self.products.get(order["product_uid"])
+            if order.get("reserved_until"):
+                self._release_reservation(order)
+            elif order["status"] == "pending" and product is not None:
+                # Placed before reservations, so the stock was taken up front
+                product["quantity"] += order["quantity"]
+                product["stock_version"] += 1
+                self._catalog_version += 1
+            _index_remove(self._orders_by_buyer, order["buyer_uid"], uid)
+            _index_remove(self._orders_by_seller, order["seller_uid"], uid)
+            return True
+
+    def release_expired_reservations(self, limit=500):
+        now = _now()
+        released = []
+        with self._lock:
+            for uid in list(self._reserved_orders):
+                if len(released) >= limit:
+                    break
+                order = self.orders.get(uid)
+                if order is None:
+                    self._reserved_orders.pop(uid, None)
+                    continue
+                if order["reserved_until"] >= now:
+                    continue
+                self._release_reservation(order)
+                self._apply_rollup(order, -1)
+                order["status"] = "cancelled"
+                order["updated_at"] = now
+                record = self._order_record(order)
+                released.append({"uid": uid, "buyer_uid": record["buyer_uid"],
+                                 "fish_product_name": record["fish_product_name"]})
+        return released
+
+    # --- seller analytics -------------------------------------------------
+
+    def list_seller_rollups(self, seller_uid, start_day, end_day):
+        with self._lock:
+            rows = [dict(self.rollups[key]) for key in self._rollups_by_seller.get(seller_uid, ())
+                    if start_day <= key[1] <= end_day]
+        rows.sort(key=lambda row: row["day"])
+        return rows
+
+    def list_seller_uids(self, after=None, limit=100):
+        with self._lock:
+            uids = sorted(uid for uid in self.sellers if after is None or uid > after)
+        return uids[:limit]
+
+    def rebuild_seller_rollups(self, seller_uids):
+        with self._lock:
+            for seller_uid in seller_uids:
+                for key in self._rollups_by_seller.pop(seller_uid, {}):
+                    self.rollups.pop(key, None)
+                for order_uid in self._orders_by_seller.get(seller_uid, ()):
+                    order = self.orders[order_uid]
+                    if counts_in_rollup(order["status"]):
+                        self._apply_rollup(order, 1)
+            return sum(len(self._rollups_by_seller.get(uid, ())) for uid in seller_uids)
+
+    # --- recommendations --------------------------------------------------
+
+    def _delivered_products(self, buyer_uid: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for uid in self._orders_by_buyer.get(buyer_uid, ()):
+            order = self.orders[uid]
+            if order["status"] == "delivered" and order["product_uid"] in self.products:
+                counts[order["product_uid"]] = counts.get(order["product_uid"], 0) + 1
+        return counts
+
+    def _add_co_purchase(self, a: str, c: str, weight: int):
+        edges = self.co_purchases.setdefault(a, {})
+        edges[c] = edges.get(c, 0) + weight
+        self.co_purchases.setdefault(c, {})[a] = edges[c]
+
+    def _apply_co_purchases(self, orders: List[Record]):
+        """Add the CO_PURCHASED weights of just-delivered orders (order records)"""
+        delivered = [(o["buyer_uid"], o["fish_product_uid"]) for o in orders
+                     if o["buyer_uid"] and o["fish_product_uid"] in self.products]
+        history = {buyer_uid: self._delivered_products(buyer_uid) for buyer_uid, _ in delivered}
+        for (a, c), weight in co_purchase_increments(delivered, history).items():
+            self._add_co_purchase(a, c, weight)
+
+    def _scored_records(self, scores: Dict[str, int], limit: int) -> List[Record]:
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        products = []
+        for uid, score in ranked:
+            product = self._product_record(self.products[uid])
+            product["score"] = score
+            products.append(product)
+        return products
+
+    def list_related_products(self, uid, limit=20):
+        with self._lock:
+            return self._scored_records(self.co_purchases.get(uid, {}), limit)
+
+    def list_recommended_products(self, buyer_uid, limit=20, history=50, fanout=20):
+        with self._lock:
+            last_delivered: Dict[str, datetime] = {}
+            for uid in self._orders_by_buyer.get(buyer_uid, ()):
+                order = self.orders[uid]
+                product_uid = order["product_uid"]
+                if order["status"] == "delivered" and product_uid in self.products:
+                    previous = last_delivered.get(product_uid)
+                    last_delivered[product_uid] = max(order["created_at"], previous or order["created_at"])
+            recent = sorted(last_delivered, key=last_delivered.get, reverse=True)[:history]
+            scores: Dict[str, int] = {}
+            for product_uid in recent:
+                edges = sorted(self.co_purchases.get(product_uid, {}).items(), key=lambda item: -item[1])[:fanout]
+                for other, weight in edges:
+                    if other not in last_delivered:
+                        scores[other] = scores.get(other, 0) + weight
+            return self._scored_records(scores, limit)
+
+    def list_product_uids(self, after=None, limit=100):
+        with self._lock:
+            uids = sorted(uid for uid in self.products if after is None or uid > after)
+        return uids[:limit]
+
+    def rebuild_co_purchases(self, product_uids):
+        with self._lock:
+            page = set(product_uids) & set(self.products)
+            for a in page:
+                for c in [c for c in self.co_purchases.get(a, {}) if c > a]:
+                    _index_remove(self.co_purchases, a, c)
+                    _index_remove(self.co_purchases, c, a)
+            buyers_of: Dict[str, set] = {}
+            for order in self.orders.values():
+                if order["status"] == "delivered" and order["product_uid"] in page:
+                    buyers_of.setdefault(order["product_uid"], set()).add(order["buyer_uid"])
+            received: Dict[str, Dict[str, int]] = {}
+            written = 0
+            for a, buyers in buyers_of.items():
+                weights: Dict[str, int] = {}
+                for buyer_uid in buyers:
+                    if buyer_uid not in received:
+                        received[buyer_uid] = self._delivered_products(buyer_uid)
+                    for c in received[buyer_uid]:
+                        if c > a:
+                            weights[c] = weights.get(c, 0) + 1
+                for c, weight in weights.items():
+                    self._add_co_purchase(a, c, weight)
+                written += len(weights)
+            return written
+
+    # --- notifications ----------------------------------------------------
+
+    def create_notification(self, recipient_uid, recipient_type, type, message):
+        row = {
+            "uid": str(uuid.uuid4()),
+            "recipient_uid": recipient_uid,
+            "recipient_type": recipient_type,
+            "type": type,
+            "message": message,
+            "read": False,
+            "created_at": _iso_now(),
+        }
+        with self._lock:
+            self._put_notification(row)
+            return dict(row)
+
+    def list_notifications(self, recipient_uid, recipient_type):
+        with self._lock:
+            uids = self._notifications_by_recipient.get((recipient_uid, recipient_type), ())
+            rows = [dict(self.notifications[uid]) for uid in uids]
+        rows.sort(key=lambda n: n["created_at"], reverse=True)
+        return rows
+
+    def mark_notification_read(self, uid):
+        with self._lock:
+            notification = self.notifications.get(uid)
+            if notification is None:
+                return False
+            notification["read"] = True
+            return True
+
+    def mark_all_notifications_read(self, recipient_uid, recipient_type):
+        with self._lock:
+            uids = self._notifications_by_recipient.get((recipient_uid, recipient_type), ())
+            for uid in uids:
+                self.notifications[uid]["read"] = True
+            return len(uids)
+
+    def delete_notification(self, uid):
+        with self._lock:
+            notification = self.notifications.pop(uid, None)
+            if notification is None:
+                return False
+            _index_remove(self._notifications_by_recipient,
+                          (notification["recipient_uid"], notification["recipient_type"]), uid)
+            return True
+
+    def expire_notifications(self, created_before, limit):
+        with self._lock:
+            expired = sorted(
+                (n["created_at"], n["uid"]) for n in self.notifications.values()
+                if n["read"] and n["created_at"] < created_before
+            )[:limit]
+            for _, uid in expired:
+                self.delete_notification(uid)
+            return len(expired)
+
+    def badge_counts(self, user_uid, user_type):
+        orders = {"buyer": self._orders_by_buyer, "seller": self._orders_by_seller}[user_type]
+        with self._lock:
+            unread = [
+                self.notifications[uid]["type"]
+                for uid in self._notifications_by_recipient.get((user_uid, user_type), ())
+                if not self.notifications[uid]["read"]
+            ]
+            pending = sum(1 for uid in orders.get(user_uid, ()) if self.orders[uid]["status"] == "pending")
+        return {
+            "unread_notifications": len(unread),
+            "unread_messages": unread.count("new_message"),
+            "pending_orders": pending,
+        }
+
+    # --- messages ---------------------------------------------------------
+
+    def create_message(self, props):
+        row = {**props, "uid": str(uuid.uuid4()), "created_at": _iso_now()}
+        with self._lock:
+            self._put_message(row)
+            return dict(row)
+
+    def list_messages_between(self, user1_uid, user2_uid):
+        with self._lock:
+            rows = [
+                dict(m) for m in (self.messages[uid] for uid in self._messages_by_user.get(user1_uid, ()))
+                if {m["sender_uid"], m["recipient_uid"]} == {user1_uid, user2_uid}
+            ]
+        rows.sort(key=lambda m: m["created_at"])
+        return rows
+
+    def list_conversations(self, user_uid):
+        with self._lock:
+            messages = [self.messages[uid] for uid in self._messages_by_user.get(user_uid, ())]
+            messages.sort(key=lambda m: m["created_at"], reverse=True)
+            latest: Dict[Tuple[str, str], Record] = {}
+            for m in messages:
+                if m["sender_uid"] == user_uid:
+                    key = (m["recipient_uid"], m["recipient_type"])
+                else:
+                    key = (m["sender_uid"], m["sender_type"])
+                latest.setdefault(key, m)
+            conversations = []
+            for (other_uid, other_type), m in latest.items():
+                other = (self.buyers if other_type == "buyer" else self.sellers).get(other_uid)
+                conversations.append({
+                    "other_uid": other_uid,
+                    "other_type": other_type,
+                    "other_name": other["name"] if other else "Unknown",
+                    "last_message_text": m["message"],
+                    "last_message_time": m["created_at"],
+                })
+            return conversations
+
+    # --- reviews ----------------------------------------------------------
+
+    def _refresh_rating(self, seller_uid: str):
+        seller = self.sellers.get(seller_uid)
+        if seller is None:
+            return
+        ratings = [self.reviews[uid]["rating"] for uid in self._reviews_by_seller.get(seller_uid, ())]
+        seller["average_rating"] = sum(ratings) / len(ratings) if ratings else None
+        seller["review_count"] = len(ratings)
+        # Product records carry the rating, so their ETags move with it
+        for uid in self._products_by_seller.get(seller_uid, ()):
+            self.products[uid]["stock_version"] += 1
+        self._catalog_version += 1
+
+    def review_exists_for_order(self, order_uid):
+        with self._lock:
+            return order_uid in self._review_by_order
+
+    def create_review(self, props):
+        row = {**props, "uid": str(uuid.uuid4()), "created_at": _iso_now()}
+        with self._lock:
+            self._put_review(row)
+            self._refresh_rating(row["seller_uid"])
+            return dict(row)
+
+    def list_seller_reviews(self, seller_uid):
+        with self._lock:
+            rows = [dict(self.reviews[uid]) for uid in self._reviews_by_seller.get(seller_uid, ())]
+        rows.sort(key=lambda r: r["created_at"], reverse=True)
+        return rows
+
+    def get_seller_rating_summary(self, seller_uid):
+        with self._lock:
+            seller = self.sellers.get(seller_uid)
+            if seller is None:
+                return None
+            return {"average_rating": seller.get("average_rating"), "review_count": seller.get("review_count")}
+
+    def reconcile_seller_ratings(self, seller_uids):
+        with self._lock:
+            reconciled = 0
+            for uid in seller_uids:
+                seller = self.sellers.get(uid)
+                if seller is None:
+                    continue
+                before = (seller.get("average_rating"), seller.get("review_count"))
+                ratings = [self.reviews[r]["rating"] for r in self._reviews_by_seller.get(uid, ())]
+                if before != (sum(ratings) / len(ratings) if ratings else None, len(ratings)):
+                    self._refresh_rating(uid)
+                    reconciled += 1
+            return reconciled
+
+    # --- deletion cleanup -------------------------------------------------
+
+    def _snapshot_product(self, product: Record):
+        """Copy a product's uid and name onto its orders before it goes away"""
+        for order_uid in self._orders_by_seller.get(product["seller_uid"], ()):
+            order = self.orders[order_uid]
+            if order["product_uid"] == product["uid"]:
+                order["product_name"] = product["name"]
+
+    def list_deleted(self):
+        with self._lock:
+            # A deleted seller's products are cleaned up by the seller's job
+            return [(kind, uid) for kind, records in self._deleted.items() for uid, record in records.items()
+                    if kind != "product" or record["seller_uid"] not in self._deleted["seller"]]
+
+    def cleanup_batch(self, kind, uid, step, limit):
+        with self._lock:
+            record = self._deleted[kind].get(uid)
+            if record is None:
+                return 0
+            if step == "node":
+                del self._deleted[kind][uid]
+                return 1
+            if step == "products":
+                uids = list(self._products_by_seller.get(uid, ()))[:limit]
+                for product_uid in uids:
+                    product = self._deleted["product"].pop(product_uid, None)
+                    if product is not None:
+                        self._snapshot_product(product)
+                    _index_remove(self._products_by_seller, uid, product_uid)
+                return len(uids)
+            if step == "orders":
+                index = {"seller": self._orders_by_seller, "buyer": self._orders_by_buyer}.get(kind)
+                if index is None:
+                    # One pass over the seller's orders; nothing to detach here
+                    self._snapshot_product(record)
+                    return 0
+                uids = list(index.get(uid, ()))[:limit]
+                for order_uid in uids:
+                    self.orders[order_uid][f"{kind}_name"] = record["name"]
+                    _index_remove(index, uid, order_uid)
+                return len(uids)
+            if step == "reviews":
+                uids = list(self._reviews_by_seller.get(uid, ()))[:limit]
+                for review_uid in uids:
+                    review = self.reviews.pop(review_uid)
+                    self._review_by_order.pop(review["order_uid"], None)
+                    _index_remove(self._reviews_by_seller, uid, review_uid)
+                return len(uids)
+            if step == "notifications":
+                uids = list(self._notifications_by_recipient.get((uid, kind), ()))[:limit]
+                for notification_uid in uids:
+                    self.delete_notification(notification_uid)
+                return len(uids)
+            if step == "messages":
+                uids = list(self._messages_by_user.get(uid, ()))[:limit]
+                for message_uid in uids:
+                    message = self.messages.pop(message_uid)
+                    _index_remove(self._messages_by_user, message["sender_uid"], message_uid)
+                    _index_remove(self._messages_by_user, message["recipient_uid"], message_uid)
+                return len(uids)
+            if step == "rollups":
+                keys = list(self._rollups_by_seller.get(uid, ()))[:limit]
+                for key in keys:
+                    self.rollups.pop(key, None)
+                    _index_remove(self._rollups_by_seller, uid, key)
+                return len(keys)
+            raise ValueError(f"Unknown cleanup step {kind}/{step}")
+
+    # --- scheduled jobs ---------------------------------------------------
+
+    def acquire_job_lease(self, name, owner, slot, lease_seconds):
+        now = time.time()
+        with self._lock:
+            lease = self.job_leases.setdefault(name, {"name": name, "owner": None, "lease_until": None, "last_slot": None})
+            if lease["owner"] is not None and lease["lease_until"] >= now:
+                return False
+            if lease["last_slot"] is not None and lease["last_slot"] >= slot:
+                return False
+            lease.update(owner=owner, lease_until=now + lease_seconds, last_slot=slot)
+            return True
+
+    def release_job_lease(self, name, owner):
+        with self._lock:
+            lease = self.job_leases.get(name)
+            if lease is not None and lease["owner"] == owner:
+                lease.update(owner=None, lease_until=None)
+
+    def list_job_leases(self):
+        with self._lock:
+            return [dict(self.job_leases[name]) for name in sorted(self.job_leases)]
+
+    def record_job_run(self, run, keep):
+        with self._lock:
+            self.job_runs.append(dict(run))
+            same_job = [r for r in self.job_runs if r["job"] == run["job"]]
+            for old in same_job[:max(len(same_job) - keep, 0)]:
+                self.job_runs.remove(old)
+
+    def list_job_runs(self, job, limit):
+        with self._lock:
+            runs = [dict(r) for r in reversed(self.job_runs) if job is None or r["job"] == job]
+        return runs[:limit]
+
+    # --- rate limits ------------------------------------------------------
+
+    def rate_limit_hit(self, key, limit, window, now):
+        return self._rate_limits.hit(key, limit, window, now)
+
+    def rate_limit_reset(self, key):
+        self._rate_limits.reset(key)
+
+    def expire_rate_limits(self, now, limit):
+        # MemoryBackend sweeps idle keys itself when it fills up
+        return 0
+
+    # --- search -----------------------------------------------------------
+
+    def search(self, search_type, query, limit=10):
+        query = query.lower()
+        with self._lock:
+            if search_type == "products":
+                rows = ({"id": p["uid"], "name": p["name"], "price": p["price"], "location": p["type"]}
+                        for p in self.products.values() if query in p["name"].lower())
+            else:
+                table = self.sellers if search_type == "sellers" else self.buyers
+                rows = ({"id": u["uid"], "name": u["name"], "location": u.get("location")}
+                        for u in table.values() if query in u["name"].lower())
+            results = []
+            for row in rows:
+                if len(results) >= limit:
+                    break
+                results.append(row)
+            return results
@@ -0,0 +1,1389 @@
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from fastapi import HTTPException, status
+from neo4j import READ_ACCESS, exceptions as neo4j_exceptions
+from neo4j.spatial import WGS84Point
+from ..database import get_db
+from ..utils.rate_limit import retry_after
+from .base import Record, Repository
+from .common import (
+    ROLLUP_EXCLUDED_STATUSES,
+    co_purchase_increments,
+    counts_in_rollup,
+    plan_product_upsert,
+    rollup_day,
+    to_datetime,
+)
+
+# Only return users with a valid email format to avoid inflate errors downstream
+EMAIL_PATTERN = "[^@]+@[^@]+\\.[^@]+"
+
+PRODUCT_RETURN = """
+WITH p, head([(p)-[:SOLD_BY]->(s:Seller) | s]) AS s
+RETURN p {.*} AS product, s.uid AS seller_uid, s.name AS seller_name, s.location AS seller_location
+"""
+
+# Buyer, seller, product and review flag for each order in the same query.
+# Any label matches, so soft-deleted nodes still name themselves; once
+# cleanup has detached them the order's own copies are used.
+ORDER_RETURN = """
+WITH o,
+     head([(o)-[:PLACED_BY]->(b) | b]) AS b,
+     head([(o)-[:FULFILLED_BY]->(s) | s]) AS s,
+     head([(o)-[:CONTAINS]->(p) | p]) AS p
+RETURN o.uid AS uid, o.quantity AS quantity, o.total_price AS total_price, o.status AS status,
+       o.created_at AS created_at, o.updated_at AS updated_at, o.reserved_until AS reserved_until,
+       coalesce(b.uid, o.buyer_uid) AS buyer_uid, coalesce(b.name, o.buyer_name) AS buyer_name,
+       b.contact_number AS buyer_contact,
+       coalesce(s.uid, o.seller_uid) AS seller_uid, coalesce(s.name, o.seller_name) AS seller_name,
+       s.contact_number AS seller_contact,
+       coalesce(p.uid, o.product_uid) AS fish_product_uid, coalesce(p.name, o.product_name) AS fish_product_name,
+       EXISTS { MATCH (r:Review {order_uid: o.uid}) } AS reviewed
+"""
+
+# Orderable stock, kept on the product for the "stock" sort; follows every
+# write that changes p.quantity - p.reserved
+SYNC_AVAILABLE = " SET p.available = p.quantity - coalesce(p.reserved, 0)"
+
+# Stock held by pending orders lives in p.reserved; p.quantity is stock on
+# hand. Reservation changes SET only these counters (never updated_at), and
+# bump p.stock_version so product ETags still change.
+RESERVE_STOCK = ("p.reserved = coalesce(p.reserved, 0) + $quantity, p.stock_version = coalesce(p.stock_version, 0) + 1"
+                 + SYNC_AVAILABLE)
+RELEASE_STOCK = "p.reserved = p.reserved - o.quantity, p.stock_version = coalesce(p.stock_version, 0) + 1" + SYNC_AVAILABLE
+# Confirmation turns the reservation into a sale; available stock is unchanged
+COMMIT_STOCK = "p.quantity = p.quantity - o.quantity, p.reserved = p.reserved - o.quantity"
+# Cancelling a sale (or a pending order placed before reservations) puts the stock back
+RESTOCK = "p.quantity = p.quantity + o.quantity, p.stock_version = coalesce(p.stock_version, 0) + 1" + SYNC_AVAILABLE
+
+# Filters shared by list_products and list_product_page
+PRODUCT_FILTERS = """
+      ($name IS NULL OR toLower(p.name) CONTAINS toLower($name))
+  AND ($type IS NULL OR toLower(p.type) CONTAINS toLower($type))
+  AND ($min_price IS NULL OR p.price >= $min_price)
+  AND ($max_price IS NULL OR p.price <= $max_price)
+  AND ($seller_uid IS NULL OR EXISTS { (p)-[:SOLD_BY]->(:Seller {uid: $seller_uid}) })
+"""
+
+# Bulk upload: the seller's products a batch refers to by uid or name, then
+# one UNWIND for the creates and one for the updates (quantity as in update_product)
+BULK_PRODUCT_KEYS = """
+MATCH (p:FishProduct)-[:SOLD_BY]->(:Seller {uid: $seller_uid})
+WHERE p.uid IN $uids OR toLower(p.name) IN $names
+RETURN p.uid AS uid, toLower(p.name) AS name
+"""
+BULK_CREATE_PRODUCTS = """
+MATCH (s:Seller {uid: $seller_uid})
+UNWIND $rows AS row
+CREATE (p:FishProduct)
+SET p = row, p.available = row.quantity, p.seller_rating = coalesce(s.average_rating, 0.0)
+CREATE (p)-[:SOLD_BY]->(s)
+"""
+BULK_UPDATE_PRODUCTS = """
+UNWIND $rows AS row
+MATCH (p:FishProduct {uid: row.uid})
+SET p += row.changes, p.updated_at = $now,
+    p.quantity = CASE WHEN row.quantity IS NULL THEN p.quantity ELSE row.quantity + coalesce(p.reserved, 0) END
+""" + SYNC_AVAILABLE
+
+# Range indexes on the listing sort keys. A page is an index scan from the
+# cursor in key order (ties broken by uid), stopped at LIMIT, not a full sort;
+# p.seller_rating is the seller's average rating copied onto each product
+# (0 when unrated) so the rating sort needs no Review or Seller join.
+PRODUCT_SORT_KEYS = ("price", "created_at", "seller_rating", "available")
+PRODUCT_SORT_INDEXES = [
+    f"CREATE INDEX index_FishProduct_{key} IF NOT EXISTS FOR (p:FishProduct) ON (p.{key})"
+    for key in PRODUCT_SORT_KEYS
+]
+
+# Fills in the sort keys of products written before they existed
+PRODUCT_SORT_KEYS_SYNC = """
+UNWIND $uids AS uid
+MATCH (p:FishProduct {uid: uid})
+SET p.available = p.quantity - coalesce(p.reserved, 0),
+    p.seller_rating = coalesce(head([(p)-[:SOLD_BY]->(s:Seller) | s.average_rating]), 0.0)
+RETURN count(p) AS updated
+"""
+
+# Applies one status change to orders already locked and validated by
+# transition_orders, with the stock effect each one needs
+TRANSITION_ORDERS = """
+UNWIND $uids AS uid
+MATCH (o:Order {uid: uid})
+OPTIONAL MATCH (o)-[:CONTAINS]->(p:FishProduct)
+WITH o, p, o.reserved_until IS NOT NULL AS reserved, $status = 'cancelled' AS cancelling
+FOREACH (_ IN CASE WHEN p IS NOT NULL AND reserved AND cancelling THEN [1] ELSE [] END | SET """ + RELEASE_STOCK + """)
+FOREACH (_ IN CASE WHEN p IS NOT NULL AND reserved AND NOT cancelling THEN [1] ELSE [] END | SET """ + COMMIT_STOCK + """)
+FOREACH (_ IN CASE WHEN p IS NOT NULL AND NOT reserved AND cancelling THEN [1] ELSE [] END | SET """ + RESTOCK + """)
+SET o.status = $status, o.updated_at = $now, o.reserved_until = null
+"""
+
+# One row per (facet, value); each facet skips its own filter, see product_facets
+PRODUCT_FACETS = """
+MATCH (p:FishProduct)
+WHERE ($name IS NULL OR toLower(p.name) CONTAINS toLower($name))
+  AND ($seller_uid IS NULL OR EXISTS { (p)-[:SOLD_BY]->(:Seller {uid: $seller_uid}) })
+WITH p,
+     ($type IS NULL OR toLower(p.type) CONTAINS toLower($type)) AS type_ok,
+     ($min_price IS NULL OR p.price >= $min_price) AND ($max_price IS NULL OR p.price <= $max_price) AS price_ok
+UNWIND [
+    CASE WHEN type_ok AND price_ok THEN ['total', ''] END,
+    CASE WHEN price_ok THEN ['type', p.type] END,
+    CASE WHEN type_ok THEN ['price', toString(size([edge IN $price_edges WHERE p.price >= edge]) - 1)] END,
+    CASE WHEN type_ok AND price_ok THEN ['location', head([(p)-[:SOLD_BY]->(s:Seller) | s.location])] END
+] AS facet
+WITH facet WHERE facet IS NOT NULL
+RETURN facet[0] AS facet, facet[1] AS value, count(*) AS count
+"""
+
+# Soft delete swaps the node's label for Deleted<label>, so every existing
+# read (all of which match on the label) skips it through the label index
+# with no extra predicate; cleanup finds it again by uid.
+DELETED_LABELS = {"seller": "Seller", "buyer": "Buyer", "product": "FishProduct"}
+SOFT_DELETE = """
+MATCH (n:{label} {{uid: $uid}})
+REMOVE n:{label} SET n:Deleted{label}, n.deleted_at = $now
+RETURN n.uid AS uid
+"""
+# A seller's listings leave the catalog with it, in the same transaction
+SOFT_DELETE_SELLER = """
+MATCH (n:Seller {uid: $uid})
+REMOVE n:Seller SET n:DeletedSeller, n.deleted_at = $now
+WITH n
+CALL {
+    WITH n
+    MATCH (p:FishProduct)-[:SOLD_BY]->(n)
+    REMOVE p:FishProduct SET p:DeletedFishProduct, p.deleted_at = $now
+    RETURN count(p) AS products
+}
+RETURN n.uid AS uid
+"""
+CLEANUP_INDEXES = [
+    *(f"CREATE INDEX index_Deleted{label}_uid IF NOT EXISTS FOR (n:Deleted{label}) ON (n.uid)"
+      for label in DELETED_LABELS.values()),
+    "CREATE INDEX index_Review_seller_uid IF NOT EXISTS FOR (r:Review) ON (r.seller_uid)",
+    "CREATE INDEX index_Notification_recipient_uid IF NOT EXISTS FOR (n:Notification) ON (n.recipient_uid)",
+    "CREATE INDEX index_Message_sender_uid IF NOT EXISTS FOR (m:Message) ON (m.sender_uid)",
+    "CREATE INDEX index_Message_recipient_uid IF NOT EXISTS FOR (m:Message) ON (m.recipient_uid)",
+]
+# One bounded batch per (kind, step) of common.CLEANUP_STEPS; each returns how many rows it handled
+CLEANUP_QUERIES = {
+    ("seller", "products"): """
+        MATCH (p:DeletedFishProduct)-[:SOLD_BY]->(:DeletedSeller {uid: $uid})
+        WITH p LIMIT $limit
+        OPTIONAL MATCH (o:Order)-[:CONTAINS]->(p)
+        SET o.product_uid = p.uid, o.product_name = p.name
+        WITH DISTINCT p DETACH DELETE p RETURN count(*) AS processed
+    """,
+    ("seller", "orders"): """
+        MATCH (o:Order)-[r:FULFILLED_BY]->(s:DeletedSeller {uid: $uid})
+        WITH o, r, s LIMIT $limit
+        SET o.seller_uid = s.uid, o.seller_name = s.name
+        DELETE r RETURN count(*) AS processed
+    """,
+    ("seller", "reviews"): """
+        MATCH (r:Review {seller_uid: $uid})
+        WITH r LIMIT $limit DETACH DELETE r RETURN count(*) AS processed
+    """,
+    ("seller", "rollups"): """
+        MATCH (r:SellerDailyRollup {seller_uid: $uid})
+        WITH r LIMIT $limit DELETE r RETURN count(*) AS processed
+    """,
+    ("buyer", "orders"): """
+        MATCH (o:Order)-[r:PLACED_BY]->(b:DeletedBuyer {uid: $uid})
+        WITH o, r, b LIMIT $limit
+        SET o.buyer_uid = b.uid, o.buyer_name = b.name
+        DELETE r RETURN count(*) AS processed
+    """,
+    ("product", "orders"): """
+        MATCH (o:Order)-[r:CONTAINS]->(p:DeletedFishProduct {uid: $uid})
+        WITH o, r, p LIMIT $limit
+        SET o.product_uid = p.uid, o.product_name = p.name
+        DELETE r RETURN count(*) AS processed
+    """,
+    **{(kind, "notifications"): """
+        MATCH (n:Notification {recipient_uid: $uid})
+        WITH n LIMIT $limit DETACH DELETE n RETURN count(*) AS processed
+    """ for kind in ("seller", "buyer")},
+    **{(kind, "messages"): """
+        CALL {
+            MATCH (m:Message {sender_uid: $uid}) RETURN m
+            UNION
+            MATCH (m:Message {recipient_uid: $uid}) RETURN m
+        }
+        WITH m LIMIT $limit DETACH DELETE m RETURN count(*) AS processed
+    """ for kind in ("seller", "buyer")},
+    **{(kind, "node"): f"""
+        MATCH (n:Deleted{label} {{uid: $uid}})
+        DETACH DELETE n RETURN count(*) AS processed
+    """ for kind, label in DELETED_LABELS.items()},
+}
+# A deleted seller's products are cleaned up by the seller's job
+LIST_DELETED = " UNION ALL ".join(
+    f"MATCH (n:Deleted{label}) "
+    + ("WHERE NOT (n)-[:SOLD_BY]->(:DeletedSeller) " if kind == "product" else "")
+    + f"RETURN '{kind}' AS kind, n.uid AS uid"
+    for kind, label in DELETED_LABELS.items()
+)
+
+# Badge counts for GET /me/summary in one round trip: the recipient index for
+# notifications, the user's order relationships for pending orders
+BADGE_COUNTS_QUERY = """
+CALL {{
+    MATCH (n:Notification {{recipient_uid: $uid, recipient_type: $user_type}})
+    WHERE n.read = false
+    RETURN count(n) AS unread_notifications,
+           count(CASE WHEN n.type = 'new_message' THEN 1 END) AS unread_messages
+}}
+CALL {{
+    MATCH (:{label} {{uid: $uid}})<-[:{rel}]-(o:Order {{status: 'pending'}})
+    RETURN count(o) AS pending_orders
+}}
+RETURN unread_notifications, unread_messages, pending_orders
+"""
+BADGE_COUNTS = {
+    "buyer": BADGE_COUNTS_QUERY.format(label="Buyer", rel="PLACED_BY"),
+    "seller": BADGE_COUNTS_QUERY.format(label="Seller", rel="FULFILLED_BY"),
+}
+
+# Notification expiry walks read notifications oldest first
+NOTIFICATION_CREATED_INDEX = """
+CREATE INDEX index_Notification_created_at IF NOT EXISTS
+FOR (n:Notification) ON (n.created_at)
+"""
+
+# Ratings recomputed from the reviews; only sellers that drifted are written
+RECONCILE_RATINGS = """
+UNWIND $uids AS uid
+MATCH (s:Seller {uid: uid})
+OPTIONAL MATCH (r:Review {seller_uid: uid})
+WITH s, avg(r.rating) AS avg_rating, count(r) AS review_count
+WHERE coalesce(s.review_count, -1) <> review_count
+   OR coalesce(s.average_rating, -1.0) <> coalesce(avg_rating, -1.0)
+SET s.average_rating = avg_rating, s.review_count = review_count
+WITH s
+CALL {
+    WITH s
+    MATCH (p:FishProduct)-[:SOLD_BY]->(s)
+    SET p.seller_rating = coalesce(s.average_rating, 0.0),
+        p.stock_version = coalesce(p.stock_version, 0) + 1
+}
+RETURN count(s) AS reconciled
+"""
+
+# Catalog ETags read a few counter nodes instead of scanning the catalog;
+# every write that changes what a listing shows bumps one in the same
+# transaction. Product and seller writes bump 'catalog'. Order traffic only
+# moves stock, and bumps one of STOCK_VERSION_SHARDS 'stock-<n>' counters
+# picked at random, so concurrent orders rarely wait on the same node lock
+# (and never on the one product writes take).
+STOCK_VERSION_SHARDS = 16
+CATALOG_VERSION_CONSTRAINT = """
+CREATE CONSTRAINT constraint_unique_CatalogVersion_id IF NOT EXISTS
+FOR (c:CatalogVersion) REQUIRE c.id IS UNIQUE
+"""
+BUMP_CATALOG_VERSION = """
+MERGE (c:CatalogVersion {id: 'catalog'})
+SET c.version = coalesce(c.version, 0) + 1
+"""
+BUMP_STOCK_VERSION = """
+MERGE (c:CatalogVersion {id: $id})
+SET c.version = coalesce(c.version, 0) + 1
+"""
+
+# One JobLease node per scheduled job. Setting locked_at first takes the
+# node's write lock, so the checks below see a lease another replica just took.
+JOB_LEASE_CONSTRAINT = """
+CREATE CONSTRAINT constraint_unique_JobLease_name IF NOT EXISTS
+FOR (j:JobLease) REQUIRE j.name IS UNIQUE
+"""
+ACQUIRE_JOB_LEASE = """
+MERGE (j:JobLease {name: $name})
+SET j.locked_at = $now
+WITH j
+WHERE (j.owner IS NULL OR j.lease_until < $now) AND coalesce(j.last_slot, -1.0) < $slot
+SET j.owner = $owner, j.lease_until = $now + $lease_seconds, j.last_slot = $slot
+RETURN j.name AS name
+"""
+RATE_LIMIT_CONSTRAINT = """
+CREATE CONSTRAINT constraint_unique_RateLimit_key IF NOT EXISTS
+FOR (r:RateLimit) REQUIRE r.key IS UNIQUE
+"""
+RATE_LIMIT_EXPIRY_INDEX = """
+CREATE INDEX index_RateLimit_expires_at IF NOT EXISTS
+FOR (r:RateLimit) ON (r.expires_at)
+"""
+# Sliding window of app/utils/rate_limit.py in one statement; setting
+# locked_at takes the node's write lock before the counters are read
+RATE_LIMIT_HIT = """
+MERGE (r:RateLimit {key: $key})
+ON CREATE SET r.index = $index, r.current = 0, r.previous = 0
+SET r.locked_at = $now
+WITH r,
+     CASE WHEN r.index = $index THEN r.current ELSE 0 END AS current,
+     CASE WHEN r.index = $index THEN r.previous WHEN r.index = $index - 1 THEN r.current ELSE 0 END AS previous
+WITH r, current, previous, previous * $weight + current < $limit AS allowed
+SET r.index = $index, r.previous = previous, r.expires_at = $expires_at,
+    r.current = current + CASE WHEN allowed THEN 1 ELSE 0 END
+RETURN allowed, current, previous
+"""
+JOB_RUN_INDEX = """
+CREATE INDEX index_JobRun_job_started_at IF NOT EXISTS
+FOR (r:JobRun) ON (r.job, r.started_at)
+"""
+RECORD_JOB_RUN = """
+CREATE (r:JobRun) SET r = $run
+WITH r.job AS job
+MATCH (old:JobRun {job: job})
+WITH old ORDER BY old.started_at DESC SKIP $keep
+DELETE old
+"""
+
+# Seller coordinates live in one WGS-84 point so distance filters use the index
+SELLER_POINT_INDEX = """
+CREATE POINT INDEX index_Seller_point IF NOT EXISTS
+FOR (s:Seller) ON (s.point)
+"""
+
+# The distance predicate on s.point is answered by SELLER_POINT_INDEX; products
+# are only expanded from the sellers inside the radius
+PRODUCTS_NEAR = """
+MATCH (s:Seller)
+WHERE point.distance(s.point, $origin) <= $radius_m
+WITH s, point.distance(s.point, $origin) AS distance
+MATCH (p:FishProduct)-[:SOLD_BY]->(s)
+WHERE p.quantity - coalesce(p.reserved, 0) > 0
+WITH p, s, distance
+ORDER BY distance, p.updated_at DESC
+LIMIT $limit
+RETURN p {.*} AS product, s.uid AS seller_uid, s.name AS seller_name, s.location AS seller_location,
+       distance / 1000.0 AS distance_km
+"""
+
+# Active reservations are the only orders with reserved_until set
+RESERVATION_INDEX = """
+CREATE INDEX index_Order_reserved_until IF NOT EXISTS
+FOR (o:Order) ON (o.reserved_until)
+"""
+
+# Seller/product side of an order as the rollups see it. Orders keep their
+# product uid and name so a deleted product's history stays in its bucket.
+ROLLUP_SOURCE = """
+WITH o,
+     head([(o)-[:FULFILLED_BY]->(s:Seller) | s.uid]) AS seller_uid,
+     head([(o)-[:CONTAINS]->(p:FishProduct) | p]) AS p
+RETURN o.uid AS uid, seller_uid, coalesce(p.uid, o.product_uid, '') AS product_uid,
+       coalesce(p.name, o.product_name, '') AS product_name,
+       o.quantity AS quantity, o.total_price AS total_price, o.status AS status, o.created_at AS created_at
+"""
+
+# `key` is unique (see ROLLUP_CONSTRAINT) so concurrent MERGEs meet on one node
+ROLLUP_APPLY = """
+UNWIND $rows AS row
+MERGE (r:SellerDailyRollup {key: row.key})
+ON CREATE SET r.seller_uid = row.seller_uid, r.day = row.day, r.product_uid = row.product_uid,
+              r.orders = 0, r.units = 0, r.revenue = 0.0
+SET r.product_name = row.product_name,
+    r.orders = r.orders + row.orders,
+    r.units = r.units + row.units,
+    r.revenue = r.revenue + row.revenue
+WITH r WHERE r.orders <= 0
+DELETE r
+"""
+
+ROLLUP_CONSTRAINT = """
+CREATE CONSTRAINT constraint_unique_SellerDailyRollup_key IF NOT EXISTS
+FOR (r:SellerDailyRollup) REQUIRE r.key IS UNIQUE
+"""
+
+ROLLUP_INDEX = """
+CREATE INDEX index_SellerDailyRollup_seller_day IF NOT EXISTS
+FOR (r:SellerDailyRollup) ON (r.seller_uid, r.day)
+"""
+
+# Aggregation runs in the database; only one row per (seller, day, product) comes back
+ROLLUP_REBUILD = """
+MATCH (o:Order)-[:FULFILLED_BY]->(s:Seller)
+WHERE s.uid IN $seller_uids AND NOT o.status IN $excluded AND o.created_at IS NOT NULL
+WITH o, s.uid AS seller_uid, head([(o)-[:CONTAINS]->(p:FishProduct) | p]) AS p
+WITH seller_uid, coalesce(p.uid, o.product_uid, '') AS product_uid,
+     coalesce(p.name, o.product_name, '') AS product_name,
+     toString(date(datetime({epochMillis: toInteger(o.created_at * 1000)}))) AS day, o
+WITH seller_uid, day, product_uid, head(collect(product_name)) AS product_name,
+     count(o) AS orders, sum(o.quantity) AS units, sum(o.total_price) AS revenue
+CREATE (r:SellerDailyRollup {key: seller_uid + '|' + day + '|' + product_uid,
+                             seller_uid: seller_uid, day: day, product_uid: product_uid,
+                             product_name: product_name, orders: orders, units: units, revenue: toFloat(revenue)})
+RETURN count(r) AS written
+"""
+
+# Products a buyer has received, with how many delivered orders each
+BUYER_DELIVERIES = """
+UNWIND $buyer_uids AS buyer_uid
+MATCH (:Buyer {uid: buyer_uid})<-[:PLACED_BY]-(o:Order {status: 'delivered'})-[:CONTAINS]->(p:FishProduct)
+RETURN buyer_uid, p.uid AS product_uid, count(o) AS deliveries
+"""
+
+# Edges point from the lower uid to the higher one, so each pair has one
+CO_PURCHASE_APPLY = """
+UNWIND $pairs AS pair
+MATCH (a:FishProduct {uid: pair.a})
+MATCH (c:FishProduct {uid: pair.c})
+MERGE (a)-[r:CO_PURCHASED]->(c)
+ON CREATE SET r.weight = 0
+SET r.weight = r.weight + pair.weight
+"""
+
+# Seller and score ride along with each product record
+SCORED_PRODUCT_RETURN = """
+WITH q AS p, score, head([(q)-[:SOLD_BY]->(s:Seller) | s]) AS s
+RETURN p {.*} AS product, s.uid AS seller_uid, s.name AS seller_name, s.location AS seller_location, score
+"""
+
+# Bounded by the product's degree; the controller caches the top K
+RELATED_PRODUCTS = """
+MATCH (:FishProduct {uid: $uid})-[c:CO_PURCHASED]-(q:FishProduct)
+WITH q, c.weight AS score
+ORDER BY score DESC, q.uid
+LIMIT $limit
+""" + SCORED_PRODUCT_RETURN
+
+# At most $history products, each expanded to its $fanout heaviest edges
+RECOMMENDED_PRODUCTS = """
+MATCH (:Buyer {uid: $uid})<-[:PLACED_BY]-(o:Order {status: 'delivered'})-[:CONTAINS]->(p:FishProduct)
+WITH p, max(o.created_at) AS last_delivered
+ORDER BY last_delivered DESC
+LIMIT $history
+CALL {
+    WITH p
+    MATCH (p)-[c:CO_PURCHASED]-(q:FishProduct)
+    RETURN q, c.weight AS weight
+    ORDER BY weight DESC
+    LIMIT $fanout
+}
+WITH q, sum(weight) AS score
+WHERE NOT EXISTS {
+    MATCH (q)<-[:CONTAINS]-(:Order {status: 'delivered'})-[:PLACED_BY]->(:Buyer {uid: $uid})
+}
+WITH q, score
+ORDER BY score DESC, q.uid
+LIMIT $limit
+""" + SCORED_PRODUCT_RETURN
+
+# Drops and recomputes the edges stored from a page of products, in the database
+CO_PURCHASE_REBUILD = """
+UNWIND $uids AS uid
+MATCH (a:FishProduct {uid: uid})
+OPTIONAL MATCH (a)-[old:CO_PURCHASED]->()
+DELETE old
+WITH DISTINCT a
+MATCH (a)<-[:CONTAINS]-(:Order {status: 'delivered'})-[:PLACED_BY]->(b:Buyer)
+WITH DISTINCT a, b
+MATCH (b)<-[:PLACED_BY]-(:Order {status: 'delivered'})-[:CONTAINS]->(c:FishProduct)
+WHERE a.uid < c.uid
+WITH a, c, count(DISTINCT b) AS weight
+CREATE (a)-[:CO_PURCHASED {weight: weight}]->(c)
+RETURN count(*) AS written
+"""
+
+NOTIFICATION_FIELDS = """
+n.uid AS uid, n.recipient_uid AS recipient_uid, n.recipient_type AS recipient_type,
+n.type AS type, n.message AS message, n.read AS read, n.created_at AS created_at
+"""
+
+MESSAGE_FIELDS = """
+m.uid AS uid, m.sender_uid AS sender_uid, m.sender_type AS sender_type,
+m.recipient_uid AS recipient_uid, m.recipient_type AS recipient_type,
+m.message AS message, m.created_at AS created_at
+"""
+
+REVIEW_FIELDS = """
+r.uid AS uid, r.buyer_uid AS buyer_uid, r.buyer_name AS buyer_name,
+r.seller_uid AS seller_uid, r.order_uid AS order_uid,
+r.rating AS rating, r.comment AS comment, r.created_at AS created_at
+"""
+
+SEARCH_QUERIES = {
+    "products": """
+        MATCH (p:FishProduct)
+        WHERE toLower(p.name) CONTAINS toLower($query)
+        RETURN p.uid AS id, p.name AS name, p.price AS price, p.type AS location
+        LIMIT $limit
+    """,
+    "sellers": """
+        MATCH (s:Seller)
+        WHERE toLower(s.name) CONTAINS toLower($query)
+        RETURN s.uid AS id, s.name AS name, s.location AS location
+        LIMIT $limit
+    """,
+    "buyers": """
+        MATCH (b:Buyer)
+        WHERE toLower(b.name) CONTAINS toLower($query)
+        RETURN b.uid AS id, b.name AS name, b.location AS location
+        LIMIT $limit
+    """,
+}
+
+
+class _InsufficientStock(Exception):
+    pass
+
+
+def _with_datetimes(props: Dict[str, Any]) -> Record:
+    props["created_at"] = to_datetime(props.get("created_at"))
+    props["updated_at"] = to_datetime(props.get("updated_at"))
+    return props
+
+
+def _to_point(props: Record) -> Record:
+    """Fold latitude/longitude into the `point` property (None removes it)"""
+    if "latitude" not in props and "longitude" not in props:
+        return props
+    props = dict(props)
+    latitude, longitude = props.pop("latitude", None), props.pop("longitude", None)
+    props["point"] = WGS84Point((longitude, latitude)) if latitude is not None and longitude is not None else None
+    return props
+
+
+def _user_record(props: Dict[str, Any]) -> Record:
+    point = props.pop("point", None)
+    if point is not None:
+        props["latitude"], props["longitude"] = point.latitude, point.longitude
+    return _with_datetimes(props)
+
+
+def _product_record(row: Dict[str, Any]) -> Record:
+    product = _with_datetimes(row["product"])
+    # Callers see what can still be ordered
+    product["quantity"] = (product.get("quantity") or 0) - (product.pop("reserved", None) or 0)
+    product.pop("stock_version", None)
+    product.pop("available", None)
+    product["seller_uid"] = row["seller_uid"]
+    product["seller_name"] = row["seller_name"]
+    product["seller_location"] = row["seller_location"]
+    return product
+
+
+def _order_record(row: Dict[str, Any]) -> Record:
+    return {
+        "uid": row["uid"],
+        "buyer_uid": row["buyer_uid"] or "",
+        "buyer_name": row["buyer_name"] or "",
+        "buyer_contact": row["buyer_contact"] if row["buyer_contact"] is not None else "N/A",
+        "seller_uid": row["seller_uid"] or "",
+        "seller_name": row["seller_name"] or "",
+        "seller_contact": row["seller_contact"] if row["seller_contact"] is not None else "N/A",
+        "fish_product_uid": row["fish_product_uid"] or "",
+        "fish_product_name": row["fish_product_name"] or "",
+        "quantity": row["quantity"],
+        "total_price": row["total_price"],
+        "status": row["status"],
+        "reviewed": bool(row["reviewed"]),
+        "reserved_until": to_datetime(row["reserved_until"]),
+        "created_at": to_datetime(row["created_at"]),
+        "updated_at": to_datetime(row["updated_at"]),
+    }
+
+
+def _bump_stock_version(tx):
+    """Bump a random stock version shard (see STOCK_VERSION_SHARDS)"""
+    tx.run(BUMP_STOCK_VERSION, {"id": f"stock-{random.randrange(STOCK_VERSION_SHARDS)}"}).consume()
+
+
+def _apply_rollups(tx, sources: List[Dict[str, Any]], sign: int):
+    """Add (sign=1) or remove (sign=-1) orders from their daily rollups, one statement per call"""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for source in sources:
+        if not source["seller_uid"]:
+            continue
+        day = rollup_day(source["created_at"])
+        key = f"{source['seller_uid']}|{day}|{source['product_uid']}"
+        row = rows.setdefault(key, {
+            "key": key, "seller_uid": source["seller_uid"], "day": day, "product_uid": source["product_uid"],
+            "product_name": source["product_name"], "orders": 0, "units": 0, "revenue": 0.0,
+        })
+        row["orders"] += sign
+        row["units"] += sign * (source["quantity"] or 0)
+        row["revenue"] += sign * float(source["total_price"] or 0)
+    if rows:
+        tx.run(ROLLUP_APPLY, {"rows": list(rows.values())}).consume()
+
+
+def _apply_co_purchases(tx, orders: List[Dict[str, Any]]):
+    """Add the CO_PURCHASED weights of just-delivered orders (ORDER_RETURN rows)"""
+    delivered = [(o["buyer_uid"], o["fish_product_uid"]) for o in orders if o["buyer_uid"] and o["fish_product_uid"]]
+    if not delivered:
+        return
+    history: Dict[str, Dict[str, int]] = {}
+    for row in tx.run(BUYER_DELIVERIES, {"buyer_uids": list({buyer_uid for buyer_uid, _ in delivered})}):
+        history.setdefault(row["buyer_uid"], {})[row["product_uid"]] = row["deliveries"]
+    pairs = [{"a": a, "c": c, "weight": weight}
+             for (a, c), weight in co_purchase_increments(delivered, history).items()]
+    if pairs:
+        tx.run(CO_PURCHASE_APPLY, {"pairs": pairs}).consume()
+
+
+class Neo4jRepository(Repository):
+    """Repository backed by Cypher over the shared driver"""
+
+    # --- plumbing ---------------------------------------------------------
+
+    def _execute(self, mode: str, work: Callable, catalog: bool = False, stock: bool = False):
+        """Run work(tx) in a managed transaction (the driver retries transient errors).
+
+        catalog=True also bumps the catalog version in the same transaction,
+        stock=True one of the stock version shards.
+        """
+        if catalog or stock:
+            inner = work
+
+            def work(tx):
+                result = inner(tx)
+                if catalog:
+                    tx.run(BUMP_CATALOG_VERSION).consume()
+                if stock:
+                    _bump_stock_version(tx)
+                return result
+        try:
+            with get_db().session() as session:
+                if mode == "read":
+                    return session.execute_read(work)
+                return session.execute_write(work)
+        except neo4j_exceptions.ServiceUnavailable as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Database unavailable, please try again later") from e
+
+    def _read(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return self._execute("read", lambda tx: [r.data() for r in tx.run(query, params or {})])
+
+    def _write(self, query: str, params: Optional[Dict[str, Any]] = None, catalog: bool = False,
+               stock: bool = False) -> List[Dict[str, Any]]:
+        return self._execute("write", lambda tx: [r.data() for r in tx.run(query, params or {})], catalog, stock)
+
+    def _stream(self, query: str, params: Dict[str, Any], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Yield rows in batches as the server sends them.
+
+        fetch_size makes the driver pull batch_size records at a time, so
+        neither side holds the whole result. No managed transaction here:
+        a retry after rows were already sent would duplicate them.
+        """
+        try:
+            with get_db().session(default_access_mode=READ_ACCESS, fetch_size=batch_size) as session:
+                batch = []
+                for record in session.run(query, params):
+                    batch.append(record.data())
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+        except neo4j_exceptions.ServiceUnavailable as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Database unavailable, please try again later") from e
+
+    # --- sellers / buyers -------------------------------------------------
+
+    def _get_user(self, label: str, key: str, value: str) -> Optional[Record]:
+        rows = self._read(f"MATCH (u:{label} {{{key}: $value}}) RETURN u {{.*}} AS u LIMIT 1", {"value": value})
+        return _user_record(rows[0]["u"]) if rows else None
+
+    def _list_users(self, label: str, extra_fields: str = "") -> List[Record]:
+        rows = self._read(f"""
+        MATCH (u:{label})
+        WHERE u.email =~ $email_pattern
+        RETURN u.uid AS uid, u.name AS name, u.email AS email,
+               u.contact_number AS contact_number, {extra_fields}
+               u.created_at AS created_at, u.updated_at AS updated_at
+        ORDER BY u.created_at DESC
+        """, {"email_pattern": EMAIL_PATTERN})
+        return [_with_datetimes(row) for row in rows]
+
+    def _create_user(self, label: str, props: Record) -> Record:
+        now = time.time()
+        props = {**_to_point(props), "uid": uuid.uuid4().hex, "created_at": now, "updated_at": now}
+        rows = self._write(f"CREATE (u:{label}) SET u = $props RETURN u {{.*}} AS u", {"props": props},
+                           catalog=label == "Seller")
+        return _user_record(rows[0]["u"])
+
+    def _update_user(self, label: str, uid: str, changes: Record, touch: bool) -> Optional[Record]:
+        changes = _to_point(dict(changes))
+        if touch:
+            changes["updated_at"] = time.time()
+        rows = self._write(
+            f"MATCH (u:{label} {{uid: $uid}}) SET u += $changes RETURN u {{.*}} AS u",
+            {"uid": uid, "changes": changes},
+            catalog=label == "Seller",
+        )
+        return _user_record(rows[0]["u"]) if rows else None
+
+    def _get_version(self, label: str, uid: str) -> Optional[str]:
+        rows = self._read(f"MATCH (n:{label} {{uid: $uid}}) RETURN n.updated_at AS updated_at", {"uid": uid})
+        return str(rows[0]["updated_at"]) if rows else None
+
+    def _delete_node(self, label: str, uid: str) -> bool:
+        rows = self._write(
+            f"MATCH (n:{label} {{uid: $uid}}) WITH n, n.uid AS uid DETACH DELETE n RETURN count(uid) AS deleted",
+            {"uid": uid},
+        )
+        return bool(rows and rows[0]["deleted"])
+
+    def _soft_delete(self, kind: str, uid: str) -> bool:
+        query = SOFT_DELETE_SELLER if kind == "seller" else SOFT_DELETE.format(label=DELETED_LABELS[kind])
+        return bool(self._write(query, {"uid": uid, "now": time.time()}, catalog=kind != "buyer"))
+
+    def get_seller(self, uid):
+        return self._get_user("Seller", "uid", uid)
+
+    def get_seller_by_email(self, email):
+        return self._get_user("Seller", "email", email)
+
+    def list_sellers(self):
+        sellers = self._list_users("Seller", "u.location AS location,")
+        for seller in sellers:
+            seller["location"] = seller["location"] or ""
+        return sellers
+
+    def create_seller(self, props):
+        return self._create_user("Seller", props)
+
+    def update_seller(self, uid, changes, touch=True):
+        return self._update_user("Seller", uid, changes, touch)
+
+    def delete_seller(self, uid):
+        return self._soft_delete("seller", uid)
+
+    def get_seller_version(self, uid):
+        return self._get_version("Seller", uid)
+
+    def get_buyer(self, uid):
+        return self._get_user("Buyer", "uid", uid)
+
+    def get_buyer_by_email(self, email):
+        return self._get_user("Buyer", "email", email)
+
+    def list_buyers(self):
+        return self._list_users("Buyer")
+
+    def create_buyer(self, props):
+        return self._create_user("Buyer", props)
+
+    def update_buyer(self, uid, changes, touch=True):
+        return self._update_user("Buyer", uid, changes, touch)
+
+    def delete_buyer(self, uid):
+        return self._soft_delete("buyer", uid)
+
+    def get_buyer_version(self, uid):
+        return self._get_version("Buyer", uid)
+
+    # --- products ---------------------------------------------------------
+
+    def get_product(self, uid):
+        rows = self._read("MATCH (p:FishProduct {uid: $uid})" + PRODUCT_RETURN, {"uid": uid})
+        return _product_record(rows[0]) if rows else None
+
+    def get_product_version(self, uid):
+        rows = self._read("""
+        MATCH (p:FishProduct {uid: $uid})
+        RETURN p.updated_at AS updated_at, p.stock_version AS stock_version,
+               head([(p)-[:SOLD_BY]->(s:Seller) | s.updated_at]) AS seller_updated_at
+        """, {"uid": uid})
+        if not rows:
+            return None
+        return f"{rows[0]['updated_at']}:{rows[0]['stock_version']}:{rows[0]['seller_updated_at']}"
+
+    def get_catalog_version(self):
+        rows = self._read("MATCH (c:CatalogVersion) RETURN c.id AS id, c.version AS version")
+        versions = {row["id"]: row["version"] or 0 for row in rows}
+        catalog = versions.pop("catalog", 0)
+        # Each shard only grows, so the sum changes whenever any of them does
+        return f"{catalog}.{sum(versions.values())}"
+
+    def list_products(self, name=None, type=None, min_price=None, max_price=None, seller_uid=None):
+        rows = self._read("MATCH (p:FishProduct) WHERE" + PRODUCT_FILTERS + PRODUCT_RETURN, {
+            "name": name or None,
+            "type": type or None,
+            "min_price": min_price,
+            "max_price": max_price,
+            "seller_uid": seller_uid or None,
+        })
+        return [_product_record(row) for row in rows]
+
+    def list_product_page(self, sort_key, descending, limit, after=None,
+                          name=None, type=None, min_price=None, max_price=None, seller_uid=None):
+        if sort_key not in PRODUCT_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_key}")
+        direction, op = ("DESC", "<") if descending else ("ASC", ">")
+        # The range predicate on the key is the index seek; the uid test only
+        # skips the rows tied with the cursor
+        seek = (f"p.{sort_key} {op}= $after_value AND (p.{sort_key} {op} $after_value OR p.uid {op} $after_uid)"
+                if after else f"p.{sort_key} IS NOT NULL")
+        rows = self._read(f"""
+        MATCH (p:FishProduct)
+        WHERE {seek} AND""" + PRODUCT_FILTERS + f"""
+        WITH p ORDER BY p.{sort_key} {direction}, p.uid {direction} LIMIT $limit
+        """ + PRODUCT_RETURN + f""", p.{sort_key} AS sort_value
+        ORDER BY sort_value {direction}, product.uid {direction}
+        """, {
+            "after_value": after[0] if after else None,
+            "after_uid": after[1] if after else None,
+            "limit": limit,
+            "name": name or None,
+            "type": type or None,
+            "min_price": min_price,
+            "max_price": max_price,
+            "seller_uid": seller_uid or None,
+        })
+        products = []
+        for row in rows:
+            product = _product_record(row)
+            product["sort_value"] = row["sort_value"]
+            products.append(product)
+        return products
+
+    def product_facets(self, price_edges, name=None, type=None, min_price=None, max_price=None, seller_uid=None):
+        rows = self._read(PRODUCT_FACETS, {
+            "price_edges": price_edges,
+            "name": name or None,
+            "type": type or None,
+            "min_price": min_price,
+            "max_price": max_price,
+            "seller_uid": seller_uid or None,
+        })
+        facets: Record = {"total": 0, "type": {}, "price": {}, "location": {}}
+        for row in rows:
+            if row["facet"] == "total":
+                facets["total"] = row["count"]
+            elif row["facet"] == "price":
+                if int(row["value"]) >= 0:
+                    facets["price"][int(row["value"])] = row["count"]
+            else:
+                facets[row["facet"]][row["value"]] = row["count"]
+        return facets
+
+    def create_product(self, props, seller_uid):
+        now = time.time()
+        props = {**props, "uid": uuid.uuid4().hex, "created_at": now, "updated_at": now, "available": props["quantity"]}
+        rows = self._write("""
+        MATCH (s:Seller {uid: $seller_uid})
+        CREATE (p:FishProduct) SET p = $props, p.seller_rating = coalesce(s.average_rating, 0.0)
+        CREATE (p)-[:SOLD_BY]->(s)
+        """ + PRODUCT_RETURN, {"seller_uid": seller_uid, "props": props}, catalog=True)
+        return _product_record(rows[0]) if rows else None
+
+    def update_product(self, uid, changes):
+        changes = dict(changes)
+        # A new quantity is what the seller wants to be orderable, on top of what is reserved
+        quantity = changes.pop("quantity", None)
+        rows = self._write("""
+        MATCH (p:FishProduct {uid: $uid})
+        SET p += $changes, p.updated_at = $now,
+            p.quantity = CASE WHEN $quantity IS NULL THEN p.quantity ELSE $quantity + coalesce(p.reserved, 0) END
+        """ + SYNC_AVAILABLE + PRODUCT_RETURN, {"uid": uid, "changes": changes, "quantity": quantity, "now": time.time()},
+                           catalog=True)
+        return _product_record(rows[0]) if rows else None
+
+    def delete_product(self, uid):
+        return self._soft_delete("product", uid)
+
+    def bulk_upsert_products(self, seller_uid, rows):
+        now = time.time()
+
+        def work(tx):
+            if tx.run("MATCH (s:Seller {uid: $uid}) RETURN s.uid AS uid", {"uid": seller_uid}).single() is None:
+                return [{"uid": row.get("uid"), "status": "error", "detail": "Seller not found"} for row in rows]
+            keys = tx.run(BULK_PRODUCT_KEYS, {
+                "seller_uid": seller_uid,
+                "uids": [row["uid"] for row in rows if row.get("uid")],
+                "names": [row["name"].lower() for row in rows if row.get("name")],
+            }).data()
+            creates, updates, results = plan_product_upsert(
+                rows, {key["uid"] for key in keys}, {key["name"]: key["uid"] for key in keys}, now
+            )
+            if creates:
+                tx.run(BULK_CREATE_PRODUCTS, {"seller_uid": seller_uid, "rows": creates}).consume()
+            if updates:
+                tx.run(BULK_UPDATE_PRODUCTS, {"now": now, "rows": [
+                    {"uid": update["uid"], "quantity": update["changes"].get("quantity"),
+                     "changes": {k: v for k, v in update["changes"].items() if k != "quantity"}}
+                    for update in updates
+                ]}).consume()
+            if creates or updates:
+                tx.run(BUMP_CATALOG_VERSION).consume()
+            return results
+
+        return self._execute("write", work)
+
+    def iter_seller_products(self, seller_uid, batch_size=500):
+        # Images are left on the server; exports are for bookkeeping
+        query = """
+        MATCH (p:FishProduct)-[:SOLD_BY]->(s:Seller {uid: $seller_uid})
+        RETURN p {.*, image: null} AS product, s.uid AS seller_uid, s.name AS seller_name, s.location AS seller_location
+        """
+        for rows in self._stream(query, {"seller_uid": seller_uid}, batch_size):
+            products = [_product_record(row) for row in rows]
+            for product in products:
+                product.pop("image", None)
+            yield products
+
+    def list_products_near(self, latitude, longitude, radius_km, limit=50):
+        rows = self._read(PRODUCTS_NEAR, {
+            "origin": WGS84Point((longitude, latitude)),
+            "radius_m": radius_km * 1000,
+            "limit": limit,
+        })
+        products = []
+        for row in rows:
+            product = _product_record(row)
+            product["distance_km"] = row["distance_km"]
+            products.append(product)
+        return products
+
+    def get_products(self, uids):
+        rows = self._read("UNWIND $uids AS uid MATCH (p:FishProduct {uid: uid})" + PRODUCT_RETURN, {"uids": uids})
+        by_uid = {row["product"]["uid"]: _product_record(row) for row in rows}
+        return [by_uid[uid] for uid in uids if uid in by_uid]
+
+    def sync_product_sort_keys(self, product_uids):
+        return self._execute(
+            "write", lambda tx: tx.run(PRODUCT_SORT_KEYS_SYNC, {"uids": list(product_uids)}).single()["updated"],
+            catalog=True,
+        )
+
+    def adjust_product_quantity(self, uid, delta):
+        rows = self._write(
+            "MATCH (p:FishProduct {uid: $uid}) SET p.quantity = p.quantity + $delta, p.updated_at = $now"
+            + SYNC_AVAILABLE + " RETURN p.uid AS uid",
+            {"uid": uid, "delta": delta, "now": time.time()},
+            stock=True,
+        )
+        return bool(rows)
+
+    # --- orders -----------------------------------------------------------
+
+    def create_order(self, buyer_uid, product_uid, quantity, reserve_seconds):
+        now = time.time()
+        params = {
+            "uid": uuid.uuid4().hex,
+            "buyer_uid": buyer_uid,
+            "product_uid": product_uid,
+            "quantity": quantity,
+            "now": now,
+            "reserved_until": now + reserve_seconds,
+        }
+
+        def work(tx):
+            # The SET takes the product's write lock before reading the counters,
+            # so concurrent orders cannot oversell; a negative result rolls back.
+            row = tx.run("""
+            MATCH (b:Buyer {uid: $buyer_uid})
+            MATCH (p:FishProduct {uid: $product_uid})-[:SOLD_BY]->(s:Seller)
+            WITH b, p, s LIMIT 1
+            SET """ + RESERVE_STOCK + """
+            CREATE (o:Order {uid: $uid, quantity: $quantity, total_price: p.price * $quantity,
+                             status: 'pending', created_at: $now, updated_at: $now,
+                             reserved_until: $reserved_until, product_uid: p.uid, product_name: p.name})
+            CREATE (o)-[:PLACED_BY]->(b), (o)-[:FULFILLED_BY]->(s), (o)-[:CONTAINS]->(p)
+            RETURN p.quantity - p.reserved AS remaining
+            """, params).single()
+            if row is None or row["remaining"] < 0:
+                raise _InsufficientStock()
+            _apply_rollups(tx, [tx.run("MATCH (o:Order {uid: $uid})" + ROLLUP_SOURCE, params).single().data()], 1)
+            return [r.data() for r in tx.run("MATCH (o:Order {uid: $uid})" + ORDER_RETURN, params)]
+
+        try:
+            rows = self._execute("write", work, stock=True)
+        except _InsufficientStock:
+            return None
+        return _order_record(rows[0])
+
+    def get_order(self, uid):
+        rows = self._read("MATCH (o:Order {uid: $uid})" + ORDER_RETURN, {"uid": uid})
+        return _order_record(rows[0]) if rows else None
+
+    def list_orders(self, buyer_uid=None, seller_uid=None):
+        if buyer_uid:
+            match, params = "MATCH (o:Order)-[:PLACED_BY]->(:Buyer {uid: $uid})", {"uid": buyer_uid}
+        elif seller_uid:
+            match, params = "MATCH (o:Order)-[:FULFILLED_BY]->(:Seller {uid: $uid})", {"uid": seller_uid}
+        else:
+            match, params = "MATCH (o:Order)", {}
+        return [_order_record(row) for row in self._read(match + ORDER_RETURN, params)]
+
+    def transition_orders(self, uids, status, allowed_from, seller_uid=None):
+        params = {"uids": list(dict.fromkeys(uids)), "status": status, "now": time.time(), "seller_uid": seller_uid}
+
+        def work(tx):
+            # Lock every order before reading its status, so a racing sweep or
+            # update cannot slip in between the check and the write
+            sources = {r["uid"]: r.data() for r in tx.run("""
+            UNWIND $uids AS uid
+            MATCH (o:Order {uid: uid})
+            WHERE $seller_uid IS NULL OR EXISTS { (o)-[:FULFILLED_BY]->(:Seller {uid: $seller_uid}) }
+            SET o._lock = true
+            REMOVE o._lock
+            """ + ROLLUP_SOURCE, params)}
+            rejected = {uid: sources[uid]["status"] if uid in sources else None
+                        for uid in params["uids"] if uid not in sources or sources[uid]["status"] not in allowed_from}
+            accepted = [uid for uid in params["uids"] if uid not in rejected]
+            if not accepted:
+                return [], rejected
+
+            tx.run(TRANSITION_ORDERS, {**params, "uids": accepted}).consume()
+            _bump_stock_version(tx)
+            # Only moves into or out of an excluded status change the rollups
+            is_counted = counts_in_rollup(status)
+            moved = [sources[uid] for uid in accepted if counts_in_rollup(sources[uid]["status"]) != is_counted]
+            _apply_rollups(tx, moved, 1 if is_counted else -1)
+            rows = [r.data() for r in tx.run(
+                "UNWIND $uids AS uid MATCH (o:Order {uid: uid})" + ORDER_RETURN, {"uids": accepted}
+            )]
+            if status == "delivered":
+                _apply_co_purchases(tx, rows)
+            return rows, rejected
+
+        rows, rejected = self._execute("write", work)
+        return [_order_record(row) for row in rows], rejected
+
+    def delete_order(self, uid):
+        params = {"uid": uid, "now": time.time()}
+
+        def work(tx):
+            source = tx.run("MATCH (o:Order {uid: $uid}) SET o.updated_at = $now" + ROLLUP_SOURCE, params).single()
+            if source is None:
+                return False
+            # Give back held stock: a live reservation, or the stock a legacy
+            # pending order (placed before reservations) took up front
+            tx.run("""
+            MATCH (o:Order {uid: $uid})-[:CONTAINS]->(p:FishProduct)
+            WHERE o.reserved_until IS NOT NULL OR o.status = 'pending'
+            FOREACH (_ IN CASE WHEN o.reserved_until IS NOT NULL THEN [1] ELSE [] END | SET """ + RELEASE_STOCK + """)
+            FOREACH (_ IN CASE WHEN o.reserved_until IS NULL THEN [1] ELSE [] END | SET """ + RESTOCK + """)
+            """, params).consume()
+            tx.run("MATCH (o:Order {uid: $uid}) DETACH DELETE o", params).consume()
+            _bump_stock_version(tx)
+            if counts_in_rollup(source["status"]):
+                _apply_rollups(tx, [source.data()], -1)
+            return True
+
+        return self._execute("write", work)
+
+    def iter_seller_orders(self, seller_uid, batch_size=500):
+        # No ORDER BY: sorting would make the server buffer the whole history first
+        query = "MATCH (o:Order)-[:FULFILLED_BY]->(:Seller {uid: $seller_uid})" + ORDER_RETURN
+        for rows in self._stream(query, {"seller_uid": seller_uid}, batch_size):
+            yield [_order_record(row) for row in rows]
+
+    def release_expired_reservations(self, limit=500):
+        params = {"now": time.time(), "limit": limit}
+
+        def work(tx):
+            # SET before re-checking status takes the order's lock, so an
+            # order confirmed concurrently is never released as well
+            rows = [r.data() for r in tx.run("""
+            MATCH (o:Order) WHERE o.reserved_until < $now
+            WITH o LIMIT $limit
+            SET o.updated_at = $now
+            WITH o WHERE o.status = 'pending' AND o.reserved_until IS NOT NULL
+            OPTIONAL MATCH (o)-[:CONTAINS]->(p:FishProduct)
+            FOREACH (_ IN CASE WHEN p IS NULL THEN [] ELSE [1] END | SET """ + RELEASE_STOCK + """)
+            SET o.status = 'cancelled', o.reserved_until = null
+            RETURN o.uid AS uid, head([(o)-[:PLACED_BY]->(b:Buyer) | b.uid]) AS buyer_uid,
+                   head([(o)-[:FULFILLED_BY]->(s:Seller) | s.uid]) AS seller_uid,
+                   coalesce(p.uid, o.product_uid, '') AS product_uid,
+                   coalesce(p.name, o.product_name, '') AS product_name,
+                   o.quantity AS quantity, o.total_price AS total_price, o.created_at AS created_at
+            """, params)]
+            # Counted while pending, no longer counted once cancelled
+            _apply_rollups(tx, rows, -1)
+            if rows:
+                _bump_stock_version(tx)
+            return rows
+
+        rows = self._execute("write", work)
+        return [{"uid": row["uid"], "buyer_uid": row["buyer_uid"] or "", "fish_product_name": row["product_name"]}
+                for row in rows]
+
+    # --- seller analytics -------------------------------------------------
+
+    def ensure_schema(self):
+        """Create the rollup and job lease constraints and the query indexes (idempotent)"""
+        for statement in (ROLLUP_CONSTRAINT, ROLLUP_INDEX, RESERVATION_INDEX, SELLER_POINT_INDEX,
+                          *PRODUCT_SORT_INDEXES, *CLEANUP_INDEXES, NOTIFICATION_CREATED_INDEX,
+                          JOB_LEASE_CONSTRAINT, JOB_RUN_INDEX, CATALOG_VERSION_CONSTRAINT,
+                          RATE_LIMIT_CONSTRAINT, RATE_LIMIT_EXPIRY_INDEX):
+            self._execute("write", lambda tx, s=statement: tx.run(s).consume())
+
+    def list_seller_rollups(self, seller_uid, start_day, end_day):
+        # Grouping again folds any duplicate nodes left by a race before the constraint existed
+        return self._read("""
+        MATCH (r:SellerDailyRollup {seller_uid: $seller_uid})
+        WHERE r.day >= $start_day AND r.day <= $end_day
+        RETURN r.day AS day, r.product_uid AS product_uid, max(r.product_name) AS product_name,
+               sum(r.orders) AS orders, sum(r.units) AS units, sum(r.revenue) AS revenue
+        ORDER BY day
+        """, {"seller_uid": seller_uid, "start_day": start_day, "end_day": end_day})
+
+    def list_seller_uids(self, after=None, limit=100):
+        rows = self._read("""
+        MATCH (s:Seller)
+        WHERE $after IS NULL OR s.uid > $after
+        RETURN s.uid AS uid
+        ORDER BY s.uid
+        LIMIT $limit
+        """, {"after": after, "limit": limit})
+        return [row["uid"] for row in rows]
+
+    def rebuild_seller_rollups(self, seller_uids):
+        params = {"seller_uids": list(seller_uids), "excluded": list(ROLLUP_EXCLUDED_STATUSES)}
+
+        def work(tx):
+            tx.run("MATCH (r:SellerDailyRollup) WHERE r.seller_uid IN $seller_uids DELETE r", params).consume()
+            return tx.run(ROLLUP_REBUILD, params).single()["written"]
+
+        return self._execute("write", work)
+
+    # --- recommendations --------------------------------------------------
+
+    def _scored_products(self, query: str, params: Dict[str, Any]) -> List[Record]:
+        products = []
+        for row in self._read(query, params):
+            product = _product_record(row)
+            product["score"] = row["score"]
+            products.append(product)
+        return products
+
+    def list_related_products(self, uid, limit=20):
+        return self._scored_products(RELATED_PRODUCTS, {"uid": uid, "limit": limit})
+
+    def list_recommended_products(self, buyer_uid, limit=20, history=50, fanout=20):
+        return self._scored_products(RECOMMENDED_PRODUCTS, {
+            "uid": buyer_uid, "limit": limit, "history": history, "fanout": fanout,
+        })
+
+    def list_product_uids(self, after=None, limit=100):
+        rows = self._read("""
+        MATCH (p:FishProduct)
+        WHERE $after IS NULL OR p.uid > $after
+        RETURN p.uid AS uid
+        ORDER BY p.uid
+        LIMIT $limit
+        """, {"after": after, "limit": limit})
+        return [row["uid"] for row in rows]
+
+    def rebuild_co_purchases(self, product_uids):
+        return self._execute(
+            "write", lambda tx: tx.run(CO_PURCHASE_REBUILD, {"uids": list(product_uids)}).single()["written"]
+        )
+
+    # --- notifications ----------------------------------------------------
+
+    def create_notification(self, recipient_uid, recipient_type, type, message):
+        rows = self._write("""
+        CREATE (n:Notification {
+            uid: $uid,
+            recipient_uid: $recipient_uid,
+            recipient_type: $recipient_type,
+            type: $type,
+            message: $message,
+            read: false,
+            created_at: $created_at
+        })
+        RETURN """ + NOTIFICATION_FIELDS, {
+            "uid": str(uuid.uuid4()),
+            "recipient_uid": recipient_uid,
+            "recipient_type": recipient_type,
+            "type": type,
+            "message": message,
+            "created_at": datetime.utcnow().isoformat(),
+        })
+        return rows[0]
+
+    def list_notifications(self, recipient_uid, recipient_type):
+        return self._read("""
+        MATCH (n:Notification {recipient_uid: $recipient_uid, recipient_type: $recipient_type})
+        RETURN """ + NOTIFICATION_FIELDS + """
+        ORDER BY n.created_at DESC
+        """, {"recipient_uid": recipient_uid, "recipient_type": recipient_type})
+
+    def mark_notification_read(self, uid):
+        return bool(self._write("MATCH (n:Notification {uid: $uid}) SET n.read = true RETURN n.uid AS uid", {"uid": uid}))
+
+    def mark_all_notifications_read(self, recipient_uid, recipient_type):
+        rows = self._write("""
+        MATCH (n:Notification {recipient_uid: $recipient_uid, recipient_type: $recipient_type})
+        SET n.read = true
+        RETURN count(n) AS count
+        """, {"recipient_uid": recipient_uid, "recipient_type": recipient_type})
+        return rows[0]["count"]
+
+    def delete_notification(self, uid):
+        return self._delete_node("Notification", uid)
+
+    def expire_notifications(self, created_before, limit):
+        rows = self._write("""
+        MATCH (n:Notification)
+        WHERE n.created_at < $created_before AND n.read = true
+        WITH n ORDER BY n.created_at LIMIT $limit
+        DELETE n
+        RETURN count(*) AS expired
+        """, {"created_before": created_before, "limit": limit})
+        return rows[0]["expired"] if rows else 0
+
+    def badge_counts(self, user_uid, user_type):
+        rows = self._read(BADGE_COUNTS[user_type], {"uid": user_uid, "user_type": user_type})
+        return rows[0]
+
+    # --- messages ---------------------------------------------------------
+
+    def create_message(self, props):
+        props = {**props, "uid": str(uuid.uuid4()), "created_at": datetime.utcnow().isoformat()}
+        rows = self._write("CREATE (m:Message) SET m = $props RETURN " + MESSAGE_FIELDS, {"props": props})
+        return rows[0]
+
+    def list_messages_between(self, user1_uid, user2_uid):
+        return self._read("""
+        MATCH (m:Message)
+        WHERE (m.sender_uid = $user1_uid AND m.recipient_uid = $user2_uid)
+           OR (m.sender_uid = $user2_uid AND m.recipient_uid = $user1_uid)
+        RETURN """ + MESSAGE_FIELDS + """
+        ORDER BY m.created_at ASC
+        """, {"user1_uid": user1_uid, "user2_uid": user2_uid})
+
+    def list_conversations(self, user_uid):
+        # Counterpart names are joined here instead of one lookup per conversation
+        return self._read("""
+        MATCH (m:Message)
+        WHERE m.sender_uid = $user_uid OR m.recipient_uid = $user_uid
+        WITH m,
+             CASE WHEN m.sender_uid = $user_uid THEN m.recipient_uid ELSE m.sender_uid END AS other_uid,
+             CASE WHEN m.sender_uid = $user_uid THEN m.recipient_type ELSE m.sender_type END AS other_type
+        ORDER BY m.created_at DESC
+        WITH other_uid, other_type, collect(m)[0] AS last_message
+        OPTIONAL MATCH (b:Buyer {uid: other_uid}) WHERE other_type = 'buyer'
+        OPTIONAL MATCH (s:Seller {uid: other_uid}) WHERE other_type <> 'buyer'
+        RETURN other_uid, other_type, coalesce(b.name, s.name, 'Unknown') AS other_name,
+               last_message.message AS last_message_text, last_message.created_at AS last_message_time
+        """, {"user_uid": user_uid})
+
+    # --- reviews ----------------------------------------------------------
+
+    def review_exists_for_order(self, order_uid):
+        return bool(self._read("MATCH (r:Review {order_uid: $order_uid}) RETURN r.uid AS uid LIMIT 1", {"order_uid": order_uid}))
+
+    def create_review(self, props):
+        props = {**props, "uid": str(uuid.uuid4()), "created_at": datetime.utcnow().isoformat()}
+
+        def work(tx):
+            record = tx.run("CREATE (r:Review) SET r = $props RETURN " + REVIEW_FIELDS, {"props": props}).single().data()
+            tx.run("""
+            MATCH (s:Seller {uid: $seller_uid})
+            OPTIONAL MATCH (r:Review {seller_uid: $seller_uid})
+            WITH s, avg(r.rating) AS avg_rating, count(r) AS review_count
+            SET s.average_rating = avg_rating,
+                s.review_count = review_count
+            WITH s
+            // The listings' rating sort key; stock_version moves their ETags
+            MATCH (p:FishProduct)-[:SOLD_BY]->(s)
+            SET p.seller_rating = coalesce(s.average_rating, 0.0),
+                p.stock_version = coalesce(p.stock_version, 0) + 1
+            """, {"seller_uid": props["seller_uid"]}).consume()
+            return record
+
+        return self._execute("write", work, catalog=True)
+
+    def list_seller_reviews(self, seller_uid):
+        return self._read("""
+        MATCH (r:Review {seller_uid: $seller_uid})
+        RETURN """ + REVIEW_FIELDS + """
+        ORDER BY r.created_at DESC
+        """, {"seller_uid": seller_uid})
+
+    def get_seller_rating_summary(self, seller_uid):
+        rows = self._read("""
+        MATCH (s:Seller {uid: $seller_uid})
+        RETURN s.average_rating AS average_rating, s.review_count AS review_count
+        """, {"seller_uid": seller_uid})
+        return rows[0] if rows else None
+
+    def reconcile_seller_ratings(self, seller_uids):
+        rows = self._write(RECONCILE_RATINGS, {"uids": list(seller_uids)}, catalog=True)
+        return rows[0]["reconciled"] if rows else 0
+
+    # --- deletion cleanup -------------------------------------------------
+
+    def list_deleted(self):
+        return [(row["kind"], row["uid"]) for row in self._read(LIST_DELETED)]
+
+    def cleanup_batch(self, kind, uid, step, limit):
+        rows = self._write(CLEANUP_QUERIES[(kind, step)], {"uid": uid, "limit": limit})
+        return rows[0]["processed"] if rows else 0
+
+    # --- scheduled jobs ---------------------------------------------------
+
+    def acquire_job_lease(self, name, owner, slot, lease_seconds):
+        return bool(self._write(ACQUIRE_JOB_LEASE, {
+            "name": name, "owner": owner, "slot": slot, "lease_seconds": lease_seconds, "now": time.time(),
+        }))
+
+    def release_job_lease(self, name, owner):
+        self._write(
+            "MATCH (j:JobLease {name: $name, owner: $owner}) SET j.owner = null, j.lease_until = null",
+            {"name": name, "owner": owner},
+        )
+
+    def list_job_leases(self):
+        return self._read("""
+        MATCH (j:JobLease)
+        RETURN j.name AS name, j.owner AS owner, j.lease_until AS lease_until, j.last_slot AS last_slot
+        ORDER BY j.name
+        """)
+
+    def record_job_run(self, run, keep):
+        self._write(RECORD_JOB_RUN, {"run": run, "keep": keep})
+
+    def list_job_runs(self, job, limit):
+        rows = self._read("""
+        MATCH (r:JobRun)
+        WHERE $job IS NULL OR r.job = $job
+        RETURN r {.*} AS run
+        ORDER BY r.started_at DESC
+        LIMIT $limit
+        """, {"job": job, "limit": limit})
+        return [row["run"] for row in rows]
+
+    # --- rate limits ------------------------------------------------------
+
+    def rate_limit_hit(self, key, limit, window, now):
+        index = int(now // window)
+        elapsed = now - index * window
+        row = self._write(RATE_LIMIT_HIT, {
+            "key": key, "index": index, "now": now, "limit": limit,
+            "weight": 1 - elapsed / window,
+            # After two windows the counters carry no weight
+            "expires_at": (index + 2) * window,
+        })[0]
+        if row["allowed"]:
+            return 0.0
+        return retry_after(row["current"], row["previous"], limit, window, elapsed)
+
+    def rate_limit_reset(self, key):
+        self._write("MATCH (r:RateLimit {key: $key}) DELETE r", {"key": key})
+
+    def expire_rate_limits(self, now, limit):
+        rows = self._write("""
+        MATCH (r:RateLimit) WHERE r.expires_at < $now
+        WITH r LIMIT $limit
+        DELETE r
+        RETURN count(*) AS expired
+        """, {"now": now, "limit": limit})
+        return rows[0]["expired"]
+
+    # --- search -----------------------------------------------------------
+
+    def search(self, search_type, query, limit=10):
+        cypher = SEARCH_QUERIES.get(search_type, SEARCH_QUERIES["buyers"])
+        return self._read(cypher, {"query": query, "limit": limit})
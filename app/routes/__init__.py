@@ -5,6 +5,10 @@ from .order_routes import router as order_router
 from .notification_routes import router as notification_router
 from .message_routes import router as message_router
 from .review_routes import router as review_router
+from .admin_routes import router as admin_router
+from .metrics_routes import router as metrics_router
+from .auth_routes import router as auth_router
+from .me_routes import router as me_router
 
 __all__ = [
     "seller_router",
@@ -13,5 +17,9 @@ __all__ = [
     "order_router",
     "notification_router",
     "message_router",
-    "review_router"
+    "review_router",
+    "admin_router",
+    "metrics_router",
+    "auth_router",
+    "me_router"
 ]
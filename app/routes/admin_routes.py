@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from ..utils.cleanup import cleanup_worker
+from ..utils.dependencies import require_admin
+from ..utils.jobs import job_runner
+from ..utils.query_stats import query_stats_registry
+from ..utils.slow_queries import slow_query_log
+
+# Every endpoint needs ADMIN_TOKEN as a Bearer token
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/query-stats")
+def get_query_stats():
+    """
+    Aggregated Cypher statistics per route: statement count, DB time,
+    rows returned, response bytes and N+1 warnings
+    """
+    return query_stats_registry.snapshot()
+
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    limit: int = Query(10, ge=1, le=100, description="Number of query shapes to return"),
+    order_by: str = Query("max", pattern="^(max|total)$", description="Rank by max or total time")
+):
+    """
+    Top-N slowest Cypher query shapes with their captured plan summaries
+    """
+    return {
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "profiling": slow_query_log.profiling,
+        "shapes": slow_query_log.top(limit, order_by)
+    }
+
+
+@router.get("/slow-queries/recent")
+def get_recent_slow_queries(limit: int = Query(50, ge=1, le=500)):
+    """
+    Most recent slow statements (parameters redacted)
+    """
+    return slow_query_log.recent(limit)
+
+
+@router.post("/slow-queries/profile")
+def set_slow_query_profiling(enabled: bool = True, reset_plans: bool = False):
+    """
+    Enable or disable PROFILE/EXPLAIN capture for the next slow occurrence of each query shape
+    """
+    slow_query_log.set_profiling(enabled, reset_plans)
+    return {"success": True, "profiling": enabled}
+
+
+@router.get("/cleanup-jobs")
+def get_cleanup_jobs(
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(queued|running|done|failed)$"),
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """
+    Cleanup jobs of deleted sellers, buyers and products, most recent first
+    """
+    return cleanup_worker.list(status_filter, limit)
+
+
+@router.get("/cleanup-jobs/{job_id}")
+def get_cleanup_job(job_id: str):
+    """
+    Status of one cleanup job, with the dependents processed per step
+    """
+    job = cleanup_worker.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cleanup job not found")
+    return job
+
+
+@router.get("/jobs")
+def get_scheduled_jobs():
+    """
+    Scheduled maintenance jobs with their cron schedule, next run in this
+    process, last run and current lease
+    """
+    return job_runner.jobs()
+
+
+@router.post("/jobs/{name}/run", status_code=status.HTTP_202_ACCEPTED)
+def run_scheduled_job(name: str):
+    """
+    Start a scheduled job now, outside its schedule
+    """
+    try:
+        started = job_runner.trigger(name)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if not started:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job is running, leased elsewhere or disabled")
+    return {"success": True, "job": name}
+
+
+@router.get("/job-runs")
+def get_job_runs(
+    job: Optional[str] = Query(None, description="Only runs of this job"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Recent runs of the scheduled jobs on every replica, newest first, with
+    duration and rows processed
+    """
+    return job_runner.runs(job, limit)
@@ -1,21 +1,22 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, status
 from ..schemas import Token, BuyerLogin, SellerLogin
 from ..controllers import AuthController
+from ..utils.rate_limit import client_ip
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/buyer/login", response_model=Token, status_code=status.HTTP_200_OK)
-def login_buyer(login_data: BuyerLogin):
+def login_buyer(login_data: BuyerLogin, request: Request):
     """
     Login as a buyer and receive JWT access token
     """
-    return AuthController.login_buyer(login_data)
+    return AuthController.login_buyer(login_data, client_ip(request))
 
 
 @router.post("/seller/login", response_model=Token, status_code=status.HTTP_200_OK)
-def login_seller(login_data: SellerLogin):
+def login_seller(login_data: SellerLogin, request: Request):
     """
     Login as a seller and receive JWT access token
     """
-    return AuthController.login_seller(login_data)
+    return AuthController.login_seller(login_data, client_ip(request))
@@ -1,34 +1,26 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, Request, Response, status
 from typing import List
-from ..schemas import BuyerCreate, BuyerUpdate, BuyerResponse, BuyerLogin
-from ..controllers import BuyerController
+from ..schemas import BuyerCreate, BuyerUpdate, BuyerResponse, BuyerLogin, RecommendedProductResponse
+from ..controllers import BuyerController, AuthController
+from ..utils.conditional import PROFILE_CACHE_CONTROL, conditional_response
+from ..utils.rate_limit import client_ip
+from ..utils.responses import model_response
 
 router = APIRouter(prefix="/buyers", tags=["Buyers"])
 
 
 @router.post("/login", status_code=status.HTTP_200_OK)
-def login_buyer(login_data: BuyerLogin):
+def login_buyer(login_data: BuyerLogin, request: Request):
     """
     Login as a buyer - returns buyer info with uid and name
     """
-    from ..models import Buyer
-    from ..utils.security import verify_password
-    from ..utils.dependencies import _retry_get_or_none
-    from fastapi import HTTPException
-    
-    buyer = _retry_get_or_none(Buyer, email=login_data.email)
-    
-    if not buyer or not verify_password(login_data.password, buyer.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password"
-        )
+    buyer = AuthController.authenticate_buyer(login_data, client_ip(request))
     
     return {
-        "uid": buyer.uid,
-        "name": buyer.name,
-        "email": buyer.email,
-        "contact_number": buyer.contact_number
+        "uid": buyer["uid"],
+        "name": buyer["name"],
+        "email": buyer["email"],
+        "contact_number": buyer["contact_number"]
     }
 
 
@@ -45,17 +37,29 @@ def get_all_buyers():
     """
     Get all buyers
     """
-    return BuyerController.get_all_buyers()
+    return model_response(BuyerController.get_all_buyers(), BuyerResponse)
 
 
 
 
 @router.get("/{buyer_uid}", response_model=BuyerResponse)
-def get_buyer(buyer_uid: str):
+def get_buyer(buyer_uid: str, request: Request, response: Response):
+    """
+    Get buyer by UID (supports If-None-Match)
+    """
+    etag = BuyerController.buyer_etag(buyer_uid)
+    return conditional_response(
+        request, response, etag, PROFILE_CACHE_CONTROL, lambda: BuyerController.get_buyer(buyer_uid)
+    )
+
+
+@router.get("/{buyer_uid}/recommended", response_model=List[RecommendedProductResponse])
+def get_recommended_products(buyer_uid: str, limit: int = Query(10, ge=1, le=50)):
     """
-    Get buyer by UID
+    Products bought by buyers with similar orders, excluding ones this
+    buyer has already received (at most RECOMMENDATION_TOP_K)
     """
-    return BuyerController.get_buyer(buyer_uid)
+    return model_response(BuyerController.get_recommended_products(buyer_uid, limit), RecommendedProductResponse)
 
 
 @router.patch("/{buyer_uid}", response_model=BuyerResponse)
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Query, Request, Response, status
 from typing import List, Optional
-from ..schemas import FishProductCreate, FishProductUpdate, FishProductResponse
+from ..schemas import (
+    FishProductCreate, FishProductUpdate, FishProductResponse, NearbyProductResponse, RecommendedProductResponse,
+    ProductFacetsResponse
+)
 from ..controllers import FishProductController
+from ..utils.conditional import CATALOG_CACHE_CONTROL, conditional_response
+from ..utils.responses import model_response
 
 router = APIRouter(prefix="/products", tags=["Fish Products"])
 
@@ -16,11 +21,19 @@ def create_product(product_data: FishProductCreate):
 
 @router.get("/", response_model=List[FishProductResponse])
 def get_all_products(
+    request: Request,
+    response: Response,
     name: Optional[str] = Query(None, description="Search by product name"),
     type: Optional[str] = Query(None, description="Filter by fish type"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
-    seller_uid: Optional[str] = Query(None, description="Filter by seller UID")
+    seller_uid: Optional[str] = Query(None, description="Filter by seller UID"),
+    sort: Optional[str] = Query(
+        None, pattern="^(price|-price|newest|oldest|rating|stock)$",
+        description="Sort order (price, -price, newest, oldest, rating, stock); enables pagination"
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size (default 50 when paginating)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page")
 ):
     """
     Get all fish products with optional filters:
@@ -28,22 +41,120 @@ def get_all_products(
     - Filter by type
     - Filter by price range
     - Filter by seller
+
+    With sort, limit or cursor the result is one sorted page (newest first
+    by default); the X-Next-Cursor response header fetches the next page
+    and is absent on the last one. Without them all products are returned.
+    """
+    if sort or limit or cursor:
+        sort, limit = sort or "newest", limit or 50
+        etag = FishProductController.catalog_etag(name, type, min_price, max_price, seller_uid, sort, limit, cursor)
+
+        def build_page():
+            products, next_cursor = FishProductController.get_product_page(
+                sort, limit, cursor,
+                name=name,
+                type=type,
+                min_price=min_price,
+                max_price=max_price,
+                seller_uid=seller_uid
+            )
+            content = model_response(products, FishProductResponse)
+            if next_cursor:
+                (content if isinstance(content, Response) else response).headers["X-Next-Cursor"] = next_cursor
+            return content
+
+        return conditional_response(request, response, etag, CATALOG_CACHE_CONTROL, build_page)
+
+    etag = FishProductController.catalog_etag(name, type, min_price, max_price, seller_uid)
+    return conditional_response(request, response, etag, CATALOG_CACHE_CONTROL, lambda: model_response(
+        FishProductController.get_all_products(
+            name=name,
+            type=type,
+            min_price=min_price,
+            max_price=max_price,
+            seller_uid=seller_uid
+        ),
+        FishProductResponse
+    ))
+
+
+@router.get("/facets", response_model=ProductFacetsResponse)
+def get_product_facets(
+    request: Request,
+    response: Response,
+    name: Optional[str] = Query(None, description="Search by product name"),
+    type: Optional[str] = Query(None, description="Filter by fish type"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
+    seller_uid: Optional[str] = Query(None, description="Filter by seller UID")
+):
     """
-    return FishProductController.get_all_products(
-        name=name,
-        type=type,
-        min_price=min_price,
-        max_price=max_price,
-        seller_uid=seller_uid
-    )
+    Count the products GET /products would return, per fish type, price
+    bucket and seller location, for the same filters. Type and price counts
+    ignore their own filter, so they show what picking another value would
+    match; total and location apply every filter.
+    """
+    etag = FishProductController.catalog_etag("facets", name, type, min_price, max_price, seller_uid)
+    return conditional_response(request, response, etag, CATALOG_CACHE_CONTROL, lambda: model_response(
+        FishProductController.get_product_facets(
+            etag,
+            name=name,
+            type=type,
+            min_price=min_price,
+            max_price=max_price,
+            seller_uid=seller_uid
+        ),
+        ProductFacetsResponse
+    ))
+
+
+@router.get("/nearby", response_model=List[NearbyProductResponse])
+def get_nearby_products(
+    request: Request,
+    response: Response,
+    lat: float = Query(..., ge=-90, le=90, description="Buyer latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="Buyer longitude"),
+    radius_km: float = Query(25, gt=0, le=500, description="Search radius in km"),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    Get in-stock products from sellers within radius_km, nearest first
+    (freshest listing first among the same seller). Sellers are located
+    from their geocoded location.
+    """
+    etag = FishProductController.catalog_etag("nearby", lat, lon, radius_km, limit)
+    return conditional_response(request, response, etag, CATALOG_CACHE_CONTROL, lambda: model_response(
+        FishProductController.get_nearby_products(lat, lon, radius_km, limit), NearbyProductResponse
+    ))
+
+
+@router.get("/seller/{seller_uid}/export")
+def export_seller_products(seller_uid: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """
+    Download a seller's products (without images) as NDJSON or CSV
+    """
+    return FishProductController.export_seller_products(seller_uid, format)
 
 
 @router.get("/{product_uid}", response_model=FishProductResponse)
-def get_product(product_uid: str):
+def get_product(product_uid: str, request: Request, response: Response):
+    """
+    Get fish product by UID (supports If-None-Match)
+    """
+    etag = FishProductController.product_etag(product_uid)
+    return conditional_response(request, response, etag, CATALOG_CACHE_CONTROL, lambda: model_response(
+        FishProductController.get_product(product_uid), FishProductResponse
+    ))
+
+
+@router.get("/{product_uid}/related", response_model=List[RecommendedProductResponse])
+def get_related_products(product_uid: str, limit: int = Query(10, ge=1, le=50)):
     """
-    Get fish product by UID
+    "Buyers also ordered": in-stock products most often received by the
+    buyers who received this one (at most RECOMMENDATION_TOP_K)
     """
-    return FishProductController.get_product(product_uid)
+    return model_response(FishProductController.get_related_products(product_uid, limit), RecommendedProductResponse)
 
 
 @router.patch("/{product_uid}", response_model=FishProductResponse)
@@ -0,0 +1,30 @@
+from typing import Tuple
+from fastapi import APIRouter, Depends, Response
+from pydantic import BaseModel
+from ..config import settings
+from ..utils.badges import badge_counts
+from ..utils.dependencies import get_current_user
+
+router = APIRouter(prefix="/me", tags=["Me"])
+
+
+class SummaryResponse(BaseModel):
+    user_uid: str
+    user_type: str
+    unread_notifications: int
+    unread_messages: int
+    pending_orders: int
+
+
+@router.get("/summary", response_model=SummaryResponse)
+def get_summary(response: Response, user: Tuple[str, str] = Depends(get_current_user)):
+    """
+    Badge counts for the logged-in buyer or seller (Bearer token from /auth):
+    unread notifications, unread messages and pending orders, in one request.
+    Counts may be up to BADGE_CACHE_TTL_SECONDS old.
+    """
+    user_type, uid = user
+    if settings.badge_cache_ttl_seconds > 0:
+        # Per user, so only the client may reuse it
+        response.headers["Cache-Control"] = f"private, max-age={int(settings.badge_cache_ttl_seconds)}"
+    return {"user_uid": uid, "user_type": user_type, **badge_counts(user_type, uid)}
@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+from ..utils.lifecycle import lifecycle
+from ..utils.metrics import metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """
+    Liveness probe: the process is up and its event loop answers
+    """
+    return {"status": "ok", "state": lifecycle.state}
+
+
+@router.get("/readyz", include_in_schema=False)
+def readyz():
+    """
+    Readiness probe: 200 once startup finished and Neo4j answers, 503 while
+    starting, after shutdown or when the database is unreachable
+    """
+    readiness = lifecycle.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
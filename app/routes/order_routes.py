@@ -1,7 +1,8 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, status
 from typing import List
-from ..schemas import OrderCreate, OrderUpdate, OrderResponse
+from ..schemas import OrderCreate, OrderUpdate, OrderResponse, OrderBatchStatusUpdate, OrderBatchStatusResponse
 from ..controllers import OrderController
+from ..utils.responses import model_response
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -19,7 +20,7 @@ def get_all_orders():
     """
     Get all orders (admin view)
     """
-    return OrderController.get_all_orders()
+    return model_response(OrderController.get_all_orders(), OrderResponse)
 
 
 @router.get("/buyer/{buyer_uid}", response_model=List[OrderResponse])
@@ -27,7 +28,7 @@ def get_buyer_orders(buyer_uid: str):
     """
     Get all orders for a buyer
     """
-    return OrderController.get_buyer_orders(buyer_uid)
+    return model_response(OrderController.get_buyer_orders(buyer_uid), OrderResponse)
 
 
 @router.get("/seller/{seller_uid}", response_model=List[OrderResponse])
@@ -35,7 +36,26 @@ def get_seller_orders(seller_uid: str):
     """
     Get all orders for a seller
     """
-    return OrderController.get_seller_orders(seller_uid)
+    return model_response(OrderController.get_seller_orders(seller_uid), OrderResponse)
+
+
+@router.get("/seller/{seller_uid}/export")
+def export_seller_orders(seller_uid: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """
+    Download a seller's full order history as NDJSON or CSV.
+    Rows are streamed as they are read, in no particular order.
+    """
+    return OrderController.export_seller_orders(seller_uid, format)
+
+
+@router.patch("/status/batch", response_model=OrderBatchStatusResponse)
+def update_order_statuses(batch: OrderBatchStatusUpdate):
+    """
+    Move many of a seller's orders to one status in a single transaction.
+    Orders that cannot make the transition (or are not the seller's) are
+    skipped and listed in `failed`; each buyer gets one notification.
+    """
+    return OrderController.update_order_statuses(batch)
 
 
 @router.get("/{order_uid}", response_model=OrderResponse)
@@ -49,9 +69,10 @@ def get_order(order_uid: str):
 @router.patch("/{order_uid}", response_model=OrderResponse)
 def update_order_status(order_uid: str, order_data: OrderUpdate):
     """
-    Update order status
+    Update order status. Returns 409 when the order cannot move
+    from its current status to the new one.
     
-    Available statuses:
+    Statuses, in order (cancellation is allowed until shipped):
     - pending
     - confirmed
     - processing
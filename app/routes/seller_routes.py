@@ -1,34 +1,27 @@
-from fastapi import APIRouter, status
-from typing import List
-from ..schemas import SellerCreate, SellerUpdate, SellerResponse, SellerLogin
-from ..controllers import SellerController
+from datetime import date
+from fastapi import APIRouter, Query, Request, Response, status
+from typing import List, Optional
+from ..schemas import SellerCreate, SellerUpdate, SellerResponse, SellerLogin, SellerAnalyticsResponse, BulkProductReport
+from ..controllers import SellerController, AuthController, FishProductController
+from ..utils.conditional import PROFILE_CACHE_CONTROL, conditional_response
+from ..utils.rate_limit import client_ip
+from ..utils.responses import model_response
 
 router = APIRouter(prefix="/sellers", tags=["Sellers"])
 
 
 @router.post("/login", status_code=status.HTTP_200_OK)
-def login_seller(login_data: SellerLogin):
+def login_seller(login_data: SellerLogin, request: Request):
     """
     Login as a seller - returns seller info with uid and name
     """
-    from ..models import Seller
-    from ..utils.security import verify_password
-    from ..utils.dependencies import _retry_get_or_none
-    from fastapi import HTTPException
-    
-    seller = _retry_get_or_none(Seller, email=login_data.email)
-    
-    if not seller or not verify_password(login_data.password, seller.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password"
-        )
+    seller = AuthController.authenticate_seller(login_data, client_ip(request))
     
     return {
-        "uid": seller.uid,
-        "name": seller.name,
-        "email": seller.email,
-        "contact_number": seller.contact_number
+        "uid": seller["uid"],
+        "name": seller["name"],
+        "email": seller["email"],
+        "contact_number": seller["contact_number"]
     }
 
 
@@ -45,17 +38,45 @@ def get_all_sellers():
     """
     Get all sellers
     """
-    return SellerController.get_all_sellers()
+    return model_response(SellerController.get_all_sellers(), SellerResponse)
 
 
 
 
 @router.get("/{seller_uid}", response_model=SellerResponse)
-def get_seller(seller_uid: str):
+def get_seller(seller_uid: str, request: Request, response: Response):
+    """
+    Get seller by UID (supports If-None-Match)
+    """
+    etag = SellerController.seller_etag(seller_uid)
+    return conditional_response(
+        request, response, etag, PROFILE_CACHE_CONTROL, lambda: SellerController.get_seller(seller_uid)
+    )
+
+
+@router.get("/{seller_uid}/analytics", response_model=SellerAnalyticsResponse)
+def get_seller_analytics(
+    seller_uid: str,
+    start: Optional[date] = Query(None, description="First day (UTC), defaults to 30 days before end"),
+    end: Optional[date] = Query(None, description="Last day (UTC), defaults to today")
+):
+    """
+    Revenue, units sold and order counts by day and by product (cancelled orders excluded)
+    """
+    return SellerController.get_seller_analytics(seller_uid, start, end)
+
+
+@router.post("/{seller_uid}/products/bulk", response_model=BulkProductReport)
+async def bulk_upsert_products(seller_uid: str, request: Request):
     """
-    Get seller by UID
+    Create or update many products at once. Send the rows as text/csv
+    (header: uid,name,type,price,quantity,description),
+    application/x-ndjson or a JSON array. A row updates the product with
+    its uid, or else the seller's product with the same name; otherwise it
+    creates one (name, type, price and quantity required). Blank fields
+    are left unchanged. Returns a result per row.
     """
-    return SellerController.get_seller(seller_uid)
+    return await FishProductController.bulk_upsert_products(seller_uid, request)
 
 
 @router.patch("/{seller_uid}", response_model=SellerResponse)
@@ -1,13 +1,21 @@
-from .seller import SellerCreate, SellerUpdate, SellerResponse, SellerLogin
+from .seller import SellerCreate, SellerUpdate, SellerResponse, SellerLogin, SellerAnalyticsResponse
 from .buyer import BuyerCreate, BuyerUpdate, BuyerResponse, BuyerLogin
-from .fish_product import FishProductCreate, FishProductUpdate, FishProductResponse
-from .order import OrderCreate, OrderUpdate, OrderResponse
+from .fish_product import (
+    FishProductCreate, FishProductUpdate, FishProductResponse, NearbyProductResponse, RecommendedProductResponse,
+    FacetCount, PriceFacetCount, ProductFacetsResponse, BulkProductRow, BulkProductResult, BulkProductReport
+)
+from .order import (
+    OrderCreate, OrderUpdate, OrderResponse, OrderBatchStatusUpdate, OrderStatusFailure, OrderBatchStatusResponse
+)
 from .auth import Token, TokenData
 
 __all__ = [
-    "SellerCreate", "SellerUpdate", "SellerResponse", "SellerLogin",
+    "SellerCreate", "SellerUpdate", "SellerResponse", "SellerLogin", "SellerAnalyticsResponse",
     "BuyerCreate", "BuyerUpdate", "BuyerResponse", "BuyerLogin",
-    "FishProductCreate", "FishProductUpdate", "FishProductResponse",
+    "FishProductCreate", "FishProductUpdate", "FishProductResponse", "NearbyProductResponse",
+    "RecommendedProductResponse", "FacetCount", "PriceFacetCount", "ProductFacetsResponse",
+    "BulkProductRow", "BulkProductResult", "BulkProductReport",
     "OrderCreate", "OrderUpdate", "OrderResponse",
+    "OrderBatchStatusUpdate", "OrderStatusFailure", "OrderBatchStatusResponse",
     "Token", "TokenData"
 ]
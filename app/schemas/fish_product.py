@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -33,8 +33,66 @@ class FishProductResponse(FishProductBase):
     seller_uid: Optional[str] = None
     seller_name: Optional[str] = None
     seller_location: Optional[str] = None
+    # Seller's average review rating, 0 when unrated
+    seller_rating: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+
+class NearbyProductResponse(FishProductResponse):
+    distance_km: float
+
+
+class BulkProductRow(BaseModel):
+    # Existing product to update; without it the seller's product with the same name is updated, or one is created
+    uid: Optional[str] = None
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    type: Optional[str] = Field(None, min_length=1, max_length=50)
+    price: Optional[float] = Field(None, gt=0)
+    quantity: Optional[int] = Field(None, ge=0)
+    description: Optional[str] = Field(None, max_length=500)
+
+
+class BulkProductResult(BaseModel):
+    row: int
+    # created, updated or error
+    status: str
+    uid: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class BulkProductReport(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    # True when rows past BULK_IMPORT_MAX_ROWS were not read
+    truncated: bool = False
+    results: List[BulkProductResult]
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class PriceFacetCount(BaseModel):
+    min_price: float
+    # None for the open-ended top bucket
+    max_price: Optional[float] = None
+    count: int
+
+
+class ProductFacetsResponse(BaseModel):
+    # Listings matching every filter
+    total: int
+    type: List[FacetCount]
+    price: List[PriceFacetCount]
+    location: List[FacetCount]
+
+
+class RecommendedProductResponse(FishProductResponse):
+    # Buyers who received both products (summed over the buyer's history for /recommended)
+    score: int
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -19,6 +19,12 @@ class OrderUpdate(BaseModel):
     status: str = Field(..., pattern="^(pending|confirmed|processing|shipped|delivered|cancelled)$")
 
 
+class OrderBatchStatusUpdate(BaseModel):
+    seller_uid: str
+    order_uids: List[str] = Field(..., min_length=1, max_length=200)
+    status: str = Field(..., pattern="^(pending|confirmed|processing|shipped|delivered|cancelled)$")
+
+
 class OrderResponse(BaseModel):
     uid: str
     buyer_uid: str
@@ -32,8 +38,20 @@ class OrderResponse(BaseModel):
     quantity: int
     total_price: float
     status: str
+    reserved_until: Optional[datetime] = None  # set while a pending order holds stock
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class OrderStatusFailure(BaseModel):
+    uid: str
+    error: str
+
+
+class OrderBatchStatusResponse(BaseModel):
+    status: str
+    updated: List[OrderResponse]
+    failed: List[OrderStatusFailure]
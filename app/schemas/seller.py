@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 
 
 class SellerBase(BaseModel):
@@ -8,6 +8,9 @@ class SellerBase(BaseModel):
     email: EmailStr
     contact_number: str = Field(..., min_length=10, max_length=20)
     location: Optional[str] = None
+    # Geocoded from location unless given (e.g. from the phone's GPS)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     profile_picture: Optional[str] = None
 
 
@@ -20,6 +23,8 @@ class SellerUpdate(BaseModel):
     email: Optional[EmailStr] = None
     contact_number: Optional[str] = Field(None, min_length=10, max_length=20)
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     password: Optional[str] = Field(None, min_length=6, max_length=72)
     profile_picture: Optional[str] = None
 
@@ -36,3 +41,27 @@ class SellerResponse(SellerBase):
 class SellerLogin(BaseModel):
     email: EmailStr
     password: str
+
+
+class SalesTotals(BaseModel):
+    orders: int
+    units: int
+    revenue: float
+
+
+class DailySales(SalesTotals):
+    day: date
+
+
+class ProductSales(SalesTotals):
+    product_uid: str
+    product_name: str
+
+
+class SellerAnalyticsResponse(BaseModel):
+    seller_uid: str
+    start: date
+    end: date
+    totals: SalesTotals
+    by_day: List[DailySales]
+    by_product: List[ProductSales]
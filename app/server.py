@@ -0,0 +1,63 @@
+"""
+Production server profile: gunicorn managing uvicorn worker processes.
+
+    gunicorn app.main:app        # reads gunicorn.conf.py from the repo root
+    python -m app.server         # the same, extra arguments go to gunicorn
+
+A Python process serves one core, so the profile runs WEB_CONCURRENCY
+workers (one per CPU core by default). Each worker imports the app after the
+fork and runs its own lifespan, so the Neo4j driver, caches and background
+threads are per process and nothing is shared across the fork. Sync routes
+run on THREADPOOL_SIZE threads per worker. The password hashing pool is split
+between the workers instead of each taking every core.
+"""
+import os
+import sys
+from typing import Optional
+from uvicorn_worker import UvicornWorker as BaseUvicornWorker
+from .config import settings
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """uvicorn worker that gives in-flight requests SHUTDOWN_DRAIN_SECONDS on SIGTERM"""
+
+    CONFIG_KWARGS = {**BaseUvicornWorker.CONFIG_KWARGS,
+                     "timeout_graceful_shutdown": int(settings.shutdown_drain_seconds)}
+
+
+def server_profile(cpu_count: Optional[int] = None) -> dict:
+    """gunicorn settings derived from the app settings and the core count"""
+    cpus = cpu_count or os.cpu_count() or 1
+    workers = settings.web_concurrency or cpus
+    hash_workers = settings.password_hash_workers
+    if hash_workers is None:
+        hash_workers = max(1, cpus // workers)
+    return {
+        "bind": f"0.0.0.0:{os.environ.get('PORT', '8000')}",
+        "workers": workers,
+        "worker_class": "app.server.UvicornWorker",
+        "keepalive": settings.server_keepalive_seconds,
+        "max_requests": settings.server_max_requests,
+        "max_requests_jitter": settings.server_max_requests // 10,
+        "timeout": settings.server_timeout_seconds,
+        # In-flight requests get SHUTDOWN_DRAIN_SECONDS (see UvicornWorker),
+        # then the lifespan shutdown has a few seconds before SIGKILL
+        "graceful_timeout": int(settings.shutdown_drain_seconds) + 5,
+        # Applied in post_fork: settings were already built in the master
+        # when gunicorn.conf.py imported this module, so an environment
+        # variable set by gunicorn would never reach them
+        "password_hash_workers": hash_workers,
+    }
+
+
+def main():
+    from gunicorn.app.wsgiapp import run
+
+    sys.argv = ["gunicorn", "--config", CONFIG_PATH, *sys.argv[1:], "app.main:app"]
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,30 @@
-from .security import (
-    verify_password,
-    get_password_hash,
-    create_access_token,
-    decode_access_token
-)
-from .dependencies import get_current_buyer, get_current_seller
+# Exported lazily (PEP 562): importing any app.utils submodule runs this file,
+# and the auth helpers pull in jose and the repositories.
+_EXPORTS = {
+    "verify_password": ".security",
+    "verify_and_update_password": ".security",
+    "get_password_hash": ".security",
+    "create_access_token": ".security",
+    "decode_access_token": ".security",
+    "get_current_buyer": ".dependencies",
+    "get_current_seller": ".dependencies",
+    "get_current_user": ".dependencies",
+}
 
 __all__ = [
     "verify_password",
+    "verify_and_update_password",
     "get_password_hash",
     "create_access_token",
     "decode_access_token",
     "get_current_buyer",
-    "get_current_seller"
+    "get_current_seller",
+    "get_current_user"
 ]
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,29 @@
+"""
+Badge counts behind GET /me/summary.
+
+The app renders three badges on every screen: unread notifications, unread
+messages and pending orders. Rather than listing notifications, conversations
+and orders to count them, Repository.badge_counts returns all three from one
+aggregated query (the notification recipient index and the user's order
+relationships, nothing is loaded). The result is cached per user for
+BADGE_CACHE_TTL_SECONDS, so screens rendered in quick succession cost a dict
+lookup; a badge can lag a new notification or order by at most that long.
+"""
+from typing import Dict
+from ..config import settings
+from ..repositories import get_repository
+from .cache import LRUCache
+
+Counts = Dict[str, int]
+
+
+badge_cache = LRUCache("badge_cache", "Badge count cache", max_entries=50_000, ttl=settings.badge_cache_ttl_seconds)
+
+
+def badge_counts(user_type: str, uid: str) -> Counts:
+    """Cached unread_notifications, unread_messages and pending_orders for a user"""
+    counts = badge_cache.get((user_type, uid))
+    if counts is None:
+        counts = get_repository().badge_counts(uid, user_type)
+        badge_cache.put((user_type, uid), counts)
+    return counts
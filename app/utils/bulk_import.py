@@ -0,0 +1,110 @@
+"""
+Streaming parser for bulk product uploads.
+
+POST /sellers/{uid}/products/bulk takes the body as text/csv (header row
+first), application/x-ndjson (one JSON object per line) or application/json
+(an array of objects). CSV and NDJSON are parsed line by line as the body
+arrives (a quoted CSV field may span lines), so the controller can write
+each batch while the rest is still uploading; a JSON array has to be read whole before it can be parsed.
+
+Rows come out as (row number, fields, error): row numbers count data rows
+from 1, and a row that cannot be parsed carries an error instead of fields
+so it shows up in the report without stopping the upload.
+"""
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi import HTTPException, Request, status
+
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+BULK_MEDIA_TYPES = ("text/csv", "application/x-ndjson", "application/json")
+
+
+def _text(line: bytes) -> str:
+    return line.decode("utf-8", errors="replace").lstrip("\ufeff").rstrip("\r")
+
+
+async def _lines(request: Request, keep_blank: bool = False) -> AsyncIterator[str]:
+    """Lines of the body as they arrive, blank ones skipped unless keep_blank"""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if keep_blank or line.strip():
+                yield _text(line)
+    if pending.strip():
+        yield _text(pending)
+
+
+async def _csv_records(request: Request) -> AsyncIterator[str]:
+    """CSV records as they arrive; a quoted field may span several lines"""
+    record, quotes = None, 0
+    async for line in _lines(request, keep_blank=True):
+        if record is None:
+            if not line.strip():
+                continue
+            record, quotes = line, 0
+        else:
+            record += "\n" + line
+        # An odd number of quotes so far means a quoted field is still open
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield record
+            record = None
+    if record is not None:
+        yield record
+
+
+async def _csv_rows(request: Request) -> AsyncIterator[ParsedRow]:
+    header = None
+    number = 0
+    async for record in _csv_records(request):
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        number += 1
+        if len(values) > len(header):
+            yield number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield number, {name: value.strip() or None for name, value in zip(header, values)}, None
+
+
+async def _ndjson_rows(request: Request) -> AsyncIterator[ParsedRow]:
+    number = 0
+    async for line in _lines(request):
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON"
+            continue
+        yield (number, row, None) if isinstance(row, dict) else (number, None, "Expected a JSON object")
+
+
+async def _json_rows(request: Request) -> AsyncIterator[ParsedRow]:
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of products")
+    for number, row in enumerate(rows, start=1):
+        yield (number, row, None) if isinstance(row, dict) else (number, None, "Expected a JSON object")
+
+
+def iter_upload_rows(request: Request) -> AsyncIterator[ParsedRow]:
+    """Parsed rows of the upload, by its Content-Type (415 if unsupported)"""
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type == "text/csv":
+        return _csv_rows(request)
+    if media_type == "application/x-ndjson":
+        return _ndjson_rows(request)
+    if media_type == "application/json":
+        return _json_rows(request)
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Upload must be one of: {', '.join(BULK_MEDIA_TYPES)}"
+    )
@@ -0,0 +1,94 @@
+"""
+In-process LRU cache shared by the response and query caches.
+
+Entries are evicted least recently used first once the cache holds
+max_entries values (or max_bytes of bytes values), and with a ttl expire
+that many seconds after they were stored; a ttl of 0 disables the cache.
+Each instance counts its hits and misses and reports them on /metrics
+under its own metric name, e.g. badge_cache_requests_total.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU with an optional time-to-live and byte budget"""
+
+    def __init__(
+        self,
+        metric: str,
+        description: str,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.metric = metric
+        self.description = description
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # key -> (expiry on the monotonic clock or None, value)
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[0] is not None and entry[0] < time.monotonic()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        if self.ttl is not None and self.ttl <= 0:
+            return
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (expires, value)
+            if self.max_bytes is not None:
+                self._size += len(value)
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+                self.max_bytes is not None and self._size > self.max_bytes
+            ):
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _discard(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None and self.max_bytes is not None:
+            self._size -= len(entry[1])
+
+    def prometheus_lines(self):
+        """Cache counters for the /metrics endpoint"""
+        yield f"# HELP {self.metric}_requests_total {self.description} lookups"
+        yield f"# TYPE {self.metric}_requests_total counter"
+        yield f'{self.metric}_requests_total{{result="hit"}} {self.hits}'
+        yield f'{self.metric}_requests_total{{result="miss"}} {self.misses}'
+        yield f"# HELP {self.metric}_entries Entries held by the {self.description.lower()}"
+        yield f"# TYPE {self.metric}_entries gauge"
+        yield f"{self.metric}_entries {len(self._entries)}"
+        if self.max_bytes is not None:
+            yield f"# HELP {self.metric}_bytes Bytes held by the {self.description.lower()}"
+            yield f"# TYPE {self.metric}_bytes gauge"
+            yield f"{self.metric}_bytes {self._size}"
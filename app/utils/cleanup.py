@@ -0,0 +1,174 @@
+"""
+Cleanup of soft-deleted sellers, buyers and products.
+
+Deleting a seller, buyer or product only relabels it (Seller becomes
+DeletedSeller and so on), which hides it from every read at once; a
+seller's products are relabelled in the same transaction. Its
+dependents are removed afterwards by CleanupWorker, one CLEANUP_STEPS step
+at a time and CLEANUP_BATCH_SIZE nodes per transaction, so deleting a large
+seller never holds one big transaction. Each delete returns a job id;
+GET /admin/cleanup-jobs/{id} reports the job's status and per-step counts.
+Jobs live in this process only: on startup, and every few minutes from the
+cleanup_deleted scheduled job, every node still labelled as deleted is
+queued again; steps are safe to repeat.
+"""
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from ..config import settings
+from ..repositories import get_repository
+from ..repositories.common import CLEANUP_STEPS
+
+
+class CleanupJob:
+    """Progress of one soft-deleted node's cleanup"""
+
+    def __init__(self, kind: str, uid: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.uid = uid
+        self.status = "queued"
+        self.step: Optional[str] = None
+        self.processed: Dict[str, int] = {step: 0 for step in CLEANUP_STEPS[kind]}
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "uid": self.uid,
+            "status": self.status,
+            "step": self.step,
+            "processed": dict(self.processed),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class CleanupWorker:
+    """Background thread running cleanup jobs one at a time, in batches"""
+
+    def __init__(self, batch_size: int, max_jobs: int = 1000):
+        self.batch_size = batch_size
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, CleanupJob]" = OrderedDict()
+        self._queue: "queue.Queue[Optional[CleanupJob]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.jobs_total = 0
+        self.failed_total = 0
+        self.batches_total = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cleanup-worker", daemon=True)
+        self._thread.start()
+        try:
+            self.resume()
+        except Exception as e:
+            print(f"Could not resume deletion cleanup: {e}")
+
+    def resume(self) -> int:
+        """Queue every node still labelled as deleted; returns how many"""
+        deleted = get_repository().list_deleted()
+        for kind, uid in deleted:
+            self.submit(kind, uid)
+        return len(deleted)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, kind: str, uid: str) -> CleanupJob:
+        """Queue cleanup of a soft-deleted node (reuses its unfinished job)"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and job.uid == uid and job.status in ("queued", "running"):
+                    return job
+            job = CleanupJob(kind, uid)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status in ("queued", "running"):
+                    break
+                self._jobs.popitem(last=False)
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Most recent jobs first"""
+        with self._lock:
+            jobs = [job for job in reversed(self._jobs.values()) if status is None or job.status == status]
+            return [job.to_dict() for job in jobs[:limit]]
+
+    def run_job(self, job: CleanupJob):
+        """Run every step of a job to completion; the worker thread calls this"""
+        repo = get_repository()
+        job.status, job.started_at = "running", time.time()
+        try:
+            for step in CLEANUP_STEPS[job.kind]:
+                job.step = step
+                while not self._stop.is_set():
+                    processed = repo.cleanup_batch(job.kind, job.uid, step, self.batch_size)
+                    job.processed[step] += processed
+                    self.batches_total += 1
+                    if processed < self.batch_size:
+                        break
+                if self._stop.is_set():
+                    # Left labelled as deleted; resumed on the next start
+                    job.status = "queued"
+                    return
+            job.status, job.step = "done", None
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            self.failed_total += 1
+            print(f"Cleanup of {job.kind} {job.uid} failed: {e}")
+        finally:
+            job.finished_at = time.time() if job.status in ("done", "failed") else None
+            self.jobs_total += job.status == "done"
+
+    def _run(self):
+        while not self._stop.is_set():
+            job = self._queue.get()
+            if job is None:
+                break
+            self.run_job(job)
+
+    def prometheus_lines(self):
+        """Cleanup counters for the /metrics endpoint"""
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+        yield "# HELP cleanup_jobs_total Deletion cleanup jobs completed"
+        yield "# TYPE cleanup_jobs_total counter"
+        yield f"cleanup_jobs_total {self.jobs_total}"
+        yield "# HELP cleanup_job_failures_total Deletion cleanup jobs that failed"
+        yield "# TYPE cleanup_job_failures_total counter"
+        yield f"cleanup_job_failures_total {self.failed_total}"
+        yield "# HELP cleanup_batches_total Deletion cleanup batches run"
+        yield "# TYPE cleanup_batches_total counter"
+        yield f"cleanup_batches_total {self.batches_total}"
+        yield "# HELP cleanup_jobs_pending Deletion cleanup jobs queued or running"
+        yield "# TYPE cleanup_jobs_pending gauge"
+        yield f"cleanup_jobs_pending {pending}"
+
+
+cleanup_worker = CleanupWorker(batch_size=settings.cleanup_batch_size)
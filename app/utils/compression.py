@@ -0,0 +1,131 @@
+"""
+Response compression: codecs, encoding negotiation and a compressed-body cache.
+
+gzip is always available. Brotli is used when the optional `brotli`
+package is installed and the client accepts it. Base64 images inside our
+JSON are already high-entropy, so most of the win comes from the JSON
+around them; the quality settings stay low to keep CPU per byte down.
+
+Compressed bodies of public (catalog) responses are kept in an LRU keyed
+by (ETag, encoding). ETags come from the resource version, so a repeat
+hit for an unchanged catalog skips the compression step entirely.
+"""
+import zlib
+from typing import Dict, Optional, Tuple
+from ..config import settings
+from .cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Bodies bigger than this are compressed in a worker thread so the event
+# loop keeps serving other requests (zlib and brotli release the GIL)
+THREAD_OFFLOAD_BYTES = 64 * 1024
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Encodings we can produce, best first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best encoding the client accepts (q > 0), or None"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    for encoding in available_encodings():
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class StreamCompressor:
+    """Incremental compressor; every chunk is flushed so streams stay progressive"""
+
+    def __init__(self, encoding: str, gzip_level: int = None, brotli_quality: int = None):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(
+                quality=settings.compression_brotli_quality if brotli_quality is None else brotli_quality
+            )
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._zlib = zlib.compressobj(
+                settings.compression_gzip_level if gzip_level is None else gzip_level, zlib.DEFLATED, 31
+            )
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it to the output"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last chunk and close the stream"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = None, brotli_quality: int = None) -> bytes:
+    """One-shot compression of a complete body"""
+    return StreamCompressor(encoding, gzip_level, brotli_quality).finish(data)
+
+
+class CompressedBodyCache(LRUCache):
+    """LRU of compressed bodies keyed by (ETag, encoding), bounded in bytes"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__("compression_cache", "Compressed-body cache", max_bytes=max_bytes)
+        # Per encoding: [responses, bytes in, bytes out]
+        self.totals: Dict[str, list] = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int):
+        """Count a compressed response for the /metrics ratio"""
+        with self._lock:
+            totals = self.totals.setdefault(encoding, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += bytes_in
+            totals[2] += bytes_out
+
+    def prometheus_lines(self):
+        """Compression volume and cache counters for the /metrics endpoint"""
+        yield "# HELP http_compressed_responses_total Responses sent with a Content-Encoding"
+        yield "# TYPE http_compressed_responses_total counter"
+        for encoding, (count, _, _) in self.totals.items():
+            yield f'http_compressed_responses_total{{encoding="{encoding}"}} {count}'
+        yield "# HELP http_compression_bytes_total Body bytes before (in) and after (out) compression"
+        yield "# TYPE http_compression_bytes_total counter"
+        for encoding, (_, bytes_in, bytes_out) in self.totals.items():
+            yield f'http_compression_bytes_total{{encoding="{encoding}",direction="in"}} {bytes_in}'
+            yield f'http_compression_bytes_total{{encoding="{encoding}",direction="out"}} {bytes_out}'
+        yield from super().prometheus_lines()
+
+
+compressed_body_cache = CompressedBodyCache(settings.compression_cache_max_bytes)
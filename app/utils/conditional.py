@@ -0,0 +1,61 @@
+"""
+ETag / If-None-Match support for catalog and profile reads.
+
+Routes compute a version with a cheap projection (updated_at only, or a
+collection version for lists) before loading anything else. If it matches
+If-None-Match they answer 304 straight away: no full node read, no
+serialization, no body. The version is read before the content, so a
+concurrent write can only pair a newer body with an older ETag, which
+costs the client one extra download and never serves stale data.
+"""
+import hashlib
+from typing import Any, Callable, Optional
+from fastapi import Request, Response
+
+# Anyone may store catalog responses but must revalidate before reuse
+CATALOG_CACHE_CONTROL = "public, no-cache"
+# Profiles include email and contact numbers, so keep them out of shared caches
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from the parts that identify a representation"""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=12).hexdigest()
+    # Weak, so compressed and uncompressed bodies can share it
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str,
+    build: Callable[[], Any],
+):
+    """Return 304 if the client's copy is current, otherwise build() with validators attached"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    content = build()
+    if isinstance(content, Response):
+        content.headers.update(headers)
+    else:
+        response.headers.update(headers)
+    return content
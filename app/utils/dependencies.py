@@ -1,15 +1,19 @@
+import secrets
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from ..models import Buyer, Seller
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
+from ..config import settings
+from ..repositories.base import Record
 from .security import decode_access_token
-from neo4j import exceptions as neo4j_exceptions
-import time
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+admin_scheme = HTTPBearer(auto_error=False, description="ADMIN_TOKEN")
 
+USER_TYPES = ("buyer", "seller")
 
-def get_current_buyer(token: str = Depends(oauth2_scheme)) -> Buyer:
-    """Get current authenticated buyer"""
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Tuple[str, str]:
+    """(user_type, uid) from the access token alone, without loading the user"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -18,59 +22,50 @@ def get_current_buyer(token: str = Depends(oauth2_scheme)) -> Buyer:
     
     try:
         payload = decode_access_token(token)
-        uid: str = payload.get("uid")
-        user_type: str = payload.get("user_type")
-        
-        if uid is None or user_type != "buyer":
-            raise credentials_exception
-        
-        buyer = _retry_get_or_none(Buyer, uid=uid)
-        if buyer is None:
-            raise credentials_exception
-        
-        return buyer
     except ValueError:
         raise credentials_exception
+    uid, user_type = payload.get("uid"), payload.get("user_type")
+    if uid is None or user_type not in USER_TYPES:
+        raise credentials_exception
+    return user_type, uid
 
 
-def get_current_seller(token: str = Depends(oauth2_scheme)) -> Seller:
-    """Get current authenticated seller"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        payload = decode_access_token(token)
-        uid: str = payload.get("uid")
-        user_type: str = payload.get("user_type")
-        
-        if uid is None or user_type != "seller":
-            raise credentials_exception
-        
-        seller = _retry_get_or_none(Seller, uid=uid)
-        if seller is None:
-            raise credentials_exception
-        
-        return seller
-    except ValueError:
-        raise credentials_exception
+def require_admin(credentials: Optional[HTTPAuthorizationCredentials] = Depends(admin_scheme)):
+    """Allow the request only with `Authorization: Bearer <ADMIN_TOKEN>`"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin API is disabled")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.admin_token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def get_current_buyer(user: Tuple[str, str] = Depends(get_current_user)) -> Record:
+    """The authenticated buyer's record, loaded through the repository"""
+    return _load_user(user, "buyer")
+
+
+def get_current_seller(user: Tuple[str, str] = Depends(get_current_user)) -> Record:
+    """The authenticated seller's record, loaded through the repository"""
+    return _load_user(user, "seller")
+
 
+def _load_user(user: Tuple[str, str], expected_type: str) -> Record:
+    from ..repositories import get_repository
 
-def _retry_get_or_none(model_class, **kwargs):
-    """Small retry wrapper around model_class.nodes.get_or_none for transient DB errors."""
-    attempts = 3
-    backoff = 0.5
-    last_exc = None
-    for attempt in range(attempts):
-        try:
-            node = model_class.nodes.get_or_none(**kwargs)
-            last_exc = None
-            return node
-        except neo4j_exceptions.ServiceUnavailable as e:
-            last_exc = e
-            time.sleep(backoff * (attempt + 1))
-    # If we got here, raise a HTTPException to be handled by caller context
-    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                        detail="Database unavailable, please try again later") from last_exc
+    user_type, uid = user
+    repo = get_repository()
+    record = None
+    if user_type == expected_type:
+        record = repo.get_buyer(uid) if user_type == "buyer" else repo.get_seller(uid)
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return record
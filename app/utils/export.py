@@ -0,0 +1,78 @@
+"""
+Streaming NDJSON/CSV exports.
+
+export_response() turns the batches yielded by a repository iterator
+(Repository.iter_seller_orders and friends) into a StreamingResponse. Each
+batch is encoded and sent as soon as it arrives, so memory stays at one
+batch however long the history is. The first batch is pulled before the
+response starts, so a database error still becomes a 503 instead of a
+truncated 200.
+"""
+import csv
+import io
+import itertools
+import json
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Sequence
+from fastapi.responses import StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def _csv_value(value: Any):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_chunks(batches: Iterable[List[dict]], columns: Sequence[str]) -> Iterator[bytes]:
+    for batch in batches:
+        rows = ({column: row.get(column) for column in columns} for row in batch)
+        if orjson is not None:
+            yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+        else:
+            yield "".join(json.dumps(row, default=_json_default) + "\n" for row in rows).encode()
+
+
+def csv_chunks(batches: Iterable[List[dict]], columns: Sequence[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_csv_value(row.get(column)) for column in columns] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_response(batches: Iterable[List[dict]], format: str, columns: Sequence[str], filename: str) -> StreamingResponse:
+    """Stream batches of records as NDJSON or CSV attachment"""
+    batches = iter(batches)
+    first = next(batches, None)
+    batches = itertools.chain([first] if first is not None else [], batches)
+
+    chunks = csv_chunks(batches, columns) if format == "csv" else ndjson_chunks(batches, columns)
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
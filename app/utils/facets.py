@@ -0,0 +1,34 @@
+"""
+Facet counts for product browsing.
+
+For the filters in use, GET /products/facets counts the listings per fish
+type, price bucket and seller location. Each facet ignores its own filter
+(the type counts apply the name, price and seller filters but not the type
+filter), so the counts are what the listing would return if that value were
+picked next. The repository computes all facets in one pass over the same
+rows the listing reads. Results are cached per catalog version and filter
+set, so repeated page loads cost only the catalog version check until a
+product or seller changes.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from .cache import LRUCache
+
+# Lower bounds of the price buckets (PHP); the last bucket is open-ended
+PRICE_BUCKET_EDGES: List[float] = [0, 100, 250, 500, 1000]
+
+
+def price_buckets() -> List[Tuple[float, Optional[float]]]:
+    """(min_price, max_price) of each bucket; max_price is None for the last one"""
+    return list(zip(PRICE_BUCKET_EDGES, PRICE_BUCKET_EDGES[1:] + [None]))
+
+
+def sorted_counts(counts: Dict[Any, int]) -> List[Tuple[Any, int]]:
+    """Facet values by count, most common first, None values dropped"""
+    return sorted(
+        ((value, count) for value, count in counts.items() if value is not None),
+        key=lambda item: (-item[1], str(item[0]).lower()),
+    )
+
+
+# Facet responses keyed by catalog ETag
+facet_cache = LRUCache("product_facet_cache", "Product facet cache", max_entries=1024)
@@ -0,0 +1,130 @@
+"""
+Offline geocoding of seller locations and great-circle distances.
+
+Seller.location is free text ("Brgy. North Bay, Navotas City", "Bulan,
+Sorsogon", "Navotas Fish Port"). geocode() resolves it against a local
+gazetteer (app/data/ph_gazetteer.csv: the provincial capitals, cities and
+the main fishing towns), so no request ever waits on a geocoding service.
+A place the gazetteer doesn't know yields None and the seller just doesn't
+show up in nearby searches; add a row to the CSV to fix that.
+
+Resolution order, over the comma-separated parts of the location:
+  1. a municipality or city, with or without "City" ("Dagupan City",
+     "Zamboanga"), narrowed by a province named in another part when the
+     name is shared ("San Fernando, Pampanga");
+  2. a province, which resolves to its capital (the first row listed), so
+     "Lucban, Quezon" lands in Lucena rather than in Quezon, Palawan;
+  3. any full name appearing as whole words anywhere in the text.
+"""
+import csv
+import math
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "ph_gazetteer.csv"
+
+# Mean earth radius (IUGG)
+EARTH_RADIUS_KM = 6371.0088
+
+PROVINCE_ALIASES = {
+    "ncr": "metro manila",
+    "national capital region": "metro manila",
+    "mm": "metro manila",
+}
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    province: str
+    latitude: float
+    longitude: float
+
+
+@dataclass
+class Gazetteer:
+    by_name: Dict[str, List[Place]] = field(default_factory=dict)
+    by_alias: Dict[str, List[Place]] = field(default_factory=dict)
+    capitals: Dict[str, Place] = field(default_factory=dict)
+    # Matches any full place name as whole words, longest first
+    pattern: Optional["re.Pattern"] = None
+
+
+def normalize_place(text: str) -> str:
+    """Lowercase, drop accents and punctuation: 'Parañaque City' -> 'paranaque city'"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower().replace("'", ""))
+    return " ".join(text.split())
+
+
+def _strip_city(name: str) -> Optional[str]:
+    if name.startswith("city of "):
+        return name[len("city of "):]
+    if name.endswith(" city"):
+        return name[:-len(" city")]
+    return None
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer(path: Path = GAZETTEER_PATH) -> Gazetteer:
+    gazetteer = Gazetteer()
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            place = Place(row["name"], row["province"], float(row["latitude"]), float(row["longitude"]))
+            name = normalize_place(place.name)
+            gazetteer.by_name.setdefault(name, []).append(place)
+            alias = _strip_city(name)
+            if alias:
+                gazetteer.by_alias.setdefault(alias, []).append(place)
+            gazetteer.capitals.setdefault(normalize_place(place.province), place)
+    names = sorted(gazetteer.by_name, key=len, reverse=True)
+    gazetteer.pattern = re.compile(r"\b(" + "|".join(re.escape(name) for name in names) + r")\b")
+    return gazetteer
+
+
+def _pick(candidates: List[Place], provinces: List[str]) -> Place:
+    """First candidate in a mentioned province, else the first listed"""
+    for place in candidates:
+        if normalize_place(place.province) in provinces:
+            return place
+    return candidates[0]
+
+
+def geocode(location: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) for a free-text Philippine location, or None"""
+    if not location:
+        return None
+    gazetteer = load_gazetteer()
+    parts = [normalize_place(part) for part in location.split(",")]
+    parts = [PROVINCE_ALIASES.get(part, part) for part in parts if part]
+    provinces = [part for part in parts if part in gazetteer.capitals]
+
+    place = None
+    for part in parts:
+        if part in gazetteer.capitals:
+            continue
+        candidates = (gazetteer.by_name.get(part) or gazetteer.by_name.get(_strip_city(part) or "")
+                      or gazetteer.by_alias.get(part))
+        if candidates:
+            place = _pick(candidates, provinces)
+            break
+    if place is None and provinces:
+        place = gazetteer.capitals[provinces[0]]
+    if place is None:
+        match = gazetteer.pattern.search(normalize_place(location))
+        if match:
+            place = _pick(gazetteer.by_name[match.group(1)], provinces)
+    return (place.latitude, place.longitude) if place else None
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,123 @@
+"""
+Password hashing service.
+
+pbkdf2_sha256 costs tens of milliseconds of pure CPU per call and holds the
+GIL while it runs, so hashing on the request threads stalls every other
+request in the process. PasswordHasher ships the work to a small process pool
+and caps the number of pending operations so a login burst is rejected with
+503 + Retry-After instead of queueing without bound.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from ..config import settings
+
+# One CryptContext per work factor, cached per process (pool workers included)
+_contexts: Dict[int, "CryptContext"] = {}
+
+
+def build_context(rounds: int) -> "CryptContext":
+    """Return the CryptContext for the given pbkdf2 work factor.
+
+    Hashes created with fewer rounds are reported by needs_update(), which is
+    how legacy hashes get upgraded transparently on login.
+    """
+    context = _contexts.get(rounds)
+    if context is None:
+        # Imported here: passlib loads every handler module up front
+        from passlib.context import CryptContext
+
+        # Use pbkdf2_sha256 to avoid bcrypt C-extension issues and 72-byte limit
+        context = CryptContext(
+            schemes=["pbkdf2_sha256"],
+            deprecated="auto",
+            pbkdf2_sha256__default_rounds=rounds,
+            pbkdf2_sha256__min_rounds=rounds,
+        )
+        _contexts[rounds] = context
+    return context
+
+
+def _hash(password: str, rounds: int) -> str:
+    return build_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    try:
+        return build_context(rounds).verify_and_update(password, hashed_password)
+    except ValueError:
+        # Unrecognized or malformed hash stored on the node
+        return False, None
+
+
+class PasswordHasher:
+    """Bounded process-pool front end for password hashing and verification"""
+
+    def __init__(self, rounds: int, workers: Optional[int], max_pending: int, timeout: float):
+        self.rounds = rounds
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so forked server workers each get their own pool
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending authentication requests, please try again",
+                headers={"Retry-After": "1"}
+            )
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the work finishes, not when we stop waiting,
+        # so work still running after a timeout keeps counting as pending
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Drops it if no pool process has picked it up yet
+            future.cancel()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication timed out, please try again",
+                headers={"Retry-After": "1"}
+            )
+
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured work factor"""
+        return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one is outdated"""
+        return self._run(_verify_and_update, password, hashed_password, self.rounds)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.password_hash_rounds,
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    timeout=settings.password_hash_timeout_seconds,
+)
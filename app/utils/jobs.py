@@ -0,0 +1,250 @@
+"""
+Scheduled maintenance jobs.
+
+JobRunner runs registered functions on cron schedules (UTC, five fields:
+minute hour day-of-month month day-of-week, with *, lists, ranges and /step,
+or @hourly/@daily/@weekly/@monthly). A scheduler thread wakes at each due
+time and hands the job to a pool of JOB_WORKERS threads; a job still running
+from its previous slot is skipped rather than queued twice.
+
+Before running, a replica claims the slot with a lease in the database
+(JobLease nodes), so when several replicas run the scheduler each slot runs
+once. A lease lasts JOB_LEASE_SECONDS; a replica that dies mid-run blocks the
+job until then. Every run is stored as a JobRun (the last JOB_RUN_HISTORY per
+job) with its duration and the rows it reported, for GET /admin/job-runs.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from ..config import settings
+from ..repositories import get_repository
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (low, high) of minute, hour, day of month, month, day of week (0 = Sunday, 7 also accepted)
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _cron_field(text: str, low: int, high: int) -> Optional[set]:
+    """Values a cron field allows, or None for '*' (any)"""
+    if text == "*":
+        return None
+    values = set()
+    for part in text.split(","):
+        span, _, step = part.partition("/")
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start, end = (int(v) for v in span.split("-"))
+        else:
+            start = end = int(span)
+            if step:
+                end = high
+        if not low <= start <= end <= high:
+            raise ValueError(f"cron value out of range: {part}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronSchedule:
+    """A parsed cron expression; next_after() gives the next matching minute"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression, expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expression!r}")
+        minutes, hours, days, months, weekdays = (
+            _cron_field(text, low, high) for text, (low, high) in zip(fields, CRON_FIELDS)
+        )
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        self.weekdays = {day % 7 for day in weekdays} if weekdays is not None else None
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = self.days is None or dt.day in self.days
+        weekday_ok = self.weekdays is None or (dt.weekday() + 1) % 7 in self.weekdays
+        if self.days is not None and self.weekdays is not None:
+            # Like cron: with both restricted, either one matching is enough
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, timestamp: float) -> float:
+        """Epoch seconds of the first matching minute strictly after timestamp"""
+        dt = datetime.fromtimestamp(timestamp, timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt.year + 5
+        while dt.year <= limit:
+            if self.months is not None and dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif self.hours is not None and dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif self.minutes is not None and dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError(f"cron expression never matches: {self.expression!r}")
+
+
+class ScheduledJob:
+    def __init__(self, name: str, schedule: CronSchedule, func: Callable[[], int], description: str):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.description = description
+        self.next_run: Optional[float] = None
+        self.running = False
+        self.last_run: Optional[dict] = None
+        self.runs = {"succeeded": 0, "failed": 0, "skipped": 0}
+
+
+class JobRunner:
+    """Cron scheduler thread plus a bounded pool running the due jobs"""
+
+    def __init__(self, workers: int, lease_seconds: float, history: int):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.history = history
+        # Distinguishes this process's leases from other replicas'
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def register(self, name: str, schedule: str, func: Callable[[], int], description: str = ""):
+        """Schedule func (returning the rows it processed) under a unique name"""
+        self._jobs[name] = ScheduledJob(name, CronSchedule(schedule), func, description)
+
+    def start(self):
+        if self.workers <= 0 or self._thread is not None:
+            return
+        now = time.time()
+        for job in self._jobs.values():
+            job.next_run = job.schedule.next_after(now)
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+        self._thread = threading.Thread(target=self._run, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop scheduling; running jobs finish in the background and keep their lease until then"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def trigger(self, name: str) -> bool:
+        """Run a job now, outside its schedule; False if it is running or leased elsewhere"""
+        job = self._jobs[name]
+        if self._pool is None:
+            return False
+        return self._dispatch(job, time.time(), "manual")
+
+    def jobs(self) -> List[dict]:
+        """Registered jobs with their schedule, next run, last run and lease"""
+        try:
+            leases = {lease["name"]: lease for lease in get_repository().list_job_leases()}
+        except Exception as e:
+            print(f"Could not read job leases: {e}")
+            leases = {}
+        return [{
+            "name": job.name,
+            "schedule": job.schedule.expression,
+            "description": job.description,
+            "next_run": job.next_run,
+            "running": job.running,
+            "last_run": job.last_run,
+            "lease": leases.get(job.name),
+        } for job in self._jobs.values()]
+
+    def runs(self, name: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Stored runs of every replica, newest first"""
+        return get_repository().list_job_runs(name, limit)
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.time()
+            for job in self._jobs.values():
+                if job.next_run is not None and job.next_run <= now:
+                    slot, job.next_run = job.next_run, job.schedule.next_after(now)
+                    self._dispatch(job, slot, "schedule")
+            pending = [job.next_run for job in self._jobs.values() if job.next_run is not None]
+            self._wake.wait(max(min(pending, default=now + 60) - time.time(), 0.5))
+            self._wake.clear()
+
+    def _dispatch(self, job: ScheduledJob, slot: float, trigger: str) -> bool:
+        with self._lock:
+            if job.running:
+                job.runs["skipped"] += 1
+                return False
+            job.running = True
+        try:
+            claimed = get_repository().acquire_job_lease(job.name, self.owner, slot, self.lease_seconds)
+        except Exception as e:
+            print(f"Could not lease job {job.name}: {e}")
+            claimed = False
+        if not claimed:
+            job.running = False
+            return False
+        self._pool.submit(self._execute, job, slot, trigger)
+        return True
+
+    def _execute(self, job: ScheduledJob, slot: float, trigger: str):
+        repo = get_repository()
+        started_at, start = time.time(), time.perf_counter()
+        run = {"uid": uuid.uuid4().hex, "job": job.name, "owner": self.owner, "trigger": trigger, "slot": slot,
+               "started_at": started_at, "rows": 0, "status": "succeeded", "error": None}
+        try:
+            run["rows"] = job.func() or 0
+        except Exception as e:
+            run["status"], run["error"] = "failed", str(e)
+            print(f"Job {job.name} failed: {e}")
+        run["finished_at"] = time.time()
+        run["duration_seconds"] = time.perf_counter() - start
+        job.runs[run["status"]] += 1
+        job.last_run = run
+        try:
+            repo.record_job_run(run, self.history)
+            repo.release_job_lease(job.name, self.owner)
+        except Exception as e:
+            # The lease expires on its own after JOB_LEASE_SECONDS
+            print(f"Could not record run of job {job.name}: {e}")
+        finally:
+            job.running = False
+
+    def prometheus_lines(self):
+        """Run counters and last durations for the /metrics endpoint"""
+        yield "# HELP scheduled_job_runs_total Scheduled job runs in this process by outcome"
+        yield "# TYPE scheduled_job_runs_total counter"
+        for job in self._jobs.values():
+            for outcome, count in job.runs.items():
+                yield f'scheduled_job_runs_total{{job="{job.name}",status="{outcome}"}} {count}'
+        yield "# HELP scheduled_job_last_duration_seconds Duration of the job's last run in this process"
+        yield "# TYPE scheduled_job_last_duration_seconds gauge"
+        for job in self._jobs.values():
+            if job.last_run:
+                yield f'scheduled_job_last_duration_seconds{{job="{job.name}"}} {job.last_run["duration_seconds"]:.6f}'
+
+
+job_runner = JobRunner(
+    workers=settings.job_workers,
+    lease_seconds=settings.job_lease_seconds,
+    history=settings.job_run_history,
+)
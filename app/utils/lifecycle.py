@@ -0,0 +1,107 @@
+"""
+Process lifecycle behind the app's lifespan and the /healthz, /readyz probes.
+
+Startup runs before uvicorn takes traffic: it connects to Neo4j and checks
+the server answers (retrying for STARTUP_TIMEOUT_SECONDS, then failing so the
+instance is restarted rather than serving errors), applies the schema, opens
+DB_POOL_WARM_CONNECTIONS pooled connections, fills the catalog caches and
+starts the background workers. /readyz is 503 until that is done and
+whenever the database stops answering; /healthz only says the process is up.
+
+Draining is the server's job: on SIGTERM uvicorn stops accepting
+connections and waits for in-flight requests (up to SHUTDOWN_DRAIN_SECONDS
+under the gunicorn profile, see app/server.py) before it runs the lifespan
+shutdown. By then nothing is in flight (notifications are written inline,
+so nothing is left to flush) and shutdown only stops the workers and
+closes the driver.
+"""
+import threading
+import time
+from ..config import settings
+
+
+class Lifecycle:
+    """Startup/shutdown sequence and the state the probes report"""
+
+    def __init__(self):
+        # starting -> ready -> stopped
+        self.state = "starting"
+        self.started_at = time.time()
+        self.startup_seconds = 0.0
+        self._db_ok = False
+        self._db_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def startup(self):
+        """Blocking startup sequence; raises if Neo4j stays unreachable"""
+        from ..database import init_database, warm_pool
+        from ..repositories import get_repository
+        from .cleanup import cleanup_worker
+        from .jobs import job_runner
+        from .recommendations import co_purchase_rebuilder
+        from .reservations import reservation_sweeper
+
+        start = time.perf_counter()
+        self.state = "starting"
+        if settings.repository_backend == "neo4j":
+            init_database(timeout=settings.startup_timeout_seconds)
+            try:
+                get_repository().ensure_schema()
+            except Exception as e:
+                print(f"⚠️ Could not create constraints/indexes: {e}")
+            warm_pool(settings.db_pool_warm_connections)
+        self._warm_caches()
+        reservation_sweeper.start()
+        co_purchase_rebuilder.start()
+        cleanup_worker.start()
+        job_runner.start()
+        self._db_ok, self._db_checked_at = True, time.monotonic()
+        self.startup_seconds = time.perf_counter() - start
+        self.state = "ready"
+
+    def _warm_caches(self):
+        """Fill what the first catalog requests would otherwise compute"""
+        from ..controllers import FishProductController
+        from .geo import load_gazetteer
+
+        try:
+            load_gazetteer()
+            etag = FishProductController.catalog_etag("facets", None, None, None, None, None)
+            FishProductController.get_product_facets(etag)
+        except Exception as e:
+            print(f"⚠️ Could not warm caches: {e}")
+
+    def shutdown(self):
+        """Stop the background workers and close the driver"""
+        from ..database import close_database
+        from .cleanup import cleanup_worker
+        from .hashing import password_hasher
+        from .jobs import job_runner
+        from .recommendations import co_purchase_rebuilder
+        from .reservations import reservation_sweeper
+
+        job_runner.stop()
+        cleanup_worker.stop()
+        reservation_sweeper.stop()
+        co_purchase_rebuilder.stop()
+        close_database()
+        password_hasher.shutdown()
+        self.state = "stopped"
+
+    def database_ok(self) -> bool:
+        """Neo4j answered within the last READINESS_CHECK_INTERVAL_SECONDS"""
+        if settings.repository_backend != "neo4j":
+            return True
+        from ..database import check_database
+
+        with self._lock:
+            if time.monotonic() - self._db_checked_at >= settings.readiness_check_interval_seconds:
+                self._db_ok, self._db_checked_at = check_database(), time.monotonic()
+            return self._db_ok
+
+    def readiness(self) -> dict:
+        database = self.state == "ready" and self.database_ok()
+        return {"ready": self.state == "ready" and database, "state": self.state, "database": database}
+
+
+lifecycle = Lifecycle()
@@ -0,0 +1,85 @@
+"""
+The maintenance jobs JobRunner schedules.
+
+Each job pages through its data in bounded batches, one transaction per
+batch, and returns how many rows it changed:
+
+- reconcile_ratings: recompute seller ratings from their reviews and fix
+  the sellers (and their products' rating sort key) that drifted
+- expire_notifications: delete read notifications older than
+  NOTIFICATION_RETENTION_DAYS
+- expire_rate_limits: delete login rate-limit counters that no longer
+  carry any weight
+- backfill_rollups / backfill_sort_keys: the app.commands backfills, run
+  weekly to repair any drift in analytics rollups and listing sort keys
+- cleanup_deleted: queue cleanup of soft-deleted nodes whose cleanup was
+  cut short (see app/utils/cleanup.py)
+"""
+import time
+from datetime import datetime, timedelta
+from ..config import settings
+from ..repositories import get_repository
+from .cleanup import cleanup_worker
+from .jobs import JobRunner
+
+RATING_BATCH_SIZE = 200
+NOTIFICATION_EXPIRY_BATCH_SIZE = 1000
+RATE_LIMIT_EXPIRY_BATCH_SIZE = 1000
+
+
+def reconcile_ratings() -> int:
+    repo = get_repository()
+    after, reconciled = None, 0
+    while True:
+        uids = repo.list_seller_uids(after=after, limit=RATING_BATCH_SIZE)
+        if not uids:
+            return reconciled
+        reconciled += repo.reconcile_seller_ratings(uids)
+        after = uids[-1]
+
+
+def expire_notifications() -> int:
+    repo = get_repository()
+    cutoff = (datetime.utcnow() - timedelta(days=settings.notification_retention_days)).isoformat()
+    expired = 0
+    while True:
+        batch = repo.expire_notifications(cutoff, NOTIFICATION_EXPIRY_BATCH_SIZE)
+        expired += batch
+        if batch < NOTIFICATION_EXPIRY_BATCH_SIZE:
+            return expired
+
+
+def expire_rate_limits() -> int:
+    repo = get_repository()
+    now = time.time()
+    expired = 0
+    while True:
+        batch = repo.expire_rate_limits(now, RATE_LIMIT_EXPIRY_BATCH_SIZE)
+        expired += batch
+        if batch < RATE_LIMIT_EXPIRY_BATCH_SIZE:
+            return expired
+
+
+def backfill_rollups() -> int:
+    from ..commands.backfill_rollups import backfill
+    return backfill(get_repository(), progress=lambda line: None)
+
+
+def backfill_sort_keys() -> int:
+    from ..commands.backfill_sort_keys import backfill
+    return backfill(get_repository(), progress=lambda line: None)
+
+
+def register_maintenance_jobs(runner: JobRunner):
+    runner.register("reconcile_ratings", "30 3 * * *", reconcile_ratings,
+                    "Recompute seller ratings from reviews")
+    runner.register("expire_notifications", "15 * * * *", expire_notifications,
+                    "Delete read notifications past NOTIFICATION_RETENTION_DAYS")
+    runner.register("expire_rate_limits", "45 * * * *", expire_rate_limits,
+                    "Delete idle login rate-limit counters")
+    runner.register("backfill_rollups", "0 4 * * 0", backfill_rollups,
+                    "Rebuild seller daily rollups from orders")
+    runner.register("backfill_sort_keys", "30 4 * * 0", backfill_sort_keys,
+                    "Recompute product listing sort keys")
+    runner.register("cleanup_deleted", "*/15 * * * *", cleanup_worker.resume,
+                    "Queue cleanup of soft-deleted sellers, buyers and products")
@@ -0,0 +1,148 @@
+"""
+Low-overhead metrics in Prometheus text format.
+
+The request middleware only touches preallocated structures on the hot
+path: one RouteMetrics per (route, method) holding a fixed list of bucket
+counters, an in-flight integer and a status-code array. Everything else
+(pool usage, cache counters, query totals, queue depths) is pulled from
+registered collector callbacks when /metrics is scraped.
+"""
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class RouteMetrics:
+    """Latency histogram for one route/method pair"""
+
+    __slots__ = ("route", "method", "counts", "sum", "count")
+
+    def __init__(self, route: str, method: str, buckets: int):
+        self.route = route
+        self.method = method
+        self.counts = [0] * (buckets + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Process-wide metrics store and Prometheus renderer"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.in_flight = 0
+        self.responses_by_status = [0] * 600
+        self._routes: Dict[str, Dict[str, RouteMetrics]] = {}
+        self._cache_hits: Dict[str, List[int]] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        self._gauges: List[Tuple[str, str, Callable[[], Optional[float]]]] = []
+        self._lock = threading.Lock()
+
+    # --- hot path -------------------------------------------------------
+
+    def observe_request(self, route_path: str, method: str, status_code: int, seconds: float):
+        """Record one finished request (called from the event loop)"""
+        by_method = self._routes.get(route_path)
+        if by_method is None:
+            by_method = self._routes[route_path] = {}
+        metrics = by_method.get(method)
+        if metrics is None:
+            metrics = by_method[method] = RouteMetrics(route_path, method, len(self.buckets))
+        metrics.counts[bisect_left(self.buckets, seconds)] += 1
+        metrics.sum += seconds
+        metrics.count += 1
+        if 0 <= status_code < 600:
+            self.responses_by_status[status_code] += 1
+
+    def cache_hit(self, cache: str):
+        self._cache_counter(cache)[0] += 1
+
+    def cache_miss(self, cache: str):
+        self._cache_counter(cache)[1] += 1
+
+    def _cache_counter(self, cache: str) -> List[int]:
+        counter = self._cache_hits.get(cache)
+        if counter is None:
+            with self._lock:
+                counter = self._cache_hits.setdefault(cache, [0, 0])
+        return counter
+
+    # --- registration ---------------------------------------------------
+
+    def register_gauge(self, name: str, help_text: str, fn: Callable[[], Optional[float]]):
+        """Expose fn() as a gauge; None means the value is currently unknown"""
+        self._gauges.append((name, help_text, fn))
+
+    def register_collector(self, fn: Callable[[], Iterable[str]]):
+        """Add a callback that yields complete exposition lines at scrape time"""
+        self._collectors.append(fn)
+
+    # --- exposition -----------------------------------------------------
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        lines.append("# HELP http_request_duration_seconds Request latency by route")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for by_method in list(self._routes.values()):
+            for m in list(by_method.values()):
+                labels = f'route="{_escape(m.route)}",method="{m.method}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, m.counts):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                cumulative += m.counts[-1]
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {m.sum}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {m.count}")
+
+        lines.append("# HELP http_requests_in_flight Requests currently being served")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+        lines.append("# HELP http_responses_total Responses by status code")
+        lines.append("# TYPE http_responses_total counter")
+        for code, count in enumerate(self.responses_by_status):
+            if count:
+                lines.append(f'http_responses_total{{status="{code}"}} {count}')
+
+        lines.append("# HELP cache_requests_total Cache lookups by cache and result")
+        lines.append("# TYPE cache_requests_total counter")
+        for cache, (hits, misses) in list(self._cache_hits.items()):
+            lines.append(f'cache_requests_total{{cache="{_escape(cache)}",result="hit"}} {hits}')
+            lines.append(f'cache_requests_total{{cache="{_escape(cache)}",result="miss"}} {misses}')
+
+        for name, help_text, fn in self._gauges:
+            try:
+                value = fn()
+            except Exception:
+                value = None
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                lines.append(f"# collector error: {_escape(str(e))}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
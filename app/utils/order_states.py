@@ -0,0 +1,41 @@
+"""
+Order status state machine.
+
+    pending -> confirmed -> processing -> shipped -> delivered
+       \\___________\\____________\\
+                                 -> cancelled
+
+Orders can be cancelled until they ship; delivered and cancelled are
+final. Stock follows the status in the repository: confirming a pending
+order turns its reservation into a sale, and cancelling gives the stock
+back (a live reservation is released, a committed sale is restocked).
+"""
+from typing import Dict, FrozenSet, Optional, Tuple
+
+ORDER_STATUSES = ("pending", "confirmed", "processing", "shipped", "delivered", "cancelled")
+
+ORDER_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    "pending": frozenset({"confirmed", "cancelled"}),
+    "confirmed": frozenset({"processing", "cancelled"}),
+    "processing": frozenset({"shipped", "cancelled"}),
+    "shipped": frozenset({"delivered"}),
+    "delivered": frozenset(),
+    "cancelled": frozenset(),
+}
+
+# Buyer notification per new status: (notification type, wording, closing punctuation)
+STATUS_NOTIFICATIONS: Dict[str, Tuple[str, str, str]] = {
+    "confirmed": ("order_approved", "approved", "!"),
+    "processing": ("order_approved", "approved", "!"),
+    "delivered": ("order_delivered", "delivered", "!"),
+    "cancelled": ("order_cancelled", "cancelled", "."),
+}
+
+
+def can_transition(current: Optional[str], new: str) -> bool:
+    return new in ORDER_TRANSITIONS.get(current, frozenset())
+
+
+def allowed_sources(new: str) -> FrozenSet[str]:
+    """Statuses an order may be in to move to `new`"""
+    return frozenset(status for status, targets in ORDER_TRANSITIONS.items() if new in targets)
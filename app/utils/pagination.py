@@ -0,0 +1,38 @@
+"""
+Keyset pagination cursors for sorted product listings.
+
+A cursor is the sort name plus the (sort value, uid) of the last product on
+the previous page, base64-encoded so clients treat it as opaque. The next
+page starts strictly after that pair, so it stays consistent while products
+are added or removed, and costs the same however deep the client pages.
+"""
+import base64
+import json
+from typing import Any, Optional, Tuple
+
+# sort name -> (repository sort key, descending)
+PRODUCT_SORTS = {
+    "price": ("price", False),
+    "-price": ("price", True),
+    "newest": ("created_at", True),
+    "oldest": ("created_at", False),
+    "rating": ("seller_rating", True),
+    "stock": ("available", True),
+}
+
+
+def encode_cursor(sort: str, value: Any, uid: str) -> str:
+    raw = json.dumps([sort, value, uid], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Optional[Tuple[Any, str]]:
+    """(sort value, uid) from a cursor, or None if it is malformed or for another sort"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, uid = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if cursor_sort != sort or not isinstance(uid, str) or not isinstance(value, (int, float)):
+        return None
+    return value, uid
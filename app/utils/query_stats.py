@@ -0,0 +1,342 @@
+"""
+Per-request Cypher instrumentation.
+
+Every statement that goes through neomodel (db.cypher_query) or through the
+driver returned by get_db() (session.run / tx.run) is counted against the
+request currently being served: number of statements, time spent in the
+database, and rows returned. When the same query shape runs more than
+QUERY_REPEAT_WARN_THRESHOLD times in one request an N+1 warning is logged.
+Statements over the slow-query threshold also go to slow_query_log, whether
+or not they ran inside a request.
+
+Per-request stats live in a ContextVar, which Starlette copies into the
+threadpool that runs our sync route handlers.
+"""
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from ..config import settings
+from .slow_queries import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+# Normalizing the same statement text over and over is wasted work
+_shape_cache: Dict[str, str] = {}
+
+
+def query_shape(query: str) -> str:
+    """Collapse whitespace and literals so identical statements compare equal"""
+    shape = _shape_cache.get(query)
+    if shape is None:
+        shape = _STRING_LITERAL.sub("?", query)
+        shape = _NUMBER_LITERAL.sub("?", shape)
+        shape = _WHITESPACE.sub(" ", shape).strip()
+        if len(_shape_cache) < 2048:
+            _shape_cache[query] = shape
+    return shape
+
+
+class RequestQueryStats:
+    """Query counters for a single request"""
+
+    __slots__ = ("queries", "db_time", "rows", "shapes", "repeated")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.shapes: Dict[str, int] = {}
+        self.repeated = 0
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request() -> RequestQueryStats:
+    """Begin collecting query stats for the current request"""
+    stats = RequestQueryStats()
+    _current.set(stats)
+    return stats
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def record_query(query: str, seconds: float, rows: int = 0, params: Optional[Dict[str, Any]] = None,
+                 check_slow: bool = True):
+    """Count one executed statement against the current request.
+
+    check_slow=False when the rows are still to be fetched; the caller then
+    reports the full time through record_slow_query once they are.
+    """
+    if check_slow:
+        record_slow_query(query, seconds, params)
+
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_time += seconds
+    stats.rows += rows
+
+    shape = query_shape(query)
+    count = stats.shapes.get(shape, 0) + 1
+    stats.shapes[shape] = count
+    if count == settings.query_repeat_warn_threshold + 1:
+        stats.repeated += 1
+        logger.warning("Possible N+1: query shape ran %d+ times in one request: %.200s", count, shape)
+
+
+def record_slow_query(query: str, seconds: float, params: Optional[Dict[str, Any]] = None):
+    """Hand a statement to slow_query_log if it took at least the threshold"""
+    if seconds >= slow_query_log.threshold:
+        slow_query_log.record(query, query_shape(query), params, seconds)
+
+
+def record_rows(rows: int, seconds: float):
+    """Add rows (and the time spent fetching them) to the current request"""
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += rows
+        stats.db_time += seconds
+
+
+class RouteQueryTotals:
+    """Aggregated query stats for one route"""
+
+    __slots__ = ("requests", "queries", "db_time", "rows", "response_bytes", "repeated")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.response_bytes = 0
+        self.repeated = 0
+
+
+class QueryStatsRegistry:
+    """Process-wide totals per route, fed by QueryStatsMiddleware"""
+
+    def __init__(self):
+        self._routes: Dict[str, RouteQueryTotals] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, stats: RequestQueryStats, response_bytes: int):
+        with self._lock:
+            totals = self._routes.get(route)
+            if totals is None:
+                totals = self._routes[route] = RouteQueryTotals()
+            totals.requests += 1
+            totals.queries += stats.queries
+            totals.db_time += stats.db_time
+            totals.rows += stats.rows
+            totals.response_bytes += response_bytes
+            totals.repeated += stats.repeated
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                route: {
+                    "requests": t.requests,
+                    "queries": t.queries,
+                    "db_time_ms": round(t.db_time * 1000, 3),
+                    "rows": t.rows,
+                    "response_bytes": t.response_bytes,
+                    "n_plus_one_warnings": t.repeated,
+                    "avg_queries": round(t.queries / t.requests, 2),
+                    "avg_db_time_ms": round(t.db_time * 1000 / t.requests, 3),
+                }
+                for route, t in self._routes.items()
+            }
+
+    def prometheus_lines(self):
+        """Per-route query totals for the /metrics endpoint"""
+        from .metrics import format_labels
+
+        with self._lock:
+            routes = [(route, t.queries, t.db_time, t.rows, t.repeated) for route, t in self._routes.items()]
+        yield "# HELP db_queries_total Cypher statements executed, by route"
+        yield "# TYPE db_queries_total counter"
+        for route, queries, _, _, _ in routes:
+            yield f"db_queries_total{format_labels({'route': route})} {queries}"
+        yield "# HELP db_query_seconds_total Time spent in Cypher statements, by route"
+        yield "# TYPE db_query_seconds_total counter"
+        for route, _, db_time, _, _ in routes:
+            yield f"db_query_seconds_total{format_labels({'route': route})} {db_time}"
+        yield "# HELP db_rows_total Rows returned by Cypher statements, by route"
+        yield "# TYPE db_rows_total counter"
+        for route, _, _, rows, _ in routes:
+            yield f"db_rows_total{format_labels({'route': route})} {rows}"
+        yield "# HELP db_repeated_query_warnings_total Requests flagged as possible N+1, by route"
+        yield "# TYPE db_repeated_query_warnings_total counter"
+        for route, _, _, _, repeated in routes:
+            yield f"db_repeated_query_warnings_total{format_labels({'route': route})} {repeated}"
+
+
+query_stats_registry = QueryStatsRegistry()
+
+
+class InstrumentedResult:
+    """Wraps a neo4j Result to count fetched rows and fetch time.
+
+    tx.run() returns before the rows are streamed, so the statement is
+    checked against the slow-query threshold once the result is exhausted
+    or consumed, with the run and fetch time together.
+    """
+
+    def __init__(self, result, query: Optional[str] = None, params: Optional[Dict[str, Any]] = None,
+                 seconds: float = 0.0):
+        self._result = result
+        self._query = query
+        self._params = params
+        self._seconds = seconds
+        self._finished = False
+
+    def _finish(self):
+        if self._finished or self._query is None:
+            return
+        self._finished = True
+        record_slow_query(self._query, self._seconds, self._params)
+
+    def __iter__(self):
+        # Only time the fetches, not the caller's work between records
+        records = iter(self._result)
+        rows = 0
+        spent = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    record = next(records)
+                except StopIteration:
+                    spent += time.perf_counter() - start
+                    break
+                spent += time.perf_counter() - start
+                rows += 1
+                yield record
+        finally:
+            record_rows(rows, spent)
+            # Exhausted, or abandoned part way: either way no more fetch time
+            self._seconds += spent
+            self._finish()
+
+    def _timed(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        if value is None:
+            rows = 0
+        elif isinstance(value, list):
+            rows = len(value)
+        else:
+            rows = 1
+        spent = time.perf_counter() - start
+        record_rows(rows, spent)
+        self._seconds += spent
+        return value
+
+    def single(self, *args, **kwargs):
+        value = self._timed(self._result.single, *args, **kwargs)
+        self._finish()
+        return value
+
+    def data(self, *args, **kwargs):
+        value = self._timed(self._result.data, *args, **kwargs)
+        self._finish()
+        return value
+
+    def values(self, *args, **kwargs):
+        value = self._timed(self._result.values, *args, **kwargs)
+        self._finish()
+        return value
+
+    def fetch(self, n):
+        records = self._timed(self._result.fetch, n)
+        if len(records) < n:
+            self._finish()
+        return records
+
+    def consume(self):
+        start = time.perf_counter()
+        summary = self._result.consume()
+        self._seconds += time.perf_counter() - start
+        self._finish()
+        return summary
+
+    def __getattr__(self, name):
+        return getattr(self._result, name)
+
+
+class _InstrumentedRunner:
+    """Proxy for anything with .run() (sessions and transactions)"""
+
+    def __init__(self, target):
+        self._target = target
+
+    def run(self, query, parameters=None, **kwargs):
+        start = time.perf_counter()
+        result = self._target.run(query, parameters, **kwargs)
+        seconds = time.perf_counter() - start
+        params = parameters or kwargs
+        record_query(query, seconds, params=params, check_slow=False)
+        return InstrumentedResult(result, query, params, seconds)
+
+    def __enter__(self):
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._target.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+class InstrumentedSession(_InstrumentedRunner):
+    def begin_transaction(self, *args, **kwargs):
+        return _InstrumentedRunner(self._target.begin_transaction(*args, **kwargs))
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._target.execute_read(lambda tx, *a, **kw: work(_InstrumentedRunner(tx), *a, **kw), *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._target.execute_write(lambda tx, *a, **kw: work(_InstrumentedRunner(tx), *a, **kw), *args, **kwargs)
+
+
+class InstrumentedDriver:
+    """Proxy for a neo4j Driver whose sessions report to the current request"""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def session(self, *args, **kwargs):
+        return InstrumentedSession(self._driver.session(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+def instrument_neomodel():
+    """Route neomodel's db.cypher_query through the request counters (idempotent)"""
+    from neomodel import db
+
+    if getattr(db.cypher_query, "_instrumented", False):
+        return
+    original = db.cypher_query
+
+    def cypher_query(query, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        results, meta = original(query, params, *args, **kwargs)
+        record_query(query, time.perf_counter() - start, len(results), params)
+        return results, meta
+
+    cypher_query._instrumented = True
+    db.cypher_query = cypher_query
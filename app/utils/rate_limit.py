@@ -0,0 +1,195 @@
+"""
+Sliding-window rate limiting for the login endpoints.
+
+Each key (client IP or login email) keeps two fixed-window counters, the
+current one and the previous one. The sliding count is the current count
+plus the previous count weighted by how much of the previous window still
+overlaps the sliding window. That is three numbers per key, no timestamp
+log, and is accurate enough for throttling credential stuffing.
+
+The counters live in a pluggable backend (LOGIN_RATE_LIMIT_BACKEND).
+MemoryBackend, the default, is per-process and rejects attempts before any
+database or hashing work, but under gunicorn each worker keeps its own
+counters, so a client gets the limit once per worker it happens to reach.
+RepositoryBackend stores them through the repository, so with Neo4j every
+worker and replica counts against the same limit, for one write per
+attempt (rejected ones included) on the key's RateLimit node.
+
+Behind a reverse proxy the socket peer is the proxy, so the per-IP key comes
+from X-Forwarded-For, trusting only the TRUSTED_PROXY_HOPS entries the
+proxies appended (see client_ip).
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+from fastapi import HTTPException, Request, status
+from ..config import settings
+
+
+class RateLimitBackend(ABC):
+    """Storage interface for sliding-window counters"""
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window: float, now: float) -> float:
+        """Record one attempt for key.
+
+        Returns 0 if the attempt is allowed, otherwise the number of seconds
+        until it would be. Rejected attempts are not counted.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def reset(self, key: str):
+        """Forget all attempts recorded for key"""
+        raise NotImplementedError
+
+
+class _Window:
+    __slots__ = ("index", "current", "previous")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.current = 0
+        self.previous = 0
+
+
+class MemoryBackend(RateLimitBackend):
+    """In-process counters, swept of idle keys once max_keys is reached"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._windows: Dict[str, _Window] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> float:
+        index = int(now // window)
+        elapsed = now - index * window
+
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None:
+                if len(self._windows) >= self.max_keys:
+                    self._sweep(index)
+                entry = self._windows[key] = _Window(index)
+            elif entry.index != index:
+                entry.previous = entry.current if entry.index == index - 1 else 0
+                entry.current = 0
+                entry.index = index
+
+            weight = 1 - elapsed / window
+            if entry.previous * weight + entry.current < limit:
+                entry.current += 1
+                return 0.0
+            return retry_after(entry.current, entry.previous, limit, window, elapsed)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def _sweep(self, index: int):
+        # Keys untouched for two windows carry no weight any more
+        stale = [k for k, w in self._windows.items() if w.index < index - 1]
+        for k in stale:
+            del self._windows[k]
+
+
+class RepositoryBackend(RateLimitBackend):
+    """Counters stored by the repository (a RateLimit node per key in Neo4j)"""
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> float:
+        from ..repositories import get_repository
+        return get_repository().rate_limit_hit(key, limit, window, now)
+
+    def reset(self, key: str):
+        from ..repositories import get_repository
+        get_repository().rate_limit_reset(key)
+
+
+def retry_after(current: int, previous: int, limit: int, window: float, elapsed: float) -> float:
+    """Seconds until the weighted count of a rejected attempt drops below the limit"""
+    if current >= limit:
+        # Wait out this window, then until `current` (now the previous window) decays enough
+        seconds = (window - elapsed) + window * (1 - limit / current)
+    else:
+        seconds = window * (1 - (limit - current) / previous) - elapsed
+    return max(seconds, 0.001)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """Address of the client, as seen by the outermost of TRUSTED_PROXY_HOPS proxies
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so only the last TRUSTED_PROXY_HOPS entries can be
+    trusted; anything before them was sent by the client and may be forged.
+    """
+    hops = settings.trusted_proxy_hops
+    if hops > 0:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        if forwarded:
+            return forwarded[-min(hops, len(forwarded))]
+    return request.client.host if request.client else None
+
+
+class LoginRateLimiter:
+    """Per-IP and per-email limits on login attempts"""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        ip_limit: int,
+        ip_window: float,
+        email_limit: int,
+        email_window: float,
+    ):
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.ip_window = ip_window
+        self.email_limit = email_limit
+        self.email_window = email_window
+        self.blocked = {"ip": 0, "email": 0}
+
+    def check(self, client_ip: Optional[str], email: str):
+        """Count a login attempt, raising 429 with Retry-After if it is over a limit"""
+        now = time.time()
+        checks = [("email", f"login:email:{email.lower()}", self.email_limit, self.email_window)]
+        if client_ip:
+            checks.insert(0, ("ip", f"login:ip:{client_ip}", self.ip_limit, self.ip_window))
+
+        for scope, key, limit, window in checks:
+            if limit <= 0:
+                continue
+            retry_after = self.backend.hit(key, limit, window, now)
+            if retry_after > 0:
+                self.blocked[scope] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please try again later",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                )
+
+    def reset_email(self, email: str):
+        """Clear the per-email counter after a successful login"""
+        self.backend.reset(f"login:email:{email.lower()}")
+
+    def prometheus_lines(self):
+        """Blocked-attempt counters for the /metrics endpoint"""
+        yield "# HELP login_attempts_blocked_total Login attempts rejected by the rate limiter"
+        yield "# TYPE login_attempts_blocked_total counter"
+        for scope, count in self.blocked.items():
+            yield f'login_attempts_blocked_total{{scope="{scope}"}} {count}'
+
+
+login_rate_limiter = LoginRateLimiter(
+    backend=MemoryBackend() if settings.login_rate_limit_backend == "memory" else RepositoryBackend(),
+    ip_limit=settings.login_rate_limit_per_ip,
+    ip_window=settings.login_rate_limit_ip_window_seconds,
+    email_limit=settings.login_rate_limit_per_email,
+    email_window=settings.login_rate_limit_email_window_seconds,
+)
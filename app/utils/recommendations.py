@@ -0,0 +1,121 @@
+"""
+"Buyers also ordered" rankings: serving cache and periodic rebuild.
+
+CO_PURCHASED weights grow as orders are delivered (in the same transaction,
+see Repository.transition_orders). Serving a ranking is one bounded
+traversal; its top RECOMMENDATION_TOP_K (uid, score) pairs are then kept in
+ranking_cache for RECOMMENDATION_CACHE_TTL_SECONDS, and later requests only
+re-read those products by uid, so price and stock stay current while the
+ranking cost stays flat as order history grows.
+
+Incremental updates never subtract (a deleted delivered order keeps its
+weight), so CoPurchaseRebuilder recomputes every product's edges from the
+delivered orders every RECOMMENDATION_REBUILD_INTERVAL_HOURS, a page of
+RECOMMENDATION_REBUILD_BATCH_SIZE products per transaction.
+"""
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+from ..config import settings
+from ..repositories import get_repository
+from .cache import LRUCache
+
+Ranking = List[Tuple[str, int]]
+
+
+class CoPurchaseRebuilder:
+    """Background thread recomputing all CO_PURCHASED edges on an interval"""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.rebuilds_total = 0
+        self.errors_total = 0
+        self.last_rebuild_seconds = 0.0
+        self.last_edges = 0
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="co-purchase-rebuilder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def rebuild_all(self, progress=None) -> int:
+        """Recompute every product's edges, a page per transaction; returns edges written"""
+        repo = get_repository()
+        start = time.perf_counter()
+        after, products, edges = None, 0, 0
+        while not self._stop.is_set():
+            uids = repo.list_product_uids(after=after, limit=self.batch_size)
+            if not uids:
+                break
+            edges += repo.rebuild_co_purchases(uids)
+            products += len(uids)
+            after = uids[-1]
+            if progress:
+                progress(f"  {products} products, {edges} co-purchase edges")
+        self.rebuilds_total += 1
+        self.last_edges = edges
+        self.last_rebuild_seconds = time.perf_counter() - start
+        return edges
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                edges = self.rebuild_all()
+                print(f"Rebuilt {edges} co-purchase edges in {self.last_rebuild_seconds:.1f}s")
+            except Exception as e:
+                # Retried on the next tick; incremental updates keep serving meanwhile
+                self.errors_total += 1
+                print(f"Co-purchase rebuild failed: {e}")
+
+    def prometheus_lines(self):
+        """Rebuild counters for the /metrics endpoint"""
+        yield "# HELP co_purchase_rebuilds_total Completed co-purchase edge rebuilds"
+        yield "# TYPE co_purchase_rebuilds_total counter"
+        yield f"co_purchase_rebuilds_total {self.rebuilds_total}"
+        yield "# HELP co_purchase_rebuild_errors_total Co-purchase edge rebuilds that failed"
+        yield "# TYPE co_purchase_rebuild_errors_total counter"
+        yield f"co_purchase_rebuild_errors_total {self.errors_total}"
+        yield "# HELP co_purchase_rebuild_last_seconds Duration of the last co-purchase rebuild"
+        yield "# TYPE co_purchase_rebuild_last_seconds gauge"
+        yield f"co_purchase_rebuild_last_seconds {self.last_rebuild_seconds:.6f}"
+        yield "# HELP co_purchase_edges Edges written by the last co-purchase rebuild"
+        yield "# TYPE co_purchase_edges gauge"
+        yield f"co_purchase_edges {self.last_edges}"
+
+
+ranking_cache = LRUCache("recommendation_cache", "Recommendation ranking cache", max_entries=10_000,
+                         ttl=settings.recommendation_cache_ttl_seconds)
+
+co_purchase_rebuilder = CoPurchaseRebuilder(
+    interval=settings.recommendation_rebuild_interval_hours * 3600,
+    batch_size=settings.recommendation_rebuild_batch_size,
+)
+
+
+def ranked_products(kind: str, uid: str, load: Callable[[int], List[dict]]) -> List[dict]:
+    """Product records of a ranking, with `score`.
+
+    On a miss load(top_k) runs the traversal and its ranking is cached;
+    on a hit the ranked products are re-read by uid.
+    """
+    ranking = ranking_cache.get((kind, uid))
+    if ranking is None:
+        products = load(settings.recommendation_top_k)
+        ranking_cache.put((kind, uid), [(p["uid"], p["score"]) for p in products])
+        return products
+    scores = dict(ranking)
+    products = get_repository().get_products([product_uid for product_uid, _ in ranking])
+    for product in products:
+        product["score"] = scores[product["uid"]]
+    return products
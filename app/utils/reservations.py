@@ -0,0 +1,105 @@
+"""
+Expiry of inventory reservations.
+
+A pending order holds its quantity as a reservation until reserved_until
+(RESERVATION_TTL_MINUTES after it was placed). Confirming it turns the
+reservation into a sale; if nobody does, ReservationSweeper cancels the
+order, frees the stock and tells the buyer. Sweeps run on a daemon thread
+every RESERVATION_SWEEP_INTERVAL_SECONDS, one transaction per batch of
+RESERVATION_SWEEP_BATCH_SIZE orders, until no expired reservation is left.
+Running it in several processes is safe: each order is released once.
+"""
+import threading
+import time
+from typing import Optional
+from ..config import settings
+from ..repositories import get_repository
+
+
+class ReservationSweeper:
+    """Background thread releasing expired reservations in batches"""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.released_total = 0
+        self.sweeps_total = 0
+        self.errors_total = 0
+        self.last_sweep_seconds = 0.0
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def sweep_once(self) -> int:
+        """Release every expired reservation now; returns how many were released"""
+        repo = get_repository()
+        start = time.perf_counter()
+        released = 0
+        while not self._stop.is_set():
+            orders = repo.release_expired_reservations(self.batch_size)
+            for order in orders:
+                self._notify(repo, order)
+            released += len(orders)
+            if len(orders) < self.batch_size:
+                break
+        self.sweeps_total += 1
+        self.released_total += released
+        self.last_sweep_seconds = time.perf_counter() - start
+        return released
+
+    def _notify(self, repo, order: dict):
+        if not order["buyer_uid"]:
+            return
+        try:
+            repo.create_notification(
+                order["buyer_uid"],
+                "buyer",
+                "order_cancelled",
+                f"Your reservation for {order['fish_product_name'] or 'product'} expired and the order was cancelled."
+            )
+        except Exception as e:
+            print(f"Error creating notification: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                released = self.sweep_once()
+                if released:
+                    print(f"Released {released} expired reservations")
+            except Exception as e:
+                # Database hiccups are retried on the next tick
+                self.errors_total += 1
+                print(f"Reservation sweep failed: {e}")
+
+    def prometheus_lines(self):
+        """Sweeper counters for the /metrics endpoint"""
+        yield "# HELP reservations_released_total Pending orders cancelled because their reservation expired"
+        yield "# TYPE reservations_released_total counter"
+        yield f"reservations_released_total {self.released_total}"
+        yield "# HELP reservation_sweeps_total Completed reservation sweeps"
+        yield "# TYPE reservation_sweeps_total counter"
+        yield f"reservation_sweeps_total {self.sweeps_total}"
+        yield "# HELP reservation_sweep_errors_total Reservation sweeps that failed"
+        yield "# TYPE reservation_sweep_errors_total counter"
+        yield f"reservation_sweep_errors_total {self.errors_total}"
+        yield "# HELP reservation_sweep_last_seconds Duration of the last reservation sweep"
+        yield "# TYPE reservation_sweep_last_seconds gauge"
+        yield f"reservation_sweep_last_seconds {self.last_sweep_seconds:.6f}"
+
+
+reservation_sweeper = ReservationSweeper(
+    interval=settings.reservation_sweep_interval_seconds,
+    batch_size=settings.reservation_sweep_batch_size,
+)
@@ -0,0 +1,88 @@
+"""
+Fast JSON response path (FAST_JSON=true).
+
+Without it FastAPI takes whatever a route returns, dumps models back to
+dicts, validates them against response_model, converts the result to
+plain Python and finally encodes it with the stdlib json module. For big
+lists (products carrying base64 images, a seller's whole order history)
+that is most of the request's CPU time.
+
+model_response() replaces those steps with one validation pass and
+pydantic-core's JSON serializer. Model instances built by a controller are
+not validated again (pydantic never revalidates instances). Lists longer
+than FAST_JSON_STREAM_THRESHOLD are validated whole first, so an invalid
+row fails the request with a 500 before any bytes are sent, then
+serialized and sent in chunks, so the full document is never held in
+memory. Routes keep their response_model
+for the OpenAPI schema, and behave exactly as before with FAST_JSON off.
+
+FastJSONResponse is the app's default response class in fast mode and
+encodes everything else with orjson when it is installed.
+"""
+from typing import Any, Dict, Iterator, List, Tuple, Type
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from ..config import settings
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
+STREAM_CHUNK_SIZE = 200
+
+_adapters: Dict[Tuple[Type[BaseModel], bool], TypeAdapter] = {}
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _adapter(model: Type[BaseModel], many: bool) -> TypeAdapter:
+    key = (model, many)
+    adapter = _adapters.get(key)
+    if adapter is None:
+        adapter = _adapters[key] = TypeAdapter(List[model] if many else model)
+    return adapter
+
+
+def _stream_chunks(adapter: TypeAdapter, items: List[Any], chunk_size: int) -> Iterator[bytes]:
+    """JSON array of already validated items, chunk_size items at a time"""
+    yield b"["
+    for start in range(0, len(items), chunk_size):
+        chunk = adapter.dump_json(items[start:start + chunk_size])
+        # Each chunk serializes as "[...]"; strip the brackets and join with commas
+        yield (b"," if start else b"") + chunk[1:-1]
+    yield b"]"
+
+
+def model_response(content: Any, model: Type[BaseModel], status_code: int = 200):
+    """Serialize content (a model, dict, or list of them) as `model` JSON.
+
+    Returns content unchanged when FAST_JSON is off, so FastAPI's normal
+    response_model handling applies.
+    """
+    if not settings.fast_json:
+        return content
+
+    many = isinstance(content, list)
+    adapter = _adapter(model, many)
+    # Validated before the response starts: a streaming error could only cut the body short
+    validated = adapter.validate_python(content)
+    if many and len(validated) > settings.fast_json_stream_threshold:
+        return StreamingResponse(
+            _stream_chunks(adapter, validated, STREAM_CHUNK_SIZE),
+            status_code=status_code,
+            media_type="application/json",
+        )
+    return Response(
+        content=adapter.dump_json(validated),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
@@ -1,21 +1,23 @@
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any
-from jose import jwt, JWTError
-from passlib.context import CryptContext
+from typing import Dict, Any, Optional, Tuple
 from ..config import settings
-
-# Use pbkdf2_sha256 to avoid bcrypt C-extension issues and 72-byte limit
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+from .hashing import password_hasher
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
+    valid, _ = password_hasher.verify_and_update(plain_password, hashed_password)
+    return valid
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if the stored one uses an outdated work factor"""
+    return password_hasher.verify_and_update(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: timedelta = None) -> str:
@@ -28,12 +30,14 @@ def create_access_token(data: Dict[str, Any], expires_delta: timedelta = None) -
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
     
     to_encode.update({"exp": expire})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 
 def decode_access_token(token: str) -> Dict[str, Any]:
     """Decode and verify a JWT access token"""
+    from jose import jwt, JWTError
     try:
         payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
         return payload
@@ -0,0 +1,207 @@
+"""
+Slow-query log for Cypher statements.
+
+query_stats hands every statement slower than SLOW_QUERY_THRESHOLD_MS to
+slow_query_log, whatever path it came through (neomodel, db.cypher_query,
+session.run). For session.run / tx.run the time runs until the result is
+exhausted or consumed, since the rows stream after run() returns. Entries keep the statement text and
+redacted parameters (names and types only). They go to an in-memory ring
+buffer and, if SLOW_QUERY_LOG_FILE is set, to a rotating JSON-lines file.
+
+Plan capture is on demand. While profiling is enabled, the first slow
+occurrence of each query shape is re-run in a background thread: read-only
+statements with PROFILE, writes with EXPLAIN so nothing is executed twice.
+The plan summary is stored with the shape.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+from typing import Any, Deque, Dict, List, Optional
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_WRITE_CLAUSE = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DROP|LOAD\s+CSV|CALL)\b", re.IGNORECASE)
+_PLAN_PREFIX = re.compile(r"^\s*(PROFILE|EXPLAIN)\b", re.IGNORECASE)
+
+
+def redact_params(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Replace parameter values with their type names"""
+    if not params:
+        return {}
+    redacted = {}
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)):
+            redacted[key] = f"<{type(value).__name__}[{len(value)}]>"
+        else:
+            redacted[key] = f"<{type(value).__name__}>"
+    return redacted
+
+
+def summarize_plan(plan: Optional[Dict[str, Any]], depth: int = 0, lines: Optional[List[str]] = None) -> List[str]:
+    """Flatten a PROFILE/EXPLAIN plan tree into indented operator lines"""
+    if lines is None:
+        lines = []
+    if not plan:
+        return lines
+    operator = plan.get("operatorType", "?")
+    details = []
+    if "rows" in plan:
+        details.append(f"rows={plan['rows']}")
+    if "dbHits" in plan:
+        details.append(f"dbHits={plan['dbHits']}")
+    args = plan.get("args") or {}
+    if "EstimatedRows" in args:
+        details.append(f"est={args['EstimatedRows']:.0f}")
+    if args.get("Details"):
+        details.append(str(args["Details"])[:120])
+    lines.append("  " * depth + operator + (f" ({', '.join(details)})" if details else ""))
+    for child in plan.get("children") or []:
+        summarize_plan(child, depth + 1, lines)
+    return lines
+
+
+def _total_db_hits(plan: Optional[Dict[str, Any]]) -> int:
+    if not plan:
+        return 0
+    return plan.get("dbHits", 0) + sum(_total_db_hits(c) for c in plan.get("children") or [])
+
+
+class SlowQueryShape:
+    """Aggregate for one normalized statement"""
+
+    __slots__ = ("shape", "count", "total_time", "max_time", "last_seen", "last_params", "plan", "plan_mode", "db_hits")
+
+    def __init__(self, shape: str):
+        self.shape = shape
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_seen = 0.0
+        self.last_params: Dict[str, str] = {}
+        self.plan: Optional[List[str]] = None
+        self.plan_mode: Optional[str] = None
+        self.db_hits: Optional[int] = None
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements plus per-shape aggregates"""
+
+    def __init__(self, threshold_ms: float, capacity: int, log_file: Optional[str] = None, max_shapes: int = 500):
+        self.threshold = threshold_ms / 1000
+        self.entries: Deque[dict] = deque(maxlen=capacity)
+        self.max_shapes = max_shapes
+        self.profiling = False
+        self._shapes: Dict[str, SlowQueryShape] = {}
+        self._lock = threading.Lock()
+        self._profiler: Optional[ThreadPoolExecutor] = None
+        self._file_logger: Optional[logging.Logger] = None
+        if log_file:
+            self._file_logger = logging.getLogger("isdamarket.slow_queries.file")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024, backupCount=3))
+
+    def record(self, query: str, shape: str, params: Optional[Dict[str, Any]], seconds: float):
+        """Store one slow statement (callers check the threshold first)"""
+        if _PLAN_PREFIX.match(query):
+            return
+        redacted = redact_params(params)
+        now = time.time()
+        entry = {
+            "shape": shape,
+            "duration_ms": round(seconds * 1000, 2),
+            "params": redacted,
+            "at": now,
+        }
+
+        capture = False
+        with self._lock:
+            self.entries.append(entry)
+            aggregate = self._shapes.get(shape)
+            if aggregate is None:
+                if len(self._shapes) >= self.max_shapes:
+                    # Forget the shape seen least recently
+                    oldest = min(self._shapes.values(), key=lambda s: s.last_seen)
+                    del self._shapes[oldest.shape]
+                aggregate = self._shapes[shape] = SlowQueryShape(shape)
+            aggregate.count += 1
+            aggregate.total_time += seconds
+            aggregate.max_time = max(aggregate.max_time, seconds)
+            aggregate.last_seen = now
+            aggregate.last_params = redacted
+            if self.profiling and aggregate.plan_mode is None:
+                aggregate.plan_mode = "pending"
+                capture = True
+                if self._profiler is None:
+                    self._profiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cypher-profile")
+
+        logger.warning("Slow Cypher (%.1f ms): %.300s params=%s", seconds * 1000, shape, redacted)
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(entry))
+        if capture:
+            self._profiler.submit(self._run_plan, aggregate, query, dict(params or {}))
+
+    def _run_plan(self, aggregate: SlowQueryShape, query: str, params: Dict[str, Any]):
+        from ..database import get_db
+
+        mode = "EXPLAIN" if _WRITE_CLAUSE.search(query) else "PROFILE"
+        try:
+            with get_db().session() as session:
+                summary = session.run(f"{mode} {query}", params).consume()
+            plan = summary.profile if mode == "PROFILE" else summary.plan
+            with self._lock:
+                aggregate.plan = summarize_plan(plan)
+                aggregate.plan_mode = mode
+                aggregate.db_hits = _total_db_hits(plan) if mode == "PROFILE" else None
+        except Exception as e:
+            with self._lock:
+                aggregate.plan = [f"plan capture failed: {e}"]
+                aggregate.plan_mode = "error"
+
+    def set_profiling(self, enabled: bool, reset_plans: bool = False):
+        """Turn on-demand plan capture on or off"""
+        with self._lock:
+            self.profiling = enabled
+            if reset_plans:
+                for aggregate in self._shapes.values():
+                    aggregate.plan = None
+                    aggregate.plan_mode = None
+                    aggregate.db_hits = None
+
+    def top(self, limit: int = 10, order_by: str = "max") -> List[dict]:
+        """Slowest shapes, by max or total time"""
+        key = (lambda s: s.total_time) if order_by == "total" else (lambda s: s.max_time)
+        with self._lock:
+            shapes = sorted(self._shapes.values(), key=key, reverse=True)[:limit]
+            return [
+                {
+                    "shape": s.shape,
+                    "count": s.count,
+                    "max_ms": round(s.max_time * 1000, 2),
+                    "avg_ms": round(s.total_time * 1000 / s.count, 2),
+                    "total_ms": round(s.total_time * 1000, 2),
+                    "last_seen": s.last_seen,
+                    "last_params": s.last_params,
+                    "plan_mode": s.plan_mode,
+                    "db_hits": s.db_hits,
+                    "plan": s.plan,
+                }
+                for s in shapes
+            ]
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            return list(self.entries)[-limit:][::-1]
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    capacity=settings.slow_query_buffer_size,
+    log_file=settings.slow_query_log_file,
+)
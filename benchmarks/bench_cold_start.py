@@ -0,0 +1,128 @@
+"""
+Cold start: what importing the app costs and how long until it first answers.
+
+Two measurements, each in fresh processes so nothing is cached between runs:
+
+- import time: `python -X importtime -c "import app.main"`, grouped by
+  package (fastapi/starlette, pydantic, neo4j, neomodel, jose, passlib, the
+  app's own modules, ...) so a dependency that starts loading at import time
+  shows up as its own row
+- time to first response: start uvicorn on the app (memory backend, so
+  Neo4j is not part of the number) and time the first 200 from /healthz,
+  /readyz and a catalog read
+
+Prints the median over --runs. Track both across releases; on a
+scale-to-zero host the second is latency the first visitor sees.
+
+Usage:
+    python -m benchmarks.bench_cold_start --runs 5
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import requests
+
+from .bench_workers import ROOT, free_port
+
+# Import time is charged to the first group whose prefix matches the module
+GROUPS = [
+    ("app", ("app",)),
+    ("fastapi/starlette", ("fastapi", "starlette")),
+    ("pydantic", ("pydantic", "pydantic_core", "pydantic_settings", "annotated_types", "email_validator")),
+    ("neo4j", ("neo4j",)),
+    ("neomodel", ("neomodel",)),
+    ("jose", ("jose", "ecdsa", "rsa", "pyasn1")),
+    ("passlib", ("passlib",)),
+    ("anyio/asyncio", ("anyio", "asyncio", "sniffio")),
+    ("dotenv", ("dotenv",)),
+]
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+ENV = dict(os.environ, REPOSITORY_BACKEND="memory", JWT_SECRET_KEY=os.environ.get("JWT_SECRET_KEY", "benchmark"),
+           JOB_WORKERS="0", RESERVATION_SWEEP_INTERVAL_SECONDS="0", RECOMMENDATION_REBUILD_INTERVAL_HOURS="0",
+           PASSWORD_HASH_WORKERS="0")
+
+
+def group_of(module: str) -> str:
+    top = module.split(".")[0]
+    for name, prefixes in GROUPS:
+        if top in prefixes:
+            return name
+    return "other"
+
+
+def import_breakdown() -> Dict[str, float]:
+    """Milliseconds of self import time per group, plus the total"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            cwd=ROOT, env=ENV, capture_output=True, text=True, check=True)
+    groups = defaultdict(float)
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            groups[group_of(module)] += int(self_us) / 1000
+            if module == "app.main" and len(indent) == 1:
+                groups["total"] = int(cumulative_us) / 1000
+    return groups
+
+
+def first_responses(paths: List[str]) -> Dict[str, float]:
+    """Seconds from spawning uvicorn until each path first returns 200"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--no-access-log"],
+        cwd=ROOT, env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    timings = {}
+    try:
+        deadline = start + 60
+        for path in paths:
+            while time.perf_counter() < deadline:
+                try:
+                    if requests.get(f"http://127.0.0.1:{port}{path}", timeout=1).status_code == 200:
+                        timings[path] = time.perf_counter() - start
+                        break
+                except requests.RequestException:
+                    pass
+                time.sleep(0.005)
+            else:
+                raise RuntimeError(f"{path} did not answer within 60s")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [import_breakdown() for _ in range(args.runs)]
+    print(f"import app.main, median of {args.runs} runs (self time per group)")
+    print(f"{'group':<20}{'ms':>9}")
+    names = sorted({name for run in imports for name in run if name != "total"},
+                   key=lambda name: -statistics.median(run.get(name, 0) for run in imports))
+    for name in names:
+        print(f"{name:<20}{statistics.median(run.get(name, 0) for run in imports):>9.1f}")
+    print(f"{'total':<20}{statistics.median(run['total'] for run in imports):>9.1f}")
+
+    paths = ["/healthz", "/readyz", "/products/?limit=20"]
+    starts = [first_responses(paths) for _ in range(args.runs)]
+    print()
+    print(f"time to first 200 from process start, median of {args.runs} runs")
+    print(f"{'path':<24}{'ms':>9}")
+    for path in paths:
+        print(f"{path:<24}{statistics.median(run[path] for run in starts) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
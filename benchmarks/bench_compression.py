@@ -0,0 +1,123 @@
+"""
+CPU vs bandwidth tradeoff of response compression on product payloads.
+
+Builds the real FishProductController responses (the product list and a
+single product, base64 images included) from a synthetic marketplace on the
+memory backend, then for each codec and level reports compression time,
+size, and the estimated time to deliver the body (compress + transfer) at a
+few link speeds. The last table goes through the app with Accept-Encoding,
+first with an empty compressed-body cache and then with a warm one.
+
+Usage:
+    python -m benchmarks.bench_compression --products 500 --image-bytes 8192
+"""
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+
+from .bench_inprocess import call
+from .fixtures import MarketplaceSize, generate_marketplace
+from app.controllers import FishProductController
+from app.repositories import MemoryRepository, set_repository
+from app.schemas import FishProductResponse
+from app.utils.compression import brotli, compress, compressed_body_cache
+from app.utils.responses import _adapter
+
+# Link speeds in Mbit/s: slow mobile, typical mobile, broadband
+LINKS = (2, 20, 100)
+
+
+def codecs() -> List[Tuple[str, str, dict]]:
+    options = [
+        ("gzip-1", "gzip", {"gzip_level": 1}),
+        ("gzip-6", "gzip", {"gzip_level": 6}),
+        ("gzip-9", "gzip", {"gzip_level": 9}),
+    ]
+    if brotli is not None:
+        options += [
+            ("br-1", "br", {"brotli_quality": 1}),
+            ("br-4", "br", {"brotli_quality": 4}),
+            ("br-11", "br", {"brotli_quality": 11}),
+        ]
+    return options
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, body: bytes, repeat: int):
+    links = "".join(f"{f'@{mbit}Mbit ms':>14}" for mbit in LINKS)
+    print(f"\n{label}: {len(body)} bytes")
+    print(f"{'codec':<10}{'bytes':>12}{'ratio':>8}{'cpu ms':>9}{'MB/s':>8}{links}")
+    transfer = lambda size, mbit: size * 8 / (mbit * 1_000_000) * 1000  # noqa: E731
+    print(f"{'identity':<10}{len(body):>12}{1:>8.2f}{0:>9.2f}{'-':>8}"
+          + "".join(f"{transfer(len(body), mbit):>14.1f}" for mbit in LINKS))
+    for name, encoding, options in codecs():
+        compressed = compress(body, encoding, **options)
+        seconds = best_of(lambda: compress(body, encoding, **options), repeat)
+        ms = seconds * 1000
+        print(f"{name:<10}{len(compressed):>12}{len(body) / len(compressed):>8.2f}{ms:>9.2f}"
+              f"{len(body) / seconds / 1e6:>8.0f}"
+              + "".join(f"{ms + transfer(len(compressed), mbit):>14.1f}" for mbit in LINKS))
+
+
+async def time_route(path: str, headers: dict, requests: int) -> Tuple[float, int]:
+    size = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        _, body = await call("GET", path, headers=headers)
+        size = len(body)
+    return (time.perf_counter() - start) / requests, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--sellers", type=int, default=20)
+    parser.add_argument("--image-bytes", type=int, default=8 * 1024)
+    parser.add_argument("--repeat", type=int, default=5, help="best-of runs per codec")
+    parser.add_argument("--requests", type=int, default=20, help="requests per mode through the app")
+    args = parser.parse_args()
+
+    market = generate_marketplace(MarketplaceSize(sellers=args.sellers, products=args.products, orders=0,
+                                                  image_bytes=args.image_bytes), password_hash="")
+    set_repository(MemoryRepository().load(market))
+
+    products = FishProductController.get_all_products()
+    list_body = _adapter(FishProductResponse, True).dump_json(products)
+    item_body = _adapter(FishProductResponse, False).dump_json(products[0])
+    no_images = _adapter(FishProductResponse, True).dump_json([p.model_copy(update={"image": ""}) for p in products])
+
+    if brotli is None:
+        print("brotli not installed, gzip only (pip install brotli)")
+    report(f"GET /products/ ({len(products)} products)", list_body, args.repeat)
+    report("GET /products/{uid}", item_body, args.repeat)
+    report(f"GET /products/ without images", no_images, args.repeat)
+
+    print(f"\nThrough the app, GET /products/ ({args.requests} requests per mode)")
+    print(f"{'mode':<24}{'ms/request':>12}{'bytes':>12}")
+    modes = [("identity", {}, False)]
+    for encoding in ("gzip",) + (("br",) if brotli is not None else ()):
+        modes += [(f"{encoding}, cold cache", {"Accept-Encoding": encoding}, True),
+                  (f"{encoding}, warm cache", {"Accept-Encoding": encoding}, False)]
+    for label, headers, cold in modes:
+        if cold:
+            # Measure compression on every request, not just the first
+            compressed_body_cache.max_bytes, saved = 0, compressed_body_cache.max_bytes
+        compressed_body_cache.clear()
+        asyncio.run(time_route("/products/", headers, 1))
+        seconds, size = asyncio.run(time_route("/products/", headers, args.requests))
+        if cold:
+            compressed_body_cache.max_bytes = saved
+        print(f"{label:<24}{seconds * 1000:>12.2f}{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark the API in-process on the memory backend.
+
+Loads a synthetic marketplace into MemoryRepository and drives the real
+FastAPI app through ASGI calls (no sockets, no Neo4j). What is left is the
+CPU cost of routing, validation, controllers and serialization, which is
+what this is for: comparing handler and serialization changes, and
+profiling with --profile.
+
+Usage:
+    python -m benchmarks.bench_inprocess --requests 2000
+    python -m benchmarks.bench_inprocess --only "GET /products/" --profile products.prof
+"""
+import argparse
+import asyncio
+import cProfile
+import json
+import os
+import random
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode
+
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+os.environ.setdefault("NEO4J_USER", "neo4j")
+os.environ.setdefault("NEO4J_PASSWORD", "benchmark")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+os.environ["REPOSITORY_BACKEND"] = "memory"
+
+from app.main import app  # noqa: E402
+from app.repositories import MemoryRepository, set_repository  # noqa: E402
+from .fixtures import Marketplace, MarketplaceSize, generate_marketplace  # noqa: E402
+
+
+async def call(method: str, path: str, params: Optional[dict] = None, body: Optional[dict] = None,
+               headers: Optional[dict] = None) -> Tuple[int, bytes]:
+    """Run one request through the ASGI app, return (status, response body)"""
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode())]
+                   + [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    sent = False
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            # Like a real server, only report a disconnect when the client goes away
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def build_cases(market: Marketplace, rng: random.Random) -> List[Tuple[str, callable]]:
+    seller = lambda: rng.choice(market.sellers)["uid"]  # noqa: E731
+    buyer = lambda: rng.choice(market.buyers)["uid"]  # noqa: E731
+    product = lambda: rng.choice(market.products)["uid"]  # noqa: E731
+    return [
+        ("GET /products/", lambda: ("GET", "/products/", None, None)),
+        ("GET /products/?filters", lambda: ("GET", "/products/", {"name": "bangus", "max_price": 600}, None)),
+        ("GET /products/{uid}", lambda: ("GET", f"/products/{product()}", None, None)),
+        ("GET /products/?sort=price", lambda: ("GET", "/products/", {"sort": "price", "limit": 50}, None)),
+        ("GET /products/facets", lambda: ("GET", "/products/facets", {"max_price": 600}, None)),
+        ("GET /products/nearby", lambda: ("GET", "/products/nearby", {"lat": 14.5995, "lon": 120.9842}, None)),
+        ("GET /products/{uid}/related", lambda: ("GET", f"/products/{product()}/related", None, None)),
+        ("GET /buyers/{uid}/recommended", lambda: ("GET", f"/buyers/{buyer()}/recommended", None, None)),
+        ("GET /sellers/{uid}", lambda: ("GET", f"/sellers/{seller()}", None, None)),
+        ("GET /orders/seller/{uid}", lambda: ("GET", f"/orders/seller/{seller()}", None, None)),
+        ("GET /sellers/{uid}/analytics", lambda: ("GET", f"/sellers/{seller()}/analytics", None, None)),
+        ("GET /orders/buyer/{uid}", lambda: ("GET", f"/orders/buyer/{buyer()}", None, None)),
+        ("GET /reviews/seller/{uid}", lambda: ("GET", f"/reviews/seller/{seller()}", None, None)),
+        ("GET /notifications/buyer/{uid}", lambda: ("GET", f"/notifications/buyer/{buyer()}", None, None)),
+        ("GET /search", lambda: ("GET", "/search", {"query": "tila", "search_type": "products"}, None)),
+        ("POST /orders/", lambda: ("POST", "/orders/", None,
+                                   {"buyer_uid": buyer(), "fish_product_uid": product(), "quantity": 1})),
+    ]
+
+
+async def run_case(make_request, requests: int) -> Tuple[float, int, int]:
+    errors = 0
+    size = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        status, body = await call(*make_request())
+        size = len(body)
+        if status >= 500:
+            errors += 1
+    return time.perf_counter() - start, errors, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per route")
+    parser.add_argument("--sellers", type=int, default=50)
+    parser.add_argument("--buyers", type=int, default=500)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--image-bytes", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="run a single route label")
+    parser.add_argument("--profile", metavar="FILE", help="write cProfile stats for the run")
+    args = parser.parse_args()
+
+    size = MarketplaceSize(sellers=args.sellers, buyers=args.buyers, products=args.products,
+                           orders=args.orders, image_bytes=args.image_bytes, seed=args.seed)
+    start = time.perf_counter()
+    market = generate_marketplace(size, password_hash="")
+    set_repository(MemoryRepository().load(market))
+    print(f"Loaded marketplace in {time.perf_counter() - start:.2f}s")
+
+    cases = build_cases(market, random.Random(args.seed))
+    if args.only:
+        cases = [case for case in cases if case[0] == args.only]
+
+    profiler = cProfile.Profile() if args.profile else None
+    print(f"{'route':<34}{'µs/req':>10}{'req/s':>10}{'bytes':>10}{'5xx':>6}")
+    for label, make_request in cases:
+        asyncio.run(run_case(make_request, min(50, args.requests)))  # warm up
+        if profiler:
+            profiler.enable()
+        elapsed, errors, body_size = asyncio.run(run_case(make_request, args.requests))
+        if profiler:
+            profiler.disable()
+        per_request = elapsed / args.requests
+        print(f"{label:<34}{per_request * 1e6:>10.0f}{1 / per_request:>10.0f}{body_size:>10}{errors:>6}")
+
+    if profiler:
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile written to {args.profile} (python -m pstats {args.profile})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark the product and order list endpoints with FAST_JSON off and on.
+
+Runs in-process on the memory backend (see bench_inprocess.py), so the
+numbers are handler plus serialization cost only. Both modes must return
+the same JSON; the script checks that before timing.
+
+Usage:
+    python -m benchmarks.bench_json_responses --products 2000 --image-bytes 8192
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Tuple
+
+from .bench_inprocess import call
+from .fixtures import MarketplaceSize, generate_marketplace
+from app.config import settings
+from app.repositories import MemoryRepository, set_repository
+
+
+async def time_route(path: str, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call("GET", path)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="requests per route and mode")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--sellers", type=int, default=20)
+    parser.add_argument("--image-bytes", type=int, default=8 * 1024)
+    args = parser.parse_args()
+
+    market = generate_marketplace(MarketplaceSize(sellers=args.sellers, products=args.products,
+                                                  orders=args.orders, image_bytes=args.image_bytes), password_hash="")
+    set_repository(MemoryRepository().load(market))
+    busiest = max(market.sellers, key=lambda s: sum(o["seller_uid"] == s["uid"] for o in market.orders))
+    routes: List[Tuple[str, str]] = [
+        ("GET /products/", "/products/"),
+        ("GET /orders/seller/{uid}", f"/orders/seller/{busiest['uid']}"),
+        ("GET /orders/", "/orders/"),
+    ]
+
+    results = {}
+    for fast in (False, True):
+        settings.fast_json = fast
+        for label, path in routes:
+            results[(label, fast)] = asyncio.run(call("GET", path))[1]
+    for label, _ in routes:
+        if json.loads(results[(label, False)]) != json.loads(results[(label, True)]):
+            raise SystemExit(f"{label}: FAST_JSON output differs from the default path")
+
+    print(f"{'route':<28}{'bytes':>12}{'default ms':>12}{'fast ms':>10}{'speedup':>9}")
+    for label, path in routes:
+        timings = {}
+        for fast in (False, True):
+            settings.fast_json = fast
+            asyncio.run(time_route(path, 2))  # warm up
+            timings[fast] = asyncio.run(time_route(path, args.requests))
+        size = len(results[(label, True)])
+        print(f"{label:<28}{size:>12}{timings[False] * 1000:>12.2f}{timings[True] * 1000:>10.2f}"
+              f"{timings[False] / timings[True]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
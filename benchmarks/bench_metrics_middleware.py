@@ -0,0 +1,82 @@
+"""
+Benchmark the per-request overhead of MetricsMiddleware.
+
+Drives a trivial ASGI app directly (no sockets, no HTTP parsing) with and
+without the middleware and reports the difference per request. The target
+is under 50µs per request.
+
+Usage:
+    python -m benchmarks.bench_metrics_middleware --requests 100000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+os.environ.setdefault("NEO4J_USER", "neo4j")
+os.environ.setdefault("NEO4J_PASSWORD", "benchmark")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from app.middleware.metrics import MetricsMiddleware  # noqa: E402
+from app.utils.metrics import MetricsRegistry  # noqa: E402
+
+BUDGET_US = 50.0
+
+
+class FakeRoute:
+    path = "/products/{product_uid}"
+
+
+ROUTE = FakeRoute()
+START = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/products/abc"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    wrapped = MetricsMiddleware(endpoint, registry=MetricsRegistry())
+
+    async def best_of(app):
+        await drive(app, 1000)  # warm up
+        return min([await drive(app, args.requests) for _ in range(args.repeat)])
+
+    base = asyncio.run(best_of(endpoint))
+    with_metrics = asyncio.run(best_of(wrapped))
+    overhead_us = (with_metrics - base) / args.requests * 1e6
+
+    print(f"bare app:        {base / args.requests * 1e6:8.2f} µs/request")
+    print(f"with metrics:    {with_metrics / args.requests * 1e6:8.2f} µs/request")
+    print(f"overhead:        {overhead_us:8.2f} µs/request (budget {BUDGET_US:.0f} µs)")
+    if overhead_us > BUDGET_US:
+        raise SystemExit("metrics middleware is over budget")
+
+
+if __name__ == "__main__":
+    main()
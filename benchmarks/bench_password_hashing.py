@@ -0,0 +1,65 @@
+"""
+Benchmark login password verification throughput.
+
+Compares verifying on the calling thread (the old behaviour) with the
+process-pool PasswordHasher, driving both from a pool of request threads the
+way uvicorn's threadpool does.
+
+Usage:
+    python -m benchmarks.bench_password_hashing --requests 400 --threads 40
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The app settings require these; the benchmark never touches the database
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+os.environ.setdefault("NEO4J_USER", "neo4j")
+os.environ.setdefault("NEO4J_PASSWORD", "benchmark")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from app.utils.hashing import PasswordHasher, build_context  # noqa: E402
+
+
+def run(hasher: PasswordHasher, hashed: str, requests: int, threads: int) -> float:
+    """Verify `requests` logins from `threads` threads, return logins/sec"""
+    def login(_):
+        valid, _ = hasher.verify_and_update("correct horse", hashed)
+        assert valid
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(login, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=29000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    hashed = build_context(args.rounds).hash("correct horse")
+
+    print(f"pbkdf2_sha256 rounds={args.rounds}, {args.requests} logins from {args.threads} threads")
+    print(f"{'mode':<22}{'workers':>8}{'logins/s':>12}{'per core':>12}")
+
+    inline = PasswordHasher(rounds=args.rounds, workers=0, max_pending=args.requests, timeout=60)
+    rate = run(inline, hashed, args.requests, args.threads)
+    print(f"{'inline (GIL-bound)':<22}{1:>8}{rate:>12.1f}{rate:>12.1f}")
+
+    workers = 1
+    while workers <= args.workers:
+        pooled = PasswordHasher(rounds=args.rounds, workers=workers, max_pending=args.requests, timeout=60)
+        run(pooled, hashed, workers, workers)  # warm up the worker processes
+        rate = run(pooled, hashed, args.requests, args.threads)
+        pooled.shutdown()
+        print(f"{'process pool':<22}{workers:>8}{rate:>12.1f}{rate / workers:>12.1f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
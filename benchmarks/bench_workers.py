@@ -0,0 +1,124 @@
+"""
+Throughput of the production server profile as gunicorn workers are added.
+
+Starts `gunicorn benchmarks.server_app:app` (gunicorn.conf.py, memory
+backend, same marketplace in every worker) once per worker count and drives
+catalog reads over HTTP from separate client processes, so the client is not
+what saturates first. Prints req/s, p50/p95 latency and the speedup over the
+first worker count. Scaling stops at the number of cores the server and the
+clients share; run it on the production instance size.
+
+Usage:
+    python -m benchmarks.bench_workers --workers 1,2,4 --duration 15
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+import requests
+
+from .fixtures import MarketplaceSize, generate_marketplace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request_paths(products: int, seed: int = 1) -> List[str]:
+    """Catalog reads against the marketplace server_app generates"""
+    market = generate_marketplace(MarketplaceSize(products=products, image_bytes=0), password_hash="")
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(500):
+        product, seller = rng.choice(market.products), rng.choice(market.sellers)
+        paths += [
+            f"/products/{product['uid']}",
+            f"/products/?type={product['type']}",
+            "/products/?sort=price&limit=20",
+            f"/sellers/{seller['uid']}",
+        ]
+    rng.shuffle(paths)
+    return paths
+
+
+def client(args: Tuple[str, List[str], float]) -> List[float]:
+    base_url, paths, duration = args
+    latencies = []
+    http = requests.Session()
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = http.get(base_url + paths[i % len(paths)], timeout=30)
+        if response.status_code < 400:
+            latencies.append(time.perf_counter() - start)
+        i += 1
+    return latencies
+
+
+def start_server(workers: int, port: int, products: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), REPOSITORY_BACKEND="memory", BENCH_PRODUCTS=str(products),
+               JOB_WORKERS="0", RESERVATION_SWEEP_INTERVAL_SECONDS="0", RECOMMENDATION_REBUILD_INTERVAL_HOURS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "benchmarks.server_app:app", "--config", "gunicorn.conf.py",
+         "--bind", f"127.0.0.1:{port}", "--access-logfile", os.devnull, "--max-requests", "0"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            # Every worker loads the fixtures; wait until one answers ready
+            if requests.get(f"http://127.0.0.1:{port}/readyz", timeout=1).status_code == 200:
+                time.sleep(min(workers, 5))
+                return server
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=0, help="client processes (default 4 per worker)")
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--products", type=int, default=1000)
+    args = parser.parse_args()
+
+    paths = request_paths(args.products)
+    print(f"{os.cpu_count()} CPU cores")
+    print(f"{'workers':>8}{'clients':>9}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'speedup':>9}")
+    baseline = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        port = free_port()
+        server = start_server(workers, port, args.products)
+        clients = args.clients or 4 * workers
+        try:
+            with multiprocessing.Pool(clients) as pool:
+                results = pool.map(client, [(f"http://127.0.0.1:{port}", paths[i::clients], args.duration)
+                                            for i in range(clients)])
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+        latencies = sorted(latency for result in results for latency in result)
+        rate = len(latencies) / args.duration
+        baseline = baseline or rate
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+        print(f"{workers:>8}{clients:>9}{rate:>10.0f}{p50:>9.1f}{p95:>9.1f}{rate / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Synthetic marketplace data for benchmarks.
+
+generate_marketplace() builds plain dicts shaped exactly like the nodes the
+app writes: neomodel nodes use hex uids and epoch-float timestamps, and raw
+Cypher nodes (Review, Message, Notification) use uuid4 strings and ISO
+timestamps. write_to_neo4j() loads them with UNWIND batches.
+"""
+import base64
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+FISH = [
+    ("Bangus", "Freshwater"), ("Tilapia", "Freshwater"), ("Hito", "Freshwater"),
+    ("Dalag", "Freshwater"), ("Galunggong", "Saltwater"), ("Tamban", "Saltwater"),
+    ("Lapu-lapu", "Saltwater"), ("Maya-maya", "Saltwater"), ("Tuna", "Saltwater"),
+    ("Tanigue", "Saltwater"), ("Alimango", "Shellfish"), ("Hipon", "Shellfish"),
+    ("Tahong", "Shellfish"), ("Talaba", "Shellfish"), ("Pusit", "Cephalopod"),
+]
+LOCATIONS = [
+    "Navotas", "Malabon", "Dagupan", "Bulan", "General Santos", "Iloilo City",
+    "Roxas City", "Zamboanga City", "Lucena", "Puerto Princesa", "Tacloban", "Cebu City",
+]
+STATUSES = ["pending", "confirmed", "processing", "shipped", "delivered", "delivered", "delivered", "cancelled"]
+
+
+@dataclass
+class MarketplaceSize:
+    sellers: int = 50
+    buyers: int = 500
+    products: int = 1000
+    orders: int = 5000
+    reviews: int = 1500
+    messages: int = 3000
+    notifications: int = 5000
+    image_bytes: int = 8 * 1024
+    seed: int = 42
+
+
+@dataclass
+class Marketplace:
+    sellers: List[dict] = field(default_factory=list)
+    buyers: List[dict] = field(default_factory=list)
+    products: List[dict] = field(default_factory=list)
+    orders: List[dict] = field(default_factory=list)
+    reviews: List[dict] = field(default_factory=list)
+    messages: List[dict] = field(default_factory=list)
+    notifications: List[dict] = field(default_factory=list)
+
+    def manifest(self, sample: int = 1000) -> Dict[str, List[str]]:
+        """uids the load generator can pick from"""
+        return {
+            "sellers": [s["uid"] for s in self.sellers[:sample]],
+            "buyers": [b["uid"] for b in self.buyers[:sample]],
+            "products": [p["uid"] for p in self.products[:sample]],
+            "orders": [o["uid"] for o in self.orders[:sample]],
+            "product_names": sorted({p["name"].split()[0] for p in self.products}),
+        }
+
+
+def _fake_image(rng: random.Random, size: int) -> str:
+    if size <= 0:
+        return ""
+    return "data:image/jpeg;base64," + base64.b64encode(rng.randbytes(size)).decode()
+
+
+def generate_marketplace(size: MarketplaceSize, password_hash: str) -> Marketplace:
+    """Build a deterministic synthetic marketplace"""
+    from app.utils.geo import geocode
+
+    rng = random.Random(size.seed)
+    now = datetime.now(timezone.utc)
+
+    def hex_uid():
+        return uuid.UUID(int=rng.getrandbits(128), version=4).hex
+
+    def str_uid():
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def past(days: int) -> datetime:
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    def past_iso(days: int) -> str:
+        # Raw-Cypher nodes store naive UTC isoformat(), like datetime.utcnow().isoformat()
+        return past(days).replace(tzinfo=None).isoformat()
+
+    m = Marketplace()
+    for i in range(size.sellers):
+        created = past(365)
+        location = rng.choice(LOCATIONS)
+        latitude, longitude = geocode(location)
+        m.sellers.append({
+            "uid": hex_uid(), "name": f"Seller {i}", "email": f"seller{i}@bench.example.com",
+            "contact_number": f"0917{i:07d}", "location": location, "latitude": latitude, "longitude": longitude,
+            "password_hash": password_hash, "profile_picture": "",
+            "created_at": created.timestamp(), "updated_at": created.timestamp(),
+        })
+    for i in range(size.buyers):
+        created = past(365)
+        m.buyers.append({
+            "uid": hex_uid(), "name": f"Buyer {i}", "email": f"buyer{i}@bench.example.com",
+            "contact_number": f"0918{i:07d}", "password_hash": password_hash, "profile_picture": "",
+            "created_at": created.timestamp(), "updated_at": created.timestamp(),
+        })
+    for i in range(size.products):
+        name, fish_type = rng.choice(FISH)
+        created = past(90)
+        m.products.append({
+            "uid": hex_uid(), "name": f"{name} #{i}", "type": fish_type,
+            "price": round(rng.uniform(80, 1200), 2), "quantity": rng.randint(0, 200),
+            "description": f"Fresh {name.lower()} caught this week", "image": _fake_image(rng, size.image_bytes),
+            "created_at": created.timestamp(), "updated_at": created.timestamp(),
+            "seller_uid": rng.choice(m.sellers)["uid"],
+        })
+    seller_of = {p["uid"]: p["seller_uid"] for p in m.products}
+    for _ in range(size.orders):
+        product = rng.choice(m.products)
+        quantity = rng.randint(1, 10)
+        created = past(180)
+        m.orders.append({
+            "uid": hex_uid(), "quantity": quantity, "total_price": round(product["price"] * quantity, 2),
+            "status": rng.choice(STATUSES), "created_at": created.timestamp(), "updated_at": created.timestamp(),
+            "buyer_uid": rng.choice(m.buyers)["uid"], "seller_uid": seller_of[product["uid"]],
+            "product_uid": product["uid"],
+        })
+    delivered = [o for o in m.orders if o["status"] == "delivered"]
+    for order in rng.sample(delivered, min(size.reviews, len(delivered))):
+        m.reviews.append({
+            "uid": str_uid(), "buyer_uid": order["buyer_uid"], "buyer_name": "Bench Buyer",
+            "seller_uid": order["seller_uid"], "order_uid": order["uid"], "rating": rng.randint(1, 5),
+            "comment": "Sariwa!", "created_at": past_iso(90),
+        })
+    for _ in range(size.messages):
+        buyer = rng.choice(m.buyers)
+        seller = rng.choice(m.sellers)
+        sender, recipient = (buyer, seller) if rng.random() < 0.5 else (seller, buyer)
+        m.messages.append({
+            "uid": str_uid(), "sender_uid": sender["uid"], "sender_type": "buyer" if sender is buyer else "seller",
+            "recipient_uid": recipient["uid"], "recipient_type": "seller" if sender is buyer else "buyer",
+            "message": "Available pa po ba?", "created_at": past_iso(30),
+        })
+    for _ in range(size.notifications):
+        if rng.random() < 0.5:
+            recipient_uid, recipient_type = rng.choice(m.sellers)["uid"], "seller"
+        else:
+            recipient_uid, recipient_type = rng.choice(m.buyers)["uid"], "buyer"
+        m.notifications.append({
+            "uid": str_uid(), "recipient_uid": recipient_uid, "recipient_type": recipient_type,
+            "type": rng.choice(["new_order", "order_approved", "new_message", "new_review"]),
+            "message": "Benchmark notification", "read": rng.random() < 0.7, "created_at": past_iso(30),
+        })
+    return m
+
+
+def _batches(rows: List[dict], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+SEED_QUERIES = {
+    "sellers": """
+        UNWIND $rows AS row
+        CREATE (s:Seller) SET s = row
+        SET s.point = point({latitude: row.latitude, longitude: row.longitude})
+        REMOVE s.latitude, s.longitude
+    """,
+    "buyers": "UNWIND $rows AS row CREATE (b:Buyer) SET b = row",
+    "products": """
+        UNWIND $rows AS row
+        MATCH (s:Seller {uid: row.seller_uid})
+        CREATE (p:FishProduct) SET p = row, p.available = row.quantity
+        REMOVE p.seller_uid
+        CREATE (p)-[:SOLD_BY]->(s)
+    """,
+    "orders": """
+        UNWIND $rows AS row
+        MATCH (b:Buyer {uid: row.buyer_uid})
+        MATCH (s:Seller {uid: row.seller_uid})
+        MATCH (p:FishProduct {uid: row.product_uid})
+        CREATE (o:Order) SET o = row
+        REMOVE o.buyer_uid, o.seller_uid
+        CREATE (o)-[:PLACED_BY]->(b), (o)-[:FULFILLED_BY]->(s), (o)-[:CONTAINS]->(p)
+    """,
+    "reviews": "UNWIND $rows AS row CREATE (r:Review) SET r = row",
+    "messages": "UNWIND $rows AS row CREATE (m:Message) SET m = row",
+    "notifications": "UNWIND $rows AS row CREATE (n:Notification) SET n = row",
+}
+
+BENCH_LABELS = ["Seller", "Buyer", "FishProduct", "Order", "Review", "Message", "Notification", "SellerDailyRollup"]
+
+
+def reset_database(driver, batch_size: int = 10_000):
+    """Delete every node with a marketplace label, in bounded batches"""
+    with driver.session() as session:
+        for label in BENCH_LABELS:
+            while True:
+                deleted = session.run(
+                    f"MATCH (n:{label}) WITH n LIMIT $limit DETACH DELETE n RETURN count(*) AS deleted",
+                    {"limit": batch_size},
+                ).single()["deleted"]
+                if deleted == 0:
+                    break
+
+
+def write_to_neo4j(driver, market: Marketplace, batch_size: int = 1000, progress=print):
+    """Load a generated marketplace with UNWIND batches"""
+    with driver.session() as session:
+        # Same constraint names neomodel's install_labels uses, so either can run first
+        for label in ("Seller", "Buyer", "FishProduct", "Order"):
+            session.run(
+                f"CREATE CONSTRAINT constraint_unique_{label}_uid IF NOT EXISTS "
+                f"FOR (n:{label}) REQUIRE n.uid IS UNIQUE"
+            ).consume()
+        for name, query in SEED_QUERIES.items():
+            rows = getattr(market, name)
+            for batch in _batches(rows, batch_size):
+                session.execute_write(lambda tx, b=batch: tx.run(query, {"rows": b}).consume())
+            progress(f"  {name:<14}{len(rows):>8}")
+        session.run("""
+            MATCH (s:Seller)
+            OPTIONAL MATCH (r:Review {seller_uid: s.uid})
+            WITH s, avg(r.rating) AS avg_rating, count(r) AS review_count
+            SET s.average_rating = avg_rating, s.review_count = review_count
+        """).consume()
+        session.run("""
+            MATCH (p:FishProduct)-[:SOLD_BY]->(s:Seller)
+            SET p.seller_rating = coalesce(s.average_rating, 0.0)
+        """).consume()
@@ -0,0 +1,223 @@
+"""
+End-to-end load test against a running IsdaMarket API.
+
+Run benchmarks.seed first. The manifest it writes supplies the uids. The
+load test runs weighted user scenarios from a pool of threads and reports
+p50/p95/p99 latency and throughput per route:
+
+    browse    product list, product detail, seller profile, seller reviews
+    search    /search and filtered /products
+    checkout  place an order, read it back, seller confirms it
+    inbox     notifications, conversations and order list polling
+
+Results can be saved as a named baseline and compared on later runs. A
+route whose p95 grows by more than --tolerance fails the run.
+
+Usage:
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load_test --duration 60 --concurrency 16 --save-baseline main
+    python -m benchmarks.load_test --duration 60 --concurrency 16 --compare main
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import requests
+
+from .seed import DEFAULT_MANIFEST
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_MIX = "browse=50,search=20,checkout=10,inbox=20"
+
+
+class Recorder:
+    """Thread-safe latency samples per route label"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def call(self, http: requests.Session, method: str, label: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = http.request(method, url, timeout=30, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.samples[label].append(elapsed)
+            if not ok:
+                self.errors[label] += 1
+        return response if ok else None
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Scenarios:
+    def __init__(self, base_url: str, manifest: dict, recorder: Recorder, rng: random.Random):
+        self.base = base_url.rstrip("/")
+        self.m = manifest
+        self.rec = recorder
+        self.rng = rng
+
+    def browse(self, http):
+        self.rec.call(http, "GET", "GET /products/", f"{self.base}/products/")
+        product = self.rng.choice(self.m["products"])
+        self.rec.call(http, "GET", "GET /products/{uid}", f"{self.base}/products/{product}")
+        seller = self.rng.choice(self.m["sellers"])
+        self.rec.call(http, "GET", "GET /sellers/{uid}", f"{self.base}/sellers/{seller}")
+        self.rec.call(http, "GET", "GET /reviews/seller/{uid}", f"{self.base}/reviews/seller/{seller}")
+
+    def search(self, http):
+        name = self.rng.choice(self.m["product_names"])
+        self.rec.call(http, "GET", "GET /search", f"{self.base}/search",
+                      params={"query": name[:4], "search_type": "products"})
+        self.rec.call(http, "GET", "GET /products/?filters", f"{self.base}/products/",
+                      params={"name": name, "max_price": self.rng.choice([300, 600, 1000])})
+
+    def checkout(self, http):
+        buyer = self.rng.choice(self.m["buyers"])
+        product = self.rng.choice(self.m["products"])
+        order = self.rec.call(http, "POST", "POST /orders/", f"{self.base}/orders/",
+                              json={"buyer_uid": buyer, "fish_product_uid": product, "quantity": 1})
+        if order is None:
+            return
+        order_uid = order.json()["uid"]
+        self.rec.call(http, "GET", "GET /orders/{uid}", f"{self.base}/orders/{order_uid}")
+        self.rec.call(http, "PATCH", "PATCH /orders/{uid}", f"{self.base}/orders/{order_uid}",
+                      json={"status": "confirmed"})
+
+    def inbox(self, http):
+        if self.rng.random() < 0.5:
+            buyer = self.rng.choice(self.m["buyers"])
+            self.rec.call(http, "GET", "GET /notifications/buyer/{uid}", f"{self.base}/notifications/buyer/{buyer}")
+            self.rec.call(http, "GET", "GET /messages/conversations/{uid}", f"{self.base}/messages/conversations/{buyer}")
+            self.rec.call(http, "GET", "GET /orders/buyer/{uid}", f"{self.base}/orders/buyer/{buyer}")
+        else:
+            seller = self.rng.choice(self.m["sellers"])
+            self.rec.call(http, "GET", "GET /notifications/seller/{uid}", f"{self.base}/notifications/seller/{seller}")
+            self.rec.call(http, "GET", "GET /messages/conversations/{uid}", f"{self.base}/messages/conversations/{seller}")
+            self.rec.call(http, "GET", "GET /orders/seller/{uid}", f"{self.base}/orders/seller/{seller}")
+
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    weights = []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights.append((name.strip(), int(weight)))
+    return weights
+
+
+def run(args, manifest: dict) -> Tuple[Recorder, float]:
+    recorder = Recorder()
+    mix = parse_mix(args.mix)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    deadline = time.perf_counter() + args.duration
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        scenarios = Scenarios(args.base_url, manifest, recorder, rng)
+        with requests.Session() as http:
+            while time.perf_counter() < deadline:
+                getattr(scenarios, rng.choices(names, weights)[0])(http)
+
+    threads = [threading.Thread(target=worker, args=(args.seed + i,)) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return recorder, time.perf_counter() - start
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, dict]:
+    summary = {}
+    for label, samples in sorted(recorder.samples.items()):
+        ordered = sorted(samples)
+        summary[label] = {
+            "count": len(ordered),
+            "errors": recorder.errors.get(label, 0),
+            "rps": round(len(ordered) / elapsed, 2),
+            "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        }
+    return summary
+
+
+def print_summary(summary: Dict[str, dict], elapsed: float):
+    print(f"{'route':<36}{'count':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    total = 0
+    for label, s in summary.items():
+        total += s["count"]
+        print(f"{label:<36}{s['count']:>8}{s['errors']:>6}{s['rps']:>9}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+    print(f"\n{total} requests in {elapsed:.1f}s = {total / elapsed:.1f} req/s")
+
+
+def compare(summary: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for label, s in summary.items():
+        base = baseline.get(label)
+        if not base or base["p95_ms"] <= 0:
+            continue
+        change = s["p95_ms"] / base["p95_ms"] - 1
+        marker = "REGRESSION" if change > tolerance else ""
+        print(f"{label:<36} p95 {base['p95_ms']:>9} -> {s['p95_ms']:>9} ms ({change:+.0%}) {marker}")
+        if marker:
+            regressions.append(label)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth before failing")
+    args = parser.parse_args()
+
+    with open(args.manifest) as fh:
+        manifest = json.load(fh)
+
+    print(f"Running {args.mix} against {args.base_url} for {args.duration:.0f}s with {args.concurrency} threads")
+    recorder, elapsed = run(args, manifest)
+    summary = summarize(recorder, elapsed)
+    print_summary(summary, elapsed)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as fh:
+            json.dump({"size": manifest.get("size"), "mix": args.mix, "concurrency": args.concurrency,
+                       "routes": summary}, fh, indent=2)
+        print(f"\nSaved baseline {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as fh:
+            baseline = json.load(fh)
+        print(f"\nCompared with baseline {args.compare}:")
+        regressions = compare(summary, baseline["routes"], args.tolerance)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} route(s) regressed beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
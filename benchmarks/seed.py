@@ -0,0 +1,77 @@
+"""
+Seed a local Neo4j instance with a synthetic marketplace.
+
+Uses NEO4J_URI / NEO4J_USER / NEO4J_PASSWORD from the environment (or .env)
+and refuses non-local URIs unless --allow-remote is given, since --reset
+deletes every marketplace node. The uids the load test needs are written to
+a manifest file.
+
+Usage:
+    python -m benchmarks.seed --reset --sellers 50 --products 1000 --orders 5000
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import fields
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+from .fixtures import MarketplaceSize, generate_marketplace, reset_database, write_to_neo4j
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(__file__), "seed_manifest.json")
+BENCH_PASSWORD = "benchpass123"
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for f in fields(MarketplaceSize):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=int, default=f.default)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--reset", action="store_true", help="delete existing marketplace nodes first")
+    parser.add_argument("--allow-remote", action="store_true", help="allow a non-local NEO4J_URI")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    args = parser.parse_args()
+
+    uri = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
+    host = urlparse(uri).hostname
+    if host not in ("localhost", "127.0.0.1", "neo4j") and not args.allow_remote:
+        raise SystemExit(f"Refusing to seed non-local database {host}; pass --allow-remote to override")
+
+    size = MarketplaceSize(**{f.name: getattr(args, f.name) for f in fields(MarketplaceSize)})
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    from app.utils.hashing import build_context
+    from app.config import settings
+    password_hash = build_context(settings.password_hash_rounds).hash(BENCH_PASSWORD)
+
+    start = time.perf_counter()
+    market = generate_marketplace(size, password_hash)
+    print(f"Generated marketplace in {time.perf_counter() - start:.1f}s")
+
+    driver = GraphDatabase.driver(uri, auth=(os.environ.get("NEO4J_USER", "neo4j"), os.environ.get("NEO4J_PASSWORD", "")))
+    try:
+        if args.reset:
+            print("Deleting existing marketplace nodes...")
+            reset_database(driver)
+        start = time.perf_counter()
+        print(f"Seeding {uri}:")
+        write_to_neo4j(driver, market, batch_size=args.batch_size)
+        print(f"Seeded in {time.perf_counter() - start:.1f}s")
+        print("Seller analytics need rollups: python -m app.commands.backfill_rollups")
+    finally:
+        driver.close()
+
+    manifest = market.manifest()
+    manifest["password"] = BENCH_PASSWORD
+    manifest["size"] = {f.name: getattr(size, f.name) for f in fields(MarketplaceSize)}
+    with open(args.manifest, "w") as fh:
+        json.dump(manifest, fh)
+    print(f"Wrote {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
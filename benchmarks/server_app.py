@@ -0,0 +1,26 @@
+"""
+The app on a preloaded memory backend, for benchmarks that need a real server.
+
+Every worker process generates the same deterministic marketplace when it
+imports this module, so all workers serve identical data without Neo4j:
+
+    REPOSITORY_BACKEND=memory gunicorn benchmarks.server_app:app
+"""
+import os
+
+os.environ["REPOSITORY_BACKEND"] = "memory"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from app.main import app  # noqa: E402,F401
+from app.repositories import MemoryRepository, set_repository  # noqa: E402
+from .fixtures import MarketplaceSize, generate_marketplace  # noqa: E402
+
+size = MarketplaceSize(
+    sellers=int(os.environ.get("BENCH_SELLERS", 50)),
+    buyers=int(os.environ.get("BENCH_BUYERS", 500)),
+    products=int(os.environ.get("BENCH_PRODUCTS", 1000)),
+    orders=int(os.environ.get("BENCH_ORDERS", 5000)),
+    image_bytes=0,
+)
+market = generate_marketplace(size, password_hash="")
+set_repository(MemoryRepository().load(market))
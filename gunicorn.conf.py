@@ -0,0 +1,32 @@
+"""
+gunicorn settings for production, derived in app/server.py:
+
+    gunicorn app.main:app
+"""
+from app.server import server_profile
+
+_profile = server_profile()
+
+bind = _profile["bind"]
+workers = _profile["workers"]
+worker_class = _profile["worker_class"]
+keepalive = _profile["keepalive"]
+max_requests = _profile["max_requests"]
+max_requests_jitter = _profile["max_requests_jitter"]
+timeout = _profile["timeout"]
+graceful_timeout = _profile["graceful_timeout"]
+# The app is imported in each worker after the fork, so every process
+# builds its own driver, caches and background threads in its lifespan
+preload_app = False
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    from app import database
+    from app.utils.hashing import password_hasher
+
+    # Only matters if preload_app is turned on: a driver opened in the master
+    # must not be shared, so the worker drops its copy and opens its own
+    database._driver = None
+    # Each worker gets its share of the cores for password hashing
+    password_hasher.workers = _profile["password_hash_workers"]
@@ -0,0 +1,35 @@
+import os
+
+# Settings are read at import time: run the app in-process on the memory backend
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+os.environ.setdefault("REPOSITORY_BACKEND", "memory")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "1000")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("RESERVATION_SWEEP_INTERVAL_SECONDS", "0")
+os.environ.setdefault("RECOMMENDATION_REBUILD_INTERVAL_HOURS", "0")
+
+import pytest  # noqa: E402
+from app.repositories import MemoryRepository, set_repository  # noqa: E402
+
+
+@pytest.fixture
+def repo():
+    """A fresh MemoryRepository installed as the app's backend"""
+    repository = MemoryRepository()
+    set_repository(repository)
+    yield repository
+    set_repository(None)
+
+
+@pytest.fixture
+def market(repo):
+    """One seller with a product and one buyer"""
+    seller = repo.create_seller({"name": "Mang Tonyo", "email": "tonyo@example.com", "password": "x",
+                                 "contact_number": "09170000000", "location": "Navotas",
+                                 "latitude": None, "longitude": None})
+    buyer = repo.create_buyer({"name": "Aling Nena", "email": "nena@example.com", "password": "x",
+                               "contact_number": "09180000000", "location": "Malabon"})
+    product = repo.create_product({"name": "Bangus", "type": "Milkfish", "price": 180.0, "quantity": 10,
+                                   "description": "", "image": ""}, seller["uid"])
+    return {"seller": seller, "buyer": buyer, "product": product}
@@ -0,0 +1,27 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("method, path", [
+    ("get", "/admin/query-stats"),
+    ("post", "/admin/slow-queries/profile"),
+    ("post", "/admin/jobs/reconcile_ratings/run"),
+])
+def test_admin_needs_the_token(monkeypatch, method, path):
+    monkeypatch.setattr(settings, "admin_token", None)
+    assert client.request(method, path, headers={"Authorization": "Bearer anything"}).status_code == 403
+
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    assert client.request(method, path).status_code == 401
+    assert client.request(method, path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_admin_with_the_token(monkeypatch, repo):
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    response = client.get("/admin/query-stats", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.bulk_import import iter_upload_rows
+
+
+class Upload:
+    """Just enough of a Request for the parser: headers plus a chunked body"""
+
+    def __init__(self, content_type, body, chunk_size=7):
+        self.headers = {"content-type": content_type}
+        self._body = body.encode()
+        self._chunk_size = chunk_size
+
+    async def stream(self):
+        for start in range(0, len(self._body), self._chunk_size):
+            yield self._body[start:start + self._chunk_size]
+
+    async def body(self):
+        return self._body
+
+
+def parse(content_type, body, chunk_size=7):
+    async def collect():
+        return [row async for row in iter_upload_rows(Upload(content_type, body, chunk_size))]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+def test_csv(chunk_size):
+    body = '\ufeffName,Type,Price,Quantity\r\nBangus,Milkfish,180,10\r\n\r\n"Tilapia, red",,95,\n'
+    assert parse("text/csv; charset=utf-8", body, chunk_size) == [
+        (1, {"name": "Bangus", "type": "Milkfish", "price": "180", "quantity": "10"}, None),
+        (2, {"name": "Tilapia, red", "type": None, "price": "95", "quantity": None}, None),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+def test_csv_quoted_field_spanning_lines(chunk_size):
+    body = 'name,description\nBangus,"Fresh\n\nfrom ""Dagupan"""\nTuna,plain\n'
+    assert parse("text/csv", body, chunk_size) == [
+        (1, {"name": "Bangus", "description": 'Fresh\n\nfrom "Dagupan"'}, None),
+        (2, {"name": "Tuna", "description": "plain"}, None),
+    ]
+
+
+def test_csv_extra_columns():
+    assert parse("text/csv", "name,price\nBangus,180,extra\n") == [(1, None, "Expected 2 columns, got 3")]
+
+
+def test_ndjson():
+    body = '{"name": "Bangus"}\n\nnot json\n[1]\n{"name": "Tuna"}'
+    assert parse("application/x-ndjson", body) == [
+        (1, {"name": "Bangus"}, None),
+        (2, None, "Invalid JSON"),
+        (3, None, "Expected a JSON object"),
+        (4, {"name": "Tuna"}, None),
+    ]
+
+
+def test_json():
+    assert parse("application/json", '[{"name": "Bangus"}, 3]') == [
+        (1, {"name": "Bangus"}, None),
+        (2, None, "Expected a JSON object"),
+    ]
+    with pytest.raises(HTTPException) as excinfo:
+        parse("application/json", '{"name": "Bangus"}')
+    assert excinfo.value.status_code == 400
+
+
+def test_unsupported_media_type():
+    with pytest.raises(HTTPException) as excinfo:
+        iter_upload_rows(Upload("text/plain", ""))
+    assert excinfo.value.status_code == 415
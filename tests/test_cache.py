@@ -0,0 +1,46 @@
+from app.utils import cache as cache_module
+from app.utils.cache import LRUCache
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache("test_cache", "Test cache", max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+    lines = list(cache.prometheus_lines())
+    assert 'test_cache_requests_total{result="hit"} 3' in lines
+    assert "test_cache_entries 2" in lines
+
+
+def test_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = LRUCache("test_cache", "Test cache", ttl=5)
+    cache.put(("buyer", "u1"), {"n": 1})
+    now[0] = 105.0
+    assert cache.get(("buyer", "u1")) == {"n": 1}
+    now[0] = 105.1
+    assert cache.get(("buyer", "u1")) is None
+    cache.invalidate(("buyer", "u1"))
+    assert len(cache) == 0
+
+    disabled = LRUCache("test_cache", "Test cache", ttl=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+
+
+def test_byte_budget():
+    cache = LRUCache("test_cache", "Test cache", max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"1234")
+    cache.put("a", b"123")
+    cache.put("too big", b"12345678901")
+    assert cache.get("too big") is None
+    cache.put("c", b"1234")
+    # a (3) + c (4) fit once b, the least recently used, is gone
+    assert cache.get("b") is None
+    assert "test_cache_bytes 7" in list(cache.prometheus_lines())
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+from app.repositories.common import co_purchase_increments, counts_in_rollup, plan_product_upsert, rollup_day
+
+
+def test_rollup_rules():
+    assert counts_in_rollup("pending") and counts_in_rollup("delivered")
+    assert not counts_in_rollup("cancelled")
+    # Epoch floats (neomodel) and datetimes land on the same UTC day
+    moment = datetime(2026, 3, 1, 23, 30, tzinfo=timezone.utc)
+    assert rollup_day(moment) == rollup_day(moment.timestamp()) == "2026-03-01"
+
+
+def test_co_purchase_first_delivery_only():
+    history = {"b1": {"p1": 1, "p2": 2, "p3": 1}}
+    # p2 was delivered to b1 before, so only p1 and p3 are new
+    increments = co_purchase_increments([("b1", "p1"), ("b1", "p2"), ("b1", "p3")], history)
+    assert increments == {("p1", "p2"): 1, ("p1", "p3"): 1, ("p2", "p3"): 1}
+    assert co_purchase_increments([("b1", "p2")], history) == {}
+
+
+def test_plan_product_upsert():
+    owned, by_name = {"u1"}, {"bangus": "u1"}
+    creates, updates, results = plan_product_upsert([
+        {"name": "BANGUS", "price": 1.0},
+        {"uid": "u9", "price": 1.0},
+        {"name": "Tuna", "type": "t", "price": 2.0, "quantity": 1},
+        {"name": "tuna", "quantity": 3},
+        {"name": "Galunggong"},
+    ], owned, by_name, now="now")
+    assert updates[0] == {"uid": "u1", "changes": {"price": 1.0}}
+    assert [r["status"] for r in results] == ["updated", "error", "created", "updated", "error"]
+    assert len(creates) == 1 and creates[0]["name"] == "Tuna"
+    assert updates[1] == {"uid": creates[0]["uid"], "changes": {"quantity": 3}}
+    assert results[4]["detail"] == "New product needs type, price, quantity"
@@ -0,0 +1,20 @@
+from app.utils.conditional import etag_matches, make_etag
+
+
+def test_make_etag_is_weak_and_stable():
+    etag = make_etag("product", "abc", 3)
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == make_etag("product", "abc", 3)
+    assert etag != make_etag("product", "abc", 4)
+
+
+def test_etag_matches():
+    etag = make_etag("x")
+    strong = etag[2:]
+    assert etag_matches(etag, etag)
+    assert etag_matches(strong, etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches('W/"other"', etag)
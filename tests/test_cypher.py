@@ -0,0 +1,150 @@
+"""
+Neo4jRepository checks that need no database: variable scoping of the
+generated Cypher, and which version counters writes bump.
+
+Each WITH / RETURN replaces the variables in scope with what it projects,
+so a variable it drops cannot be used afterwards; Neo4j only reports that
+when the query runs. check_scope follows the clauses and fails on any
+reference to a variable that is no longer in scope. It only understands
+the read shapes of the product listings (node patterns, WITH, RETURN,
+ORDER BY), not MERGE, SET or relationship variables.
+"""
+import re
+
+import pytest
+
+from app.repositories import neo4j_repository
+from app.repositories.neo4j_repository import PRODUCT_SORT_KEYS, Neo4jRepository
+
+CLAUSE = re.compile(r"\b(OPTIONAL MATCH|MATCH|UNWIND|WHERE|WITH|RETURN|ORDER BY|SKIP|LIMIT)\b")
+# x.prop or x {map projection}; not labels (:Seller {...}), params or properties
+REFERENCE = re.compile(r"(?<![\w$.:])([A-Za-z_]\w*)\s*(?:\.(?!\*)|\{)")
+IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+SUBQUERIES = {"EXISTS", "COUNT", "COLLECT", "CALL"}
+
+
+def _strip(text):
+    text = re.sub(r"'[^']*'", "''", text)
+    # Pattern comprehensions bind their own variables
+    while re.search(r"\[[^\[\]]*\]", text):
+        text = re.sub(r"\[[^\[\]]*\]", "_list", text)
+    return text
+
+
+def _bare_items(body):
+    """Projection items that are just a variable"""
+    return {item.strip() for item in _strip(body).split(",") if IDENTIFIER.fullmatch(item.strip())}
+
+
+def _projection(body):
+    names = _bare_items(body)
+    for item in _strip(body).split(","):
+        alias = re.search(r"\bAS\s+(\w+)\s*$", item.strip())
+        if alias:
+            names.add(alias.group(1))
+    return names
+
+
+def check_scope(query):
+    parts = CLAUSE.split(query)
+    scope, before = set(), set()
+    for keyword, body in zip(parts[1::2], parts[2::2]):
+        stripped = _strip(body)
+        if keyword.endswith("MATCH"):
+            scope |= set(re.findall(r"\((\w+)", body))
+            continue
+        if keyword == "UNWIND":
+            scope.add(re.search(r"\bAS\s+(\w+)", body).group(1))
+            continue
+        visible = scope | before if keyword == "ORDER BY" else scope
+        refs = set(REFERENCE.findall(stripped)) - SUBQUERIES
+        if keyword in ("WITH", "RETURN"):
+            refs |= _bare_items(body)
+        if keyword == "ORDER BY":
+            refs |= {term.split()[0] for term in stripped.split(",") if IDENTIFIER.fullmatch(term.split()[0])}
+        missing = refs - visible
+        assert not missing, f"{keyword} uses {sorted(missing)} out of scope in:\n{query}"
+        if keyword in ("WITH", "RETURN"):
+            before, scope = scope, _projection(body)
+
+
+class CapturingRepository(Neo4jRepository):
+    def __init__(self):
+        self.queries = []
+
+    def _read(self, query, params=None):
+        self.queries.append(query)
+        return []
+
+
+def test_check_scope_catches_a_dropped_variable():
+    with pytest.raises(AssertionError):
+        check_scope("MATCH (p) WITH p, p.price AS v WITH p RETURN p.uid AS uid, v ORDER BY v")
+
+
+@pytest.mark.parametrize("sort_key", PRODUCT_SORT_KEYS)
+@pytest.mark.parametrize("after", [None, (1, "uid")])
+def test_list_product_page_scoping(sort_key, after):
+    repo = CapturingRepository()
+    repo.list_product_page(sort_key, descending=True, limit=10, after=after, seller_uid="s")
+    check_scope(repo.queries[0])
+
+
+def test_list_products_scoping():
+    repo = CapturingRepository()
+    repo.list_products(name="bangus")
+    check_scope(repo.queries[0])
+
+
+class FakeTx:
+    def __init__(self):
+        self.statements = []
+
+    def run(self, query, params=None):
+        self.statements.append((query, params))
+        return self
+
+    def consume(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, tx):
+        self.tx = tx
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work):
+        return work(self.tx)
+
+
+@pytest.mark.parametrize("flags, bumped", [
+    ({"catalog": True}, ["catalog"]),
+    ({"stock": True}, ["stock"]),
+])
+def test_version_bumps(monkeypatch, flags, bumped):
+    tx = FakeTx()
+    monkeypatch.setattr(neo4j_repository, "get_db", lambda: type("Driver", (), {"session": lambda self: FakeSession(tx)})())
+    CapturingRepository()._execute("write", lambda tx: None, **flags)
+    kinds = []
+    for query, params in tx.statements:
+        if query == neo4j_repository.BUMP_CATALOG_VERSION:
+            kinds.append("catalog")
+        elif query == neo4j_repository.BUMP_STOCK_VERSION:
+            assert params["id"].startswith("stock-")
+            kinds.append("stock")
+    assert kinds == bumped
+
+
+def test_catalog_version_combines_the_counters():
+    repo = CapturingRepository()
+    repo._read = lambda query, params=None: [
+        {"id": "catalog", "version": 7}, {"id": "stock-3", "version": 2}, {"id": "stock-9", "version": 5},
+    ]
+    assert repo.get_catalog_version() == "7.7"
+    repo._read = lambda query, params=None: []
+    assert repo.get_catalog_version() == "0.0"
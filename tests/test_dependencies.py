@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+
+from app.utils.dependencies import get_current_buyer, get_current_seller
+
+
+def test_current_user_records(repo, market):
+    seller, buyer = market["seller"], market["buyer"]
+    assert get_current_seller(("seller", seller["uid"]))["email"] == "tonyo@example.com"
+    assert get_current_buyer(("buyer", buyer["uid"]))["email"] == "nena@example.com"
+
+
+@pytest.mark.parametrize("dependency, user", [
+    (get_current_buyer, ("seller", "any")),
+    (get_current_seller, ("buyer", "any")),
+    (get_current_seller, ("seller", "missing")),
+])
+def test_wrong_type_or_missing_user(repo, market, dependency, user):
+    if user[1] == "any":
+        user = (user[0], market[user[0]]["uid"])
+    with pytest.raises(HTTPException) as excinfo:
+        dependency(user)
+    assert excinfo.value.status_code == 401
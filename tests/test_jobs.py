@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils.jobs import CronSchedule
+
+
+def at(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_every_fifteen_minutes():
+    schedule = CronSchedule("*/15 * * * *")
+    assert schedule.next_after(at(2026, 1, 1, 10, 0)) == at(2026, 1, 1, 10, 15)
+    assert schedule.next_after(at(2026, 1, 1, 10, 59, 30)) == at(2026, 1, 1, 11, 0)
+
+
+def test_lists_and_ranges():
+    schedule = CronSchedule("0,30 9-10 * * *")
+    assert schedule.next_after(at(2026, 1, 1, 10, 30)) == at(2026, 1, 2, 9, 0)
+
+
+def test_weekday_and_aliases():
+    # 2026-01-01 is a Thursday; 0 and 7 are both Sunday
+    assert CronSchedule("0 4 * * 0").next_after(at(2026, 1, 1)) == at(2026, 1, 4, 4, 0)
+    assert CronSchedule("0 4 * * 7").next_after(at(2026, 1, 1)) == at(2026, 1, 4, 4, 0)
+    assert CronSchedule("@monthly").next_after(at(2026, 1, 1)) == at(2026, 2, 1)
+
+
+def test_day_of_month_or_weekday():
+    # Both restricted: either one matching is enough, as in cron
+    schedule = CronSchedule("0 0 15 * 1")
+    assert schedule.next_after(at(2026, 1, 1)) == at(2026, 1, 5)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "5-1 * * * *", "x * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_never_matches():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(at(2026, 1, 1))
@@ -0,0 +1,31 @@
+from app.utils.order_states import ORDER_STATUSES, ORDER_TRANSITIONS, allowed_sources, can_transition
+
+
+def test_every_status_has_transitions():
+    assert set(ORDER_TRANSITIONS) == set(ORDER_STATUSES)
+    for targets in ORDER_TRANSITIONS.values():
+        assert targets <= set(ORDER_STATUSES)
+
+
+def test_happy_path():
+    path = ["pending", "confirmed", "processing", "shipped", "delivered"]
+    for current, new in zip(path, path[1:]):
+        assert can_transition(current, new)
+
+
+def test_cancel_until_shipped():
+    assert [s for s in ORDER_STATUSES if can_transition(s, "cancelled")] == ["pending", "confirmed", "processing"]
+
+
+def test_final_and_unknown_statuses():
+    for status in ORDER_STATUSES:
+        assert not can_transition("delivered", status)
+        assert not can_transition("cancelled", status)
+    assert not can_transition(None, "confirmed")
+    assert not can_transition("pending", "delivered")
+
+
+def test_allowed_sources():
+    assert allowed_sources("cancelled") == {"pending", "confirmed", "processing"}
+    assert allowed_sources("delivered") == {"shipped"}
+    assert allowed_sources("pending") == frozenset()
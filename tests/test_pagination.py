@@ -0,0 +1,22 @@
+import base64
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    cursor = encode_cursor("price", 180.5, "abc")
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "price") == (180.5, "abc")
+
+
+def test_other_sort_is_rejected():
+    assert decode_cursor(encode_cursor("price", 1, "abc"), "-price") is None
+
+
+def test_malformed_cursors():
+    assert decode_cursor("not a cursor", "price") is None
+    assert decode_cursor("", "price") is None
+    forged = base64.urlsafe_b64encode(b'["price","cheap","abc"]').decode()
+    assert decode_cursor(forged, "price") is None
+    forged = base64.urlsafe_b64encode(b'["price",1,2]').decode()
+    assert decode_cursor(forged, "price") is None
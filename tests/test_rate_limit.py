@@ -0,0 +1,72 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.config import settings
+from app.utils.rate_limit import LoginRateLimiter, MemoryBackend, client_ip
+
+
+def test_window_limit_and_retry_after():
+    backend = MemoryBackend()
+    assert [backend.hit("k", 3, 60, 10.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Full window: wait for it to end, then for the previous count to decay
+    assert backend.hit("k", 3, 60, 10.0) == pytest.approx(50.0)
+
+
+def test_previous_window_is_weighted():
+    backend = MemoryBackend()
+    for _ in range(4):
+        backend.hit("k", 4, 60, 30.0)
+    # A quarter into the next window three quarters of the 4 still count
+    assert backend.hit("k", 4, 60, 75.0) == 0.0
+    assert backend.hit("k", 4, 60, 75.0) > 0
+    # Two windows later nothing carries over
+    assert backend.hit("k", 4, 60, 180.0) == 0.0
+
+
+def test_rejected_attempts_are_not_counted():
+    backend = MemoryBackend()
+    backend.hit("k", 1, 60, 0.0)
+    for _ in range(10):
+        assert backend.hit("k", 1, 60, 30.0) > 0
+    assert backend.hit("k", 1, 60, 120.0) == 0.0
+
+
+def test_reset_and_sweep():
+    backend = MemoryBackend(max_keys=2)
+    backend.hit("a", 1, 60, 0.0)
+    backend.reset("a")
+    assert backend.hit("a", 1, 60, 0.0) == 0.0
+    backend.hit("b", 1, 60, 0.0)
+    backend.hit("c", 1, 60, 600.0)
+    assert set(backend._windows) == {"c"}
+
+
+def test_login_limiter_raises_429():
+    limiter = LoginRateLimiter(MemoryBackend(), ip_limit=0, ip_window=60, email_limit=2, email_window=60)
+    limiter.check("1.1.1.1", "A@example.com")
+    limiter.check("1.1.1.1", "a@example.com")
+    with pytest.raises(HTTPException) as excinfo:
+        limiter.check("2.2.2.2", "a@example.com")
+    assert excinfo.value.status_code == 429
+    assert int(excinfo.value.headers["Retry-After"]) >= 1
+    assert limiter.blocked == {"ip": 0, "email": 1}
+    limiter.reset_email("A@EXAMPLE.COM")
+    limiter.check("2.2.2.2", "a@example.com")
+
+
+def request(forwarded=None, peer="10.0.0.1"):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+def test_client_ip(monkeypatch):
+    monkeypatch.setattr(settings, "trusted_proxy_hops", 0)
+    assert client_ip(request("6.6.6.6")) == "10.0.0.1"
+    monkeypatch.setattr(settings, "trusted_proxy_hops", 1)
+    # The client may send its own X-Forwarded-For; only the proxy's entry counts
+    assert client_ip(request("6.6.6.6, 1.2.3.4")) == "1.2.3.4"
+    assert client_ip(request()) == "10.0.0.1"
+    monkeypatch.setattr(settings, "trusted_proxy_hops", 2)
+    assert client_ip(request("6.6.6.6, 1.2.3.4, 10.0.0.9")) == "1.2.3.4"
+    assert client_ip(request("1.2.3.4")) == "1.2.3.4"
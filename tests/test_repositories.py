@@ -0,0 +1,102 @@
+"""
+Repository behaviour on the memory backend, plus a check that both backends
+implement the interface with the same signatures.
+"""
+import inspect
+
+import pytest
+
+from app.repositories import MemoryRepository, Neo4jRepository, Repository
+from app.repositories.common import CLEANUP_STEPS
+
+
+def shape(method):
+    return [(p.name, p.default) for p in inspect.signature(method).parameters.values()]
+
+
+@pytest.mark.parametrize("backend", [MemoryRepository, Neo4jRepository])
+def test_backends_match_the_interface(backend):
+    assert not backend.__abstractmethods__
+    methods = [name for name, value in vars(Repository).items() if inspect.isfunction(value)]
+    for name in methods:
+        assert shape(getattr(backend, name)) == shape(getattr(Repository, name)), name
+
+
+def test_order_reserves_and_confirm_commits_stock(repo, market):
+    product_uid = market["product"]["uid"]
+    order = repo.create_order(market["buyer"]["uid"], product_uid, 4, reserve_seconds=600)
+    assert order["status"] == "pending"
+    assert repo.get_product(product_uid)["quantity"] == 6
+    assert repo.create_order(market["buyer"]["uid"], product_uid, 7, reserve_seconds=600) is None
+
+    updated, rejected = repo.transition_orders([order["uid"], "missing"], "confirmed", {"pending"})
+    assert [o["status"] for o in updated] == ["confirmed"]
+    assert rejected == {"missing": None}
+    assert repo.get_product(product_uid)["quantity"] == 6
+
+
+def test_cancel_gives_stock_back(repo, market):
+    product_uid = market["product"]["uid"]
+    pending = repo.create_order(market["buyer"]["uid"], product_uid, 3, reserve_seconds=600)
+    confirmed = repo.create_order(market["buyer"]["uid"], product_uid, 2, reserve_seconds=600)
+    repo.transition_orders([confirmed["uid"]], "confirmed", {"pending"})
+    repo.transition_orders([pending["uid"], confirmed["uid"]], "cancelled", {"pending", "confirmed"})
+    assert repo.get_product(product_uid)["quantity"] == 10
+
+
+def test_transition_checks_current_status_and_seller(repo, market):
+    order = repo.create_order(market["buyer"]["uid"], market["product"]["uid"], 1, reserve_seconds=600)
+    updated, rejected = repo.transition_orders([order["uid"]], "delivered", {"shipped"})
+    assert updated == [] and rejected == {order["uid"]: "pending"}
+    updated, rejected = repo.transition_orders([order["uid"]], "confirmed", {"pending"}, seller_uid="other")
+    assert updated == [] and rejected == {order["uid"]: None}
+
+
+def test_catalog_version_changes_on_writes(repo, market):
+    version = repo.get_catalog_version()
+    assert repo.get_catalog_version() == version
+    repo.update_product(market["product"]["uid"], {"price": 200.0})
+    assert repo.get_catalog_version() != version
+
+
+def test_deleted_seller_hides_products_and_keeps_order_history(repo, market):
+    seller_uid, product_uid = market["seller"]["uid"], market["product"]["uid"]
+    order = repo.create_order(market["buyer"]["uid"], product_uid, 1, reserve_seconds=600)
+    assert repo.delete_seller(seller_uid)
+    assert repo.get_product(product_uid) is None
+    assert repo.list_products() == []
+    assert repo.list_deleted() == [("seller", seller_uid)]
+
+    for step in CLEANUP_STEPS["seller"]:
+        while repo.cleanup_batch("seller", seller_uid, step, limit=10):
+            pass
+    assert repo.list_deleted() == []
+    assert repo.get_order(order["uid"])["fish_product_name"] == "Bangus"
+
+
+def test_bulk_upsert_matches_by_name(repo, market):
+    seller_uid = market["seller"]["uid"]
+    results = repo.bulk_upsert_products(seller_uid, [
+        {"name": "bangus", "price": 190.0},
+        {"name": "Tuna", "type": "Yellowfin", "price": 350.0, "quantity": 5},
+        {"name": "Lapu-lapu", "price": 400.0},
+    ])
+    assert [r["status"] for r in results] == ["updated", "created", "error"]
+    assert results[0]["uid"] == market["product"]["uid"]
+    names = sorted(p["name"] for p in repo.list_products(seller_uid=seller_uid))
+    assert names == ["Bangus", "Tuna"]
+
+
+def test_rate_limit_counters(repo):
+    assert repo.rate_limit_hit("k", 1, 60, 0.0) == 0.0
+    assert repo.rate_limit_hit("k", 1, 60, 1.0) > 0
+    repo.rate_limit_reset("k")
+    assert repo.rate_limit_hit("k", 1, 60, 1.0) == 0.0
+
+
+def test_search(repo, market):
+    assert repo.search("products", "BANG") == [
+        {"id": market["product"]["uid"], "name": "Bangus", "price": 180.0, "location": "Milkfish"}
+    ]
+    assert repo.search("sellers", "tonyo") == [{"id": market["seller"]["uid"], "name": "Mang Tonyo", "location": "Navotas"}]
+    assert repo.search("buyers", "nobody") == []
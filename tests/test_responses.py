@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from app.config import settings
+from app.utils.responses import model_response
+
+
+class Item(BaseModel):
+    uid: str
+    price: float
+
+
+@pytest.fixture
+def fast_json(monkeypatch):
+    monkeypatch.setattr(settings, "fast_json", True)
+    monkeypatch.setattr(settings, "fast_json_stream_threshold", 2)
+    monkeypatch.setattr("app.utils.responses.STREAM_CHUNK_SIZE", 2)
+
+
+def body(response):
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(collect())
+
+
+def test_small_and_streamed_lists(fast_json):
+    items = [{"uid": str(i), "price": i, "extra": "dropped"} for i in range(5)]
+    assert not isinstance(model_response(items[:2], Item), StreamingResponse)
+    response = model_response(items, Item)
+    assert isinstance(response, StreamingResponse)
+    assert json.loads(body(response)) == [{"uid": str(i), "price": float(i)} for i in range(5)]
+
+
+def test_invalid_row_fails_before_streaming(fast_json):
+    items = [{"uid": str(i), "price": i} for i in range(4)] + [{"uid": "bad", "price": "free"}]
+    with pytest.raises(ValidationError):
+        model_response(items, Item)
+
+
+def test_fast_json_off_returns_content(monkeypatch):
+    monkeypatch.setattr(settings, "fast_json", False)
+    items = [{"uid": "1", "price": 1}]
+    assert model_response(items, Item) is items